@@ -3,8 +3,15 @@ from src.ets_decomposition import ETSDecomposition
 from src.time_series_models import TimeSeriesModels
 from src.etl_pipeline import ETLPipeline
 from src.model_saving import ModelSaver
-from src.hyperparametertune import HyperparameterTuning
+from src.hyperparametertune import HyperparameterTuning, SCORE_STEPS
+from src.result_cache import ResultCache
+from src.background_jobs import JobManager
+from src.features import FeatureBuilder
+import pandas as pd
 import logging
+import os
+import time
+from src.data_store import get_store
 
 # Title of the app
 st.title("Time Series Analysis and Forecasting")
@@ -16,12 +23,117 @@ raw_file_name = st.sidebar.text_input("Raw File Name", "final_data.csv")
 processed_dir = "time-series-project/data/processed"
 local_raw_file = "time-series-project/data/raw/final_data.csv"
 save_dir = "time-series-project/models"
+storage_format = "feather"
+holidays_file = "time-series-project/data/calendar/holidays.csv"
+
+
+@st.cache_resource
+def get_result_cache():
+    """One ResultCache per server process, shared by all sessions and reruns."""
+    return ResultCache(cache_dir=f"{save_dir}/cache")
+
+
+@st.cache_resource
+def get_job_manager():
+    """One JobManager per server process, so jobs survive reruns and are visible to every session."""
+    return JobManager(max_workers=1)
+
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def load_decomposition(file_path, fingerprint, period=7):
+    """
+    Load the processed data and decompose it, once per file version.
+
+    `fingerprint` (modification time and size of the file) is only part of
+    the cache key: a new ETL run changes it and invalidates the entry.
+    """
+    ets = ETSDecomposition(file_path=file_path, date_col="Date", value_col="Views",
+                           result_cache=get_result_cache())
+    ets.load_data()
+    return ets.decompose(period=period)
+
+
+def file_fingerprint(path):
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def train_models_job(job, time_series_data, result_cache):
+    """Background job: train and save the initial ARIMA, SARIMA and SARIMAX models."""
+    models = TimeSeriesModels(time_series_data, result_cache=result_cache)
+    model_saver = ModelSaver(save_dir)
+    trained = {}
+
+    job.report(0.0, "Training ARIMA")
+    arima_results = models.train_arima(order=(1, 1, 1))  # Initial ARIMA params
+    model_saver.save_model(arima_results["model"], "ARIMA_Initial")
+    trained["ARIMA"] = arima_results["predictions"]
+
+    job.report(1 / 3, "Training SARIMA")
+    sarima_results = models.train_sarima(order=(1, 1, 1), seasonal_order=(0, 1, 1, 7))  # Initial SARIMA params
+    model_saver.save_model(sarima_results["model"], "SARIMA_Initial")
+    trained["SARIMA"] = sarima_results["predictions"]
+
+    job.report(2 / 3, "Training SARIMAX")
+    # Day-of-week and holiday regressors, split like the series
+    sarimax_data, exog_data = FeatureBuilder(holidays_file=holidays_file).build(time_series_data)
+    models_with_exog = TimeSeriesModels(sarimax_data, result_cache=result_cache, exog=exog_data)
+    sarimax_results = models_with_exog.train_sarimax(order=(1, 1, 1), seasonal_order=(0, 1, 1, 7))
+    model_saver.save_model(sarimax_results["model"], "SARIMAX_Initial")
+    trained["SARIMAX"] = sarimax_results["predictions"]
+    return pd.DataFrame(trained)
+
+
+def tune_models_job(job, time_series_data, result_cache):
+    """Background job: tune ARIMA, SARIMA and SARIMAX, reporting progress per fit."""
+    stages = ["ARIMA", "SARIMA", "SARIMAX"]
+    best = {}
+
+    def progress_for(stage):
+        offset = stages.index(stage)
+
+        def progress(fits_done, n_candidates):
+            share = min(fits_done / n_candidates, 1.0)
+            job.report((offset + share) / len(stages), f"Tuning {stage}: {fits_done} fits of {n_candidates} candidates")
+        return progress
+
+    job.report(0.0, "Tuning ARIMA")
+    tuner = HyperparameterTuning(time_series_data, result_cache=result_cache, progress=progress_for("ARIMA"))
+    best["ARIMA"] = tuner.tune_arima(p_values=[0, 1, 2], d_values=[0, 1], q_values=[0, 1, 2])
+
+    job.report(1 / 3, "Tuning SARIMA")
+    tuner.progress = progress_for("SARIMA")
+    best["SARIMA"] = tuner.tune_sarima(
+        p_values=[0, 1], d_values=[0, 1], q_values=[0, 1],
+        P_values=[0, 1], D_values=[0, 1], Q_values=[0, 1], m=7
+    )
+
+    job.report(2 / 3, "Tuning SARIMAX")
+    features = FeatureBuilder(holidays_file=holidays_file)
+    sarimax_data, exog_data = features.build(time_series_data)
+    tuner_with_exog = HyperparameterTuning(sarimax_data, exog_train=exog_data, result_cache=result_cache,
+                                           progress=progress_for("SARIMAX"),
+                                           exog_future=features.future(sarimax_data, SCORE_STEPS))
+    best["SARIMAX"] = tuner_with_exog.tune_sarimax(
+        p_values=[0, 1], d_values=[0, 1], q_values=[0, 1],
+        P_values=[0, 1], D_values=[0, 1], Q_values=[0, 1], m=7
+    )
+    return best
+
+
+result_cache = get_result_cache()
+job_manager = get_job_manager()
+
+# Fall back to the CSV export until the ETL has written the columnar store
+processed_file_path = get_store(storage_format, processed_dir).path
+if not os.path.exists(processed_file_path):
+    processed_file_path = f"{processed_dir}/processed_data.csv"
 
 # Run ETL Pipeline
 if st.sidebar.button("Run ETL Pipeline"):
     st.write("Running ETL Pipeline...")
     try:
-        etl = ETLPipeline(bucket_name, raw_file_name, local_raw_file, processed_dir)
+        etl = ETLPipeline(bucket_name, raw_file_name, local_raw_file, processed_dir, storage_format=storage_format)
         etl.run_pipeline()
         st.success("ETL Pipeline completed successfully!")
     except Exception as e:
@@ -31,85 +143,52 @@ if st.sidebar.button("Run ETL Pipeline"):
 if st.sidebar.button("Perform ETS Decomposition"):
     st.write("Performing ETS Decomposition...")
     try:
-        processed_file_path = f"{processed_dir}/processed_data.csv"
-        ets = ETSDecomposition(file_path=processed_file_path, date_col="Date", value_col="Views")
-        ets.load_data()
-        components = ets.decompose(period=7)  # Weekly seasonality
+        components = load_decomposition(processed_file_path, file_fingerprint(processed_file_path))
         st.success("ETS Decomposition completed successfully!")
         st.write("Decomposition Components:")
-        st.dataframe(components)
+        st.dataframe(pd.DataFrame(components))
     except Exception as e:
         st.error(f"ETS Decomposition failed: {e}")
 
 # Train Models
 if st.sidebar.button("Train Models"):
-    st.write("Training Models...")
     try:
-        processed_file_path = f"{processed_dir}/processed_data.csv"
-        ets = ETSDecomposition(file_path=processed_file_path, date_col="Date", value_col="Views")
-        ets.load_data()
-        components = ets.decompose(period=7)
+        components = load_decomposition(processed_file_path, file_fingerprint(processed_file_path))
         time_series_data = components["residual"].dropna()  # Use residuals
-
-        models = TimeSeriesModels(time_series_data)
-
-        # Train ARIMA
-        arima_results = models.train_arima(order=(1, 1, 1))  # Initial ARIMA params
-        model_saver = ModelSaver(save_dir)
-        model_saver.save_model(arima_results["model"], "ARIMA_Initial")
-        st.write("ARIMA model trained and saved.")
-
-        # Train SARIMA
-        sarima_results = models.train_sarima(order=(1, 1, 1), seasonal_order=(0, 1, 1, 7))  # Initial SARIMA params
-        model_saver.save_model(sarima_results["model"], "SARIMA_Initial")
-        st.write("SARIMA model trained and saved.")
-
-        # Train SARIMAX
-        exog_data = None  # Replace with actual exogenous data
-        sarimax_results = models.train_sarimax(
-            order=(1, 1, 1), seasonal_order=(0, 1, 1, 7), exog_train=exog_data, exog_test=None
-        )
-        model_saver.save_model(sarimax_results["model"], "SARIMAX_Initial")
-        st.write("SARIMAX model trained and saved.")
-        st.success("All models trained successfully!")
+        job_manager.submit("Train Models", train_models_job, time_series_data, result_cache)
     except Exception as e:
         st.error(f"Model training failed: {e}")
 
 # Hyperparameter Tuning
 if st.sidebar.button("Hyperparameter Tuning"):
-    st.write("Tuning Hyperparameters...")
     try:
-        processed_file_path = f"{processed_dir}/processed_data.csv"
-        ets = ETSDecomposition(file_path=processed_file_path, date_col="Date", value_col="Views")
-        ets.load_data()
-        components = ets.decompose(period=7)
+        components = load_decomposition(processed_file_path, file_fingerprint(processed_file_path))
         time_series_data = components["residual"].dropna()  # Use residuals
-
-        tuner = HyperparameterTuning(time_series_data)
-
-        # Tune ARIMA
-        st.write("Tuning ARIMA parameters...")
-        arima_params = tuner.tune_arima(p_values=[0, 1, 2], d_values=[0, 1], q_values=[0, 1, 2])
-        st.write(f"Best ARIMA Parameters: {arima_params}")
-
-        # Tune SARIMA
-        st.write("Tuning SARIMA parameters...")
-        sarima_params = tuner.tune_sarima(
-            p_values=[0, 1], d_values=[0, 1], q_values=[0, 1],
-            P_values=[0, 1], D_values=[0, 1], Q_values=[0, 1], m=7
-        )
-        st.write(f"Best SARIMA Parameters: {sarima_params}")
-
-        # Tune SARIMAX
-        st.write("Tuning SARIMAX parameters...")
-        exog_data = None  # Replace with actual exogenous data
-        tuner_with_exog = HyperparameterTuning(time_series_data, exog_train=exog_data)
-        sarimax_params = tuner_with_exog.tune_sarimax(
-            p_values=[0, 1], d_values=[0, 1], q_values=[0, 1],
-            P_values=[0, 1], D_values=[0, 1], Q_values=[0, 1], m=7
-        )
-        st.write(f"Best SARIMAX Parameters: {sarimax_params}")
-
-        st.success("Hyperparameter tuning completed successfully!")
+        job_manager.submit("Hyperparameter Tuning", tune_models_job, time_series_data, result_cache)
     except Exception as e:
         st.error(f"Hyperparameter tuning failed: {e}")
+
+# Background jobs: progress, cancellation and results
+for name, job in list(job_manager.jobs.items()):
+    st.subheader(name)
+    if job.running:
+        st.progress(job.progress, text=f"{job.message} ({job.elapsed:.0f}s)")
+        if st.button("Cancel", key=f"cancel-{name}"):
+            job.cancel()
+    elif job.status == "done":
+        st.success(f"{name} completed in {job.elapsed:.1f}s.")
+        if name == "Train Models":
+            st.write("Test-set predictions of the saved models:")
+            st.dataframe(job.result)
+        else:
+            for model_name, params in job.result.items():
+                st.write(f"Best {model_name} Parameters: {params}")
+    elif job.status == "cancelled":
+        st.warning(f"{name} was cancelled.")
+    else:
+        st.error(f"{name} failed: {job.error}")
+
+# Poll while jobs are running; cached data keeps these reruns cheap
+if job_manager.any_running():
+    time.sleep(1)
+    st.rerun()
@@ -0,0 +1,43 @@
+import argparse
+import os
+import sys
+from src.benchmark_suite import PROFILES, compare, load_report, run_suite, save_report
+
+BENCHMARK_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline's hot paths.")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="quick",
+                        help="quick: final_data.csv scale; full: up to millions of points and thousands of series")
+    parser.add_argument("--select", help="Only run cases whose name contains this text, e.g. 'tune.'")
+    parser.add_argument("--repeats", type=int, default=3, help="Timed runs per case and size")
+    parser.add_argument("--output", default=os.path.join(BENCHMARK_DIR, "latest.json"))
+    parser.add_argument("--baseline", help="Baseline report (default: benchmarks/baseline_<profile>.json)")
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=1.25, help="Slowdown ratio counted as a regression")
+    args = parser.parse_args()
+
+    baseline_file = args.baseline or os.path.join(BENCHMARK_DIR, f"baseline_{args.profile}.json")
+    report = run_suite(args.profile, select=args.select, repeats=args.repeats)
+    save_report(report, args.output)
+    print(f"Report written to {args.output}")
+
+    if args.save_baseline:
+        save_report(report, baseline_file)
+        print(f"Baseline written to {baseline_file}")
+        return 0
+    if not os.path.exists(baseline_file):
+        print(f"No baseline at {baseline_file}; run with --save-baseline to create one.")
+        return 0
+
+    rows = compare(report, load_report(baseline_file), tolerance=args.tolerance)
+    for row in rows:
+        print(f"{row['case']:<22} {row['size']:>10,}  x{row['ratio']:.2f}  {row['status']}")
+    regressions = [row for row in rows if row["status"] == "regression"]
+    print(f"{len(regressions)} regression(s) out of {len(rows)} compared case(s).")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,23 +1,50 @@
+import argparse
 import logging
 import os
-from src.ets_decomposition import ETSDecomposition
-from src.time_series_models import TimeSeriesModels
-from src.etl_pipeline import ETLPipeline
-from src.model_saving import ModelSaver
-from src.hyperparametertune import HyperparameterTuning
+import sys
 from src.logging_config import setup_logging
+from src.instrumentation import profiled
 
-def main():
+MODEL_NAMES = ("ARIMA", "SARIMA", "SARIMAX")
+
+def main(force=(), profile=None, targets=None, local=False):
+    """
+    Run the pipeline, or only the stages needed for `targets`.
+
+    Args:
+        force (tuple): Stage names to rerun even if unchanged.
+        profile (str): 'cprofile' or 'tracemalloc' to profile the run.
+        targets (list): Stages to bring up to date (with their upstream
+            stages); None runs every stage.
+        local (bool): Process the local raw file without contacting S3.
+    """
     try:
         # Set up logging
-        setup_logging(log_file="time_series_pipeline.log")
+        setup_logging(log_file="time_series_pipeline.log", metrics_file="time_series_metrics.jsonl")
         logger = logging.getLogger("TimeSeriesPipeline")
 
         logger.info("Starting the time series pipeline...")
 
         try:
+            # Imported here so the CLI starts (and --help answers) without loading pandas
+            from src.ets_decomposition import ETSDecomposition
+            from src.time_series_models import TimeSeriesModels
+            from src.etl_pipeline import ETLPipeline
+            from src.model_saving import ModelSaver
+            from src.hyperparametertune import HyperparameterTuning, SCORE_STEPS
+            from src.search_strategies import SuccessiveHalving
+            from src.fit_cache import FitCache
+            from src.features import FeatureBuilder
+            from src.baseline_models import HoltWinters
+            from src.result_cache import ResultCache
+            from src.reporting import render_decomposition
+            from src.orchestrator import Pipeline
+            from src.work_queue import SQLiteWorkQueue
+            from src.incremental_update import IncrementalUpdater
+
             # Initialize ModelSaver
             model_saver = ModelSaver(save_dir="time-series-project/models")
+            result_cache = ResultCache(cache_dir="time-series-project/models/cache")
 
             # Ensure the directory exists
             if not os.path.exists("time-series-project/models"):
@@ -25,7 +52,6 @@ def main():
                 logger.info("Created models directory.")
 
             # File path
-            logger.info("Starting ETL pipeline...")
             processed_dir = 'time-series-project/data/processed'
             local_raw_file = 'time-series-project/data/raw/final_data.csv'
 
@@ -38,73 +64,141 @@ def main():
                 bucket_name='myrawdata7',
                 raw_file_name='final_data.csv',
                 local_raw_file=local_raw_file,
-                processed_dir=processed_dir
-            )
-            etl.run_pipeline()
-            logger.info("ETL pipeline completed successfully.")
-
-            # Perform ETS decomposition
-            logger.info("Starting ETS decomposition...")
-            processed_file_path = f"{processed_dir}/processed_data.csv"
-            ets = ETSDecomposition(file_path=processed_file_path, date_col="Date", value_col="Views")
-            ets.load_data()
-            components = ets.decompose(period=7)  # Weekly seasonality
-            logger.info("ETS decomposition completed successfully.")
-
-            # Use residual or original data for modeling
-            time_series_data = components["residual"].dropna()  # Use residuals
-
-            # Hyperparameter Tuning
-            logger.info("Starting hyperparameter tuning...")
-            tuner = HyperparameterTuning(time_series_data)
-
-            # Tune ARIMA
-            arima_params = tuner.tune_arima(p_values=[0, 1, 2], d_values=[0, 1], q_values=[0, 1, 2])
-            logger.info(f"Best ARIMA Params: {arima_params}")
-
-            # Tune SARIMA
-            sarima_params = tuner.tune_sarima(
-                p_values=[0, 1], d_values=[0, 1], q_values=[0, 1],
-                P_values=[0, 1], D_values=[0, 1], Q_values=[0, 1], m=7
-            )
-            logger.info(f"Best SARIMA Params: {sarima_params}")
-
-            # Tune SARIMAX
-            exog_data = None  # Replace with actual exogenous data if available
-            tuner_with_exog = HyperparameterTuning(time_series_data, exog_train=exog_data)
-            sarimax_params = tuner_with_exog.tune_sarimax(
-                p_values=[0, 1], d_values=[0, 1], q_values=[0, 1],
-                P_values=[0, 1], D_values=[0, 1], Q_values=[0, 1], m=7
+                processed_dir=processed_dir,
+                storage_format="feather"
             )
-            logger.info(f"Best SARIMAX Params: {sarimax_params}")
-
-            # Train ARIMA with best params
-            logger.info("Training ARIMA model...")
-            models = TimeSeriesModels(time_series_data)
-            arima_results = models.train_arima(order=arima_params["best_params"])
-            mae_arima = models.evaluate(arima_results["predictions"], "ARIMA")
-            logger.info(f"Final ARIMA MAE: {mae_arima}")
-            model_saver.save_model(arima_results["model"], "ARIMA_Tuned")
-            logger.info("ARIMA model trained and saved successfully.")
-
-            # Train SARIMA with best params
-            logger.info("Training SARIMA model...")
-            sarima_results = models.train_sarima(order=sarima_params["best_params"][:3],
-                                                 seasonal_order=sarima_params["best_params"][3:] + (7,))
-            mae_sarima = models.evaluate(sarima_results["predictions"], "SARIMA")
-            logger.info(f"Final SARIMA MAE: {mae_sarima}")
-            model_saver.save_model(sarima_results["model"], "SARIMA_Tuned")
-            logger.info("SARIMA model trained and saved successfully.")
-
-            # Train SARIMAX with best params
-            logger.info("Training SARIMAX model...")
-            sarimax_results = models.train_sarimax(order=sarimax_params["best_params"][:3],
-                                                   seasonal_order=sarimax_params["best_params"][3:] + (7,),
-                                                   exog_train=exog_data, exog_test=None)
-            mae_sarimax = models.evaluate(sarimax_results["predictions"], "SARIMAX")
-            logger.info(f"Final SARIMAX MAE: {mae_sarimax}")
-            model_saver.save_model(sarimax_results["model"], "SARIMAX_Tuned")
-            logger.info("SARIMAX model trained and saved successfully.")
+            csv_file = f"{processed_dir}/processed_data.csv"
+
+            # Tuning branches run side by side, so split the worker processes between them
+            n_jobs = max(1, (os.cpu_count() or 1) // 3)
+            # SARIMAX regressors: day-of-week one-hots and holidays from the local calendar table
+            holidays_file = "time-series-project/data/calendar/holidays.csv"
+            features = FeatureBuilder(holidays_file=holidays_file)
+            arima_grid = {"p_values": [0, 1, 2], "d_values": [0, 1], "q_values": [0, 1, 2]}
+            seasonal_grid = {"p_values": [0, 1], "d_values": [0, 1], "q_values": [0, 1],
+                             "P_values": [0, 1], "D_values": [0, 1], "Q_values": [0, 1], "m": 7}
+            # Seasonal searches only run when their probe fit beats Holt-Winters
+            baseline = HoltWinters(period=7)
+            # TIME_SERIES_WORK_QUEUE=<sqlite file> sends candidate fits to tune_worker.py processes
+            queue_file = os.environ.get("TIME_SERIES_WORK_QUEUE")
+            work_queue = SQLiteWorkQueue(queue_file) if queue_file else None
+            # One warm-start cache per branch: tuning fills it, the final retrain reuses it
+            fit_caches = {"ARIMA": FitCache(), "SARIMA": FitCache(), "SARIMAX": FitCache()}
+
+            def source_etag():
+                # A new upload to S3 reruns the ETL even if the local copy is unchanged
+                if local:
+                    return None
+                try:
+                    return etl.s3.head_object(Bucket=etl.bucket_name, Key=etl.raw_file_name)["ETag"]
+                except Exception:
+                    return None
+
+            def run_etl():
+                if local:
+                    etl.run_pipeline_streaming(from_s3=False)
+                else:
+                    etl.run_pipeline()
+                if os.path.exists(etl.processed_file_name):
+                    return etl.processed_file_name
+                # Extraction failed; fall back to the last CSV export
+                return csv_file
+
+            def decompose(processed_file_path):
+                ets = ETSDecomposition(file_path=processed_file_path, date_col="Date", value_col="Views",
+                                       result_cache=result_cache)
+                ets.load_data()
+                components = ets.decompose(period=7)  # Weekly seasonality
+                return {"observed": ets.data["Views"], **components}
+
+            def plot(decomposition):
+                components = {k: decomposition[k] for k in ("trend", "seasonal", "residual")}
+                return render_decomposition(decomposition["observed"], components, plot_file)
+
+            def residuals(decomposition):
+                return decomposition["residual"].dropna()  # Use residuals
+
+            def model_inputs(model_name, decomposition):
+                """The series to model and, for SARIMAX, its aligned exogenous matrix."""
+                if model_name != "SARIMAX":
+                    return residuals(decomposition), None
+                return features.build(residuals(decomposition))
+
+            def tune(model_name):
+                def run(decomposition):
+                    series, exog = model_inputs(model_name, decomposition)
+                    # Candidates are scored on forecasts, which need the calendar of the dates ahead
+                    exog_future = features.future(series, SCORE_STEPS) if exog is not None else None
+                    tuner = HyperparameterTuning(series, n_jobs=n_jobs, exog_train=exog,
+                                                 fit_cache=fit_caches[model_name], result_cache=result_cache,
+                                                 baseline=baseline if model_name != "ARIMA" else None,
+                                                 work_queue=work_queue, exog_future=exog_future)
+                    if model_name == "ARIMA":
+                        params = tuner.tune_arima(**arima_grid)
+                    elif model_name == "SARIMA":
+                        params = tuner.tune_sarima(**seasonal_grid, strategy=SuccessiveHalving())
+                    else:
+                        params = tuner.tune_sarimax(**seasonal_grid, strategy=SuccessiveHalving())
+                    logger.info(f"Best {model_name} Params: {params}")
+                    return params
+                return run
+
+            def train(model_name):
+                def run(decomposition, params):
+                    series, exog = model_inputs(model_name, decomposition)
+                    models = TimeSeriesModels(series, fit_cache=fit_caches[model_name], result_cache=result_cache,
+                                              exog=exog)
+                    if params.get("baseline_won"):
+                        results = models.train_baseline(baseline)
+                        mae = models.evaluate(results["predictions"], f"{model_name} baseline")
+                        logger.info(f"{baseline.name} beat the {model_name} search; baseline MAE: {mae}")
+                        model_saver.save_model(results["model"], f"{model_name}_Baseline")
+                        # Only the winner is kept, so forecast and update never pick up a stale model
+                        model_saver.delete_model(f"{model_name}_Tuned")
+                        IncrementalUpdater(model_saver).discard(f"{model_name}_Updated")
+                        return {"mae": mae, "model": baseline.name}
+                    best = params["best_params"]
+                    if model_name == "ARIMA":
+                        results = models.train_arima(order=best)
+                    elif model_name == "SARIMA":
+                        results = models.train_sarima(order=best[:3], seasonal_order=best[3:] + (7,))
+                    else:
+                        # Exog for the test horizon comes from the split of the aligned matrix
+                        results = models.train_sarimax(order=best[:3], seasonal_order=best[3:] + (7,))
+                    mae = models.evaluate(results["predictions"], model_name)
+                    logger.info(f"Final {model_name} MAE: {mae}")
+                    model_saver.save_model(results["model"], f"{model_name}_Tuned")
+                    model_saver.delete_model(f"{model_name}_Baseline")
+                    IncrementalUpdater(model_saver).discard(f"{model_name}_Updated")
+                    logger.info(f"{model_name} model trained and saved successfully.")
+                    return {"mae": mae, "model": model_name}
+                return run
+
+            plot_file = "time-series-project/picture/decomposition.png"
+            pipeline = Pipeline(state_dir="time-series-project/models/pipeline", max_workers=4)
+            pipeline.add("etl", run_etl, inputs=[local_raw_file], fingerprint=source_etag,
+                         outputs=[etl.processed_file_name, csv_file], params={"storage_format": "feather"})
+            pipeline.add("decompose", decompose, deps=["etl"], params={"period": 7})
+            pipeline.add("plot", plot, deps=["decompose"], outputs=[plot_file])
+            for model_name in MODEL_NAMES:
+                grid = arima_grid if model_name == "ARIMA" else seasonal_grid
+                feature_inputs = [holidays_file] if model_name == "SARIMAX" else []
+                feature_params = vars(features) if model_name == "SARIMAX" else None
+                pipeline.add(f"tune_{model_name}", tune(model_name), deps=["decompose"], inputs=feature_inputs,
+                             params={"grid": grid, "strategy": "grid" if model_name == "ARIMA" else "halving",
+                                     "features": feature_params,
+                                     "baseline": vars(baseline) if model_name != "ARIMA" else None})
+                pipeline.add(f"train_{model_name}", train(model_name), deps=["decompose", f"tune_{model_name}"],
+                             inputs=feature_inputs, params={"features": feature_params},
+                             outputs=[model_saver.model_path(f"{model_name}_Tuned"),
+                                      model_saver.model_path(f"{model_name}_Baseline")])
+            # TIME_SERIES_PROFILE=cprofile|tracemalloc profiles the whole run
+            with profiled(profile or os.environ.get("TIME_SERIES_PROFILE")):
+                status = pipeline.run(force=force, targets=targets)
+
+            logger.info(f"Fit cache stats: { {name: cache.stats() for name, cache in fit_caches.items()} }")
+            logger.info(f"Result cache stats: {result_cache.stats()}")
+            return status
 
         except Exception as e:
             logger.error(f"An error occurred during pipeline execution: {e}", exc_info=True)
@@ -112,5 +206,166 @@ def main():
     except Exception as e:
         logger.error(f"Error initializing the pipeline: {e}", exc_info=True)
 
+
+def forecast(model_name, steps, alpha=0.05, output=None):
+    """
+    Forecast from a trained model with a prediction interval.
+
+    Args:
+        model_name (str): ARIMA, SARIMA or SARIMAX; the newest of its tuned
+            model and the baseline that beat it is used.
+        steps (int): Forecast horizon.
+        alpha (float): The interval covers 1 - alpha.
+        output (str): CSV file to write; None prints the forecast.
+
+    Returns:
+        pd.DataFrame: 'mean', 'lower' and 'upper' per forecast date.
+    """
+    import numpy as np
+    import pandas as pd
+    from src.model_saving import ModelSaver, latest_model_name
+    from src.features import FeatureBuilder
+    from src.forecast_distribution import forecast_distribution
+
+    model_saver = ModelSaver(save_dir="time-series-project/models")
+    name = latest_model_name(model_saver, model_name)
+    if name is None:
+        raise FileNotFoundError(f"No saved {model_name} model; train it first.")
+    model = model_saver.load_model(name)
+    exog = None
+    if getattr(getattr(model, "model", None), "k_exog", 0):
+        history = pd.Series(np.asarray(model.model.endog)[:, 0], index=model.model._index)
+        exog = FeatureBuilder(holidays_file="time-series-project/data/calendar/holidays.csv").future(history, steps)
+    distribution = forecast_distribution(model, steps, exog=exog)
+    table = pd.concat([pd.Series(distribution.mean, index=distribution.index, name="mean"),
+                       distribution.interval(alpha)], axis=1)
+    if output:
+        table.to_csv(output, index_label="Date")
+        print(f"{name} forecast for {steps} steps saved to: {output}")
+    else:
+        print(table.to_string())
+    return table
+
+
+def update(local=False, correction_window_days=7):
+    """
+    Bring the processed data and the saved tuned models up to date without retraining.
+
+    Runs the incremental ETL, decomposes the series again and appends the
+    residuals dated after each saved model's last observation with
+    IncrementalUpdater, which only re-estimates the parameters every so
+    often or when the new observations drift. Updated models are saved as
+    '<model>_Updated', which the train stages do not track, so a later `run`
+    keeps them until the data changes and the model is retrained from scratch.
+
+    Args:
+        local (bool): Process the local raw file without contacting S3.
+        correction_window_days (int): Late corrections accepted by the incremental ETL.
+
+    Returns:
+        dict: Model name -> IncrementalUpdater result (None when already current).
+    """
+    from src.etl_pipeline import ETLPipeline
+    from src.ets_decomposition import ETSDecomposition
+    from src.features import FeatureBuilder
+    from src.incremental_update import IncrementalUpdater
+    from src.model_saving import ModelSaver, latest_model_name
+    from src.result_cache import ResultCache
+
+    setup_logging(log_file="time_series_pipeline.log", metrics_file="time_series_metrics.jsonl")
+    etl = ETLPipeline(bucket_name='myrawdata7', raw_file_name='final_data.csv',
+                      local_raw_file='time-series-project/data/raw/final_data.csv',
+                      processed_dir='time-series-project/data/processed', storage_format="feather")
+    if local:
+        etl.run_pipeline_streaming(from_s3=False)
+    elif etl.run_incremental(correction_window_days=correction_window_days)["status"] == "failed":
+        print("Incremental ETL failed; updating the models from the data already processed.")
+
+    ets = ETSDecomposition(file_path=etl.processed_file_name, date_col="Date", value_col="Views",
+                           result_cache=ResultCache(cache_dir="time-series-project/models/cache"))
+    ets.load_data()
+    residuals = ets.decompose(period=7)["residual"].dropna()
+    series, exog = FeatureBuilder(holidays_file="time-series-project/data/calendar/holidays.csv").build(residuals)
+
+    model_saver = ModelSaver(save_dir="time-series-project/models")
+    updater = IncrementalUpdater(model_saver)
+    updates = {}
+    for model_name in MODEL_NAMES:
+        name = latest_model_name(model_saver, model_name)
+        if name is None:
+            print(f"No saved {model_name} model; train it first.")
+            continue
+        if name.endswith("_Baseline"):
+            print(f"{name} is a baseline, which is refitted by `train` rather than updated.")
+            continue
+        save_as = f"{model_name}_Updated"
+        if model_name == "SARIMAX":
+            updates[name] = updater.catch_up(name, series, exog, save_as=save_as)
+        else:
+            updates[name] = updater.catch_up(name, residuals, save_as=save_as)
+    return updates
+
+
+def cli(argv=None):
+    parser = argparse.ArgumentParser(description="Time series pipeline.")
+    commands = parser.add_subparsers(dest="command")
+
+    def stage_command(name, help):
+        command = commands.add_parser(name, help=help)
+        command.add_argument("--force", nargs="*", default=(), metavar="STAGE",
+                             help="Stages to rerun even if unchanged")
+        command.add_argument("--profile", choices=("cprofile", "tracemalloc"), help="Profile the run")
+        command.add_argument("--local", action="store_true",
+                             help="Process the local raw file without contacting S3")
+        return command
+
+    stage_command("run", "Run every stage (the default)")
+    stage_command("etl", "Extract, transform and store the raw data")
+    stage_command("decompose", "Decompose the processed series and plot it")
+    for name, help in (("tune", "Search model hyperparameters"),
+                       ("train", "Train and save the tuned models (tuning first if needed)")):
+        command = stage_command(name, help)
+        command.add_argument("--model", choices=MODEL_NAMES, action="append",
+                             help="Model to process, repeatable (default: all)")
+    command = commands.add_parser("update", help="Append new data to the trained models without retraining")
+    command.add_argument("--local", action="store_true", help="Process the local raw file without contacting S3")
+    command.add_argument("--correction-window-days", type=int, default=7,
+                         help="Late corrections accepted by the incremental ETL")
+    command = commands.add_parser("forecast", help="Forecast from a trained model")
+    command.add_argument("--model", choices=MODEL_NAMES, default="SARIMA")
+    command.add_argument("--steps", type=int, default=30, help="Forecast horizon")
+    command.add_argument("--alpha", type=float, default=0.05, help="The interval covers 1 - alpha")
+    command.add_argument("--output", help="CSV file to write instead of printing")
+    command = commands.add_parser("serve", help="Serve forecasts from the saved models over HTTP")
+    command.add_argument("--host", default="127.0.0.1", help="Interface to listen on")
+    command.add_argument("--port", type=int, default=8000, help="Port to listen on")
+    command.add_argument("--max-models", type=int, default=8, help="Models held in memory at once")
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        from src.forecast_service import serve
+        setup_logging(log_file="forecast_service.log")
+        serve(host=args.host, port=args.port, max_models=args.max_models)
+        return 0
+    if args.command == "update":
+        update(local=args.local, correction_window_days=args.correction_window_days)
+        return 0
+    if args.command == "forecast":
+        forecast(args.model, args.steps, alpha=args.alpha, output=args.output)
+        return 0
+    if args.command in (None, "run"):
+        targets = None
+    elif args.command == "etl":
+        targets = ["etl"]
+    elif args.command == "decompose":
+        targets = ["decompose", "plot"]
+    else:
+        targets = [f"{args.command}_{model_name}" for model_name in args.model or MODEL_NAMES]
+    status = main(force=tuple(getattr(args, "force", ())), profile=getattr(args, "profile", None),
+                  targets=targets, local=getattr(args, "local", False))
+    if status is None or any(value in ("failed", "blocked") for value in status.values()):
+        return 1
+    return 0
+
 if __name__ == "__main__":
-    main()
+    sys.exit(cli())
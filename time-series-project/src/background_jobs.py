@@ -0,0 +1,134 @@
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+
+class JobCancelled(Exception):
+    """Raised inside a job when it has been asked to stop."""
+
+
+class Job:
+    def __init__(self, name):
+        """
+        State of one background job, shared between the worker and the UI.
+
+        Args:
+            name (str): Name the job is tracked under.
+        """
+        self.name = name
+        self.status = "pending"
+        self.progress = 0.0
+        self.message = "Waiting to start"
+        self.result = None
+        self.error = None
+        self.started = None
+        self.finished = None
+        self._cancel = threading.Event()
+
+    def report(self, progress=None, message=None):
+        """
+        Update progress from inside the job; stops the job if it was cancelled.
+
+        Args:
+            progress (float): Completed share between 0 and 1.
+            message (str): Short description of the current step.
+
+        Raises:
+            JobCancelled: When cancel() has been called.
+        """
+        if progress is not None:
+            self.progress = min(max(float(progress), 0.0), 1.0)
+        if message is not None:
+            self.message = message
+        if self._cancel.is_set():
+            raise JobCancelled(f"Job {self.name} was cancelled.")
+
+    def cancel(self):
+        """Ask the job to stop at its next progress report."""
+        self._cancel.set()
+        if self.status == "pending":
+            self.message = "Cancelling"
+
+    @property
+    def running(self):
+        return self.status in ("pending", "running")
+
+    @property
+    def elapsed(self):
+        """Seconds the job has been running, or ran for."""
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.time()) - self.started
+
+
+class JobManager:
+    def __init__(self, max_workers=1):
+        """
+        Run long tasks in background threads so the caller stays responsive.
+
+        Jobs are threads rather than processes so their results stay in this
+        process, where the UI can read them; the heavy fitting inside a job
+        can still use the tuner's own worker processes.
+
+        Args:
+            max_workers (int): Jobs run at the same time. The default of 1
+                queues jobs, which keeps a shared ResultCache single-writer.
+        """
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.jobs = {}
+        self.lock = threading.Lock()
+
+    def submit(self, name, func, *args, **kwargs):
+        """
+        Start `func(job, *args, **kwargs)` in the background.
+
+        If a job with the same name is still pending or running it is
+        returned instead of starting a second copy.
+
+        Args:
+            name (str): Name the job is tracked under.
+            func (callable): Work to run; it receives the Job as its first
+                argument and should call job.report() regularly.
+
+        Returns:
+            Job: The job state.
+        """
+        with self.lock:
+            existing = self.jobs.get(name)
+            if existing is not None and existing.running:
+                return existing
+            job = Job(name)
+            self.jobs[name] = job
+        self.executor.submit(self._run, job, func, args, kwargs)
+        return job
+
+    @staticmethod
+    def _run(job, func, args, kwargs):
+        job.started = time.time()
+        job.status = "running"
+        try:
+            job.report(0.0, "Started")
+            job.result = func(job, *args, **kwargs)
+            job.progress, job.message, job.status = 1.0, "Done", "done"
+        except JobCancelled:
+            job.message, job.status = "Cancelled", "cancelled"
+        except Exception as e:
+            job.error = f"{type(e).__name__}: {e}"
+            job.message, job.status = "Failed", "failed"
+            traceback.print_exc()
+        finally:
+            job.finished = time.time()
+
+    def get(self, name):
+        """Return the job tracked under `name`, or None."""
+        return self.jobs.get(name)
+
+    def cancel(self, name):
+        """Cancel the job tracked under `name`, if any."""
+        job = self.jobs.get(name)
+        if job is not None:
+            job.cancel()
+
+    def any_running(self):
+        return any(job.running for job in self.jobs.values())
@@ -0,0 +1,209 @@
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from src.fit_cache import fit_summary, fit_with_warm_start
+from src.lazy_imports import import_lock
+
+
+def _build_model(data, exog, order, seasonal_order):
+    with import_lock:
+        from statsmodels.tsa.arima.model import ARIMA
+        from statsmodels.tsa.statespace.sarimax import SARIMAX
+    if seasonal_order is None:
+        return ARIMA(data, exog=exog, order=order)
+    return SARIMAX(data, exog=exog, order=order, seasonal_order=seasonal_order)
+
+
+def run_fold_group(data, exog, order, seasonal_order, origins, max_horizon, window,
+                   start_values=None, maxiter=None):
+    """
+    Forecast from several consecutive origins with a single model fit.
+
+    The model is fitted once at the first origin. Later origins reuse its
+    parameters: an expanding window appends the new observations to the
+    filtered state, a rolling window re-filters the last `window` points.
+    Kept at module level so it can be pickled and sent to worker processes.
+
+    Args:
+        data (pd.Series): The full time series.
+        exog (pd.DataFrame): Exogenous variables aligned with data, or None.
+        order (tuple): ARIMA order (p, d, q).
+        seasonal_order (tuple): Seasonal order (P, D, Q, m), or None for ARIMA.
+        origins (list): Positions where each fold's training data ends.
+        max_horizon (int): Number of steps forecast from every origin.
+        window (int): Rolling window length, or None for an expanding window.
+        start_values (dict): Warm-start parameter values for the fit.
+        maxiter (int): Cap on optimizer iterations, or None.
+
+    Returns:
+        dict: Forecasts (origins x max_horizon) and a summary of the fit.
+    """
+    def rows(frame, start, stop):
+        return None if frame is None else frame.iloc[start:stop]
+
+    first = origins[0]
+    lower = 0 if window is None else max(0, first - window)
+    model = _build_model(data.iloc[lower:first], rows(exog, lower, first), order, seasonal_order)
+    fit_kwargs = {} if seasonal_order is None else {"disp": False}
+    if maxiter is not None:
+        if seasonal_order is None:
+            fit_kwargs["method_kwargs"] = {"maxiter": maxiter}
+        else:
+            fit_kwargs["maxiter"] = maxiter
+    fitted = fit_with_warm_start(model, start_values, **fit_kwargs)
+
+    forecasts = np.empty((len(origins), max_horizon))
+    results, previous = fitted, first
+    for k, origin in enumerate(origins):
+        if origin != previous:
+            if window is None:
+                results = results.append(data.iloc[previous:origin], exog=rows(exog, previous, origin))
+            else:
+                lower = max(0, origin - window)
+                results = fitted.apply(data.iloc[lower:origin], exog=rows(exog, lower, origin))
+            previous = origin
+        forecast = results.forecast(steps=max_horizon, exog=rows(exog, origin, origin + max_horizon))
+        forecasts[k] = np.asarray(forecast, dtype=float)
+    return {"forecasts": forecasts, "aic": fitted.aic, **fit_summary(fitted)}
+
+
+class RollingOriginBacktester:
+    def __init__(self, initial=0.5, step=7, horizons=(1, 7, 14), window=None,
+                 refit_every=None, seasonal_period=7, metric="RMSE", n_jobs=1):
+        """
+        Initialize the RollingOriginBacktester class.
+
+        Args:
+            initial (float or int): Training length of the first fold, as a
+                share of the series or a number of observations.
+            step (int): Number of observations between fold origins.
+            horizons (tuple): Forecast horizons to report metrics for. Metrics
+                at horizon h cover forecast steps 1..h.
+            window (int): Rolling window length, or None for an expanding window.
+            refit_every (int): Re-estimate parameters every this many folds.
+                None (default) fits once and reuses the filtered state for
+                every later fold.
+            seasonal_period (int): Season length used to scale MASE.
+            metric (str): Metric returned by score() ('MAE', 'RMSE' or 'MASE').
+            n_jobs (int): Worker processes across refit groups. Keep at 1
+                when the backtester runs inside a parallel tuner.
+        """
+        self.initial = initial
+        self.step = step
+        self.horizons = tuple(horizons)
+        self.window = window
+        self.refit_every = refit_every
+        self.seasonal_period = seasonal_period
+        self.metric = metric
+        self.n_jobs = n_jobs
+
+    def origins(self, n_obs):
+        """Positions where each fold's training data ends."""
+        first = int(n_obs * self.initial) if isinstance(self.initial, float) else self.initial
+        return list(range(first, n_obs - max(self.horizons) + 1, self.step))
+
+    def evaluate(self, data, order, seasonal_order=None, exog=None, start_values=None, maxiter=None):
+        """
+        Backtest one model specification.
+
+        Args:
+            data (pd.Series): The time series.
+            order (tuple): ARIMA order (p, d, q).
+            seasonal_order (tuple): Seasonal order (P, D, Q, m), or None for ARIMA.
+            exog (pd.DataFrame): Exogenous variables aligned with data, or None.
+            start_values (dict): Warm-start parameter values for every fit.
+            maxiter (int): Cap on optimizer iterations, or None.
+
+        Returns:
+            dict: Metrics per horizon, forecasts, actuals, origins and a
+            summary (AIC, parameters) of the first fold's fit.
+        """
+        origins = self.origins(len(data))
+        if not origins:
+            raise ValueError(f"Series of length {len(data)} is too short to backtest.")
+        max_horizon = max(self.horizons)
+        size = self.refit_every or len(origins)
+        groups = [origins[i:i + size] for i in range(0, len(origins), size)]
+        args = [(data, exog, order, seasonal_order, group, max_horizon, self.window, start_values, maxiter)
+                for group in groups]
+        if self.n_jobs == 1 or len(groups) == 1:
+            outcomes = [run_fold_group(*a) for a in args]
+        else:
+            with ProcessPoolExecutor(max_workers=self.n_jobs) as executor:
+                outcomes = list(executor.map(run_fold_group, *zip(*args)))
+
+        forecasts = np.vstack([o["forecasts"] for o in outcomes])
+        first = outcomes[0]
+        return {**self._summarise(data, origins, forecasts),
+                "aic": first["aic"], "params": first["params"], "iterations": first["iterations"]}
+
+    def evaluate_baseline(self, data, baseline):
+        """
+        Backtest a baseline from src.baseline_models over the same folds.
+
+        Args:
+            data (pd.Series): The time series.
+            baseline: A SeasonalNaive, Drift or HoltWinters instance.
+
+        Returns:
+            dict: Metrics per horizon, forecasts, actuals and origins.
+        """
+        origins = self.origins(len(data))
+        if not origins:
+            raise ValueError(f"Series of length {len(data)} is too short to backtest.")
+        if self.window is not None:
+            raise ValueError("Baselines are backtested on an expanding window only.")
+        forecasts = baseline.backtest(np.asarray(data, dtype=float), origins, max(self.horizons))
+        return self._summarise(data, origins, forecasts)
+
+    def _summarise(self, data, origins, forecasts):
+        values = np.asarray(data, dtype=float)
+        origin_idx = np.asarray(origins)
+        actuals = values[origin_idx[:, None] + np.arange(max(self.horizons))]
+        metrics = self._metrics(values, origin_idx, forecasts, actuals)
+        return {"metrics": metrics, "forecasts": forecasts, "actuals": actuals, "origins": origins}
+
+    def _metrics(self, values, origins, forecasts, actuals):
+        """MAE, RMSE and MASE for every horizon, computed over all folds at once."""
+        abs_errors = np.abs(forecasts - actuals)
+        sq_errors = (forecasts - actuals) ** 2
+        steps = np.arange(1, abs_errors.shape[1] + 1)
+        cum_mae = np.cumsum(abs_errors, axis=1) / steps
+        cum_mse = np.cumsum(sq_errors, axis=1) / steps
+
+        # In-sample seasonal naive MAE up to each origin scales MASE
+        m = self.seasonal_period
+        naive = np.abs(values[m:] - values[:-m])
+        cum_naive = np.concatenate([[0.0], np.cumsum(naive)])
+        counts = np.maximum(origins - m, 1)
+        scale = cum_naive[np.clip(origins - m, 0, len(naive))] / counts
+        scale = np.where(scale > 0, scale, np.nan)
+
+        rows = []
+        for h in self.horizons:
+            rows.append({
+                "horizon": h,
+                "MAE": cum_mae[:, h - 1].mean(),
+                "RMSE": np.sqrt(cum_mse[:, h - 1].mean()),
+                "MASE": np.nanmean(cum_mae[:, h - 1] / scale),
+            })
+        return pd.DataFrame(rows).set_index("horizon")
+
+    def score(self, data, order, seasonal_order=None, exog=None, start_values=None, maxiter=None):
+        """
+        Backtest a specification and reduce it to one number for tuning.
+
+        Returns:
+            dict: `self.metric` at the longest horizon as 'score', plus the
+            AIC, parameters and iterations of the first fold's fit.
+        """
+        result = self.evaluate(data, order, seasonal_order, exog, start_values, maxiter)
+        return {
+            "score": float(result["metrics"].loc[max(self.horizons), self.metric]),
+            "aic": result["aic"], "params": result["params"], "iterations": result["iterations"],
+        }
+
+    def score_baseline(self, data, baseline):
+        """Backtest a baseline and reduce it to the same number score() returns."""
+        result = self.evaluate_baseline(data, baseline)
+        return {"score": float(result["metrics"].loc[max(self.horizons), self.metric])}
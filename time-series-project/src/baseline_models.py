@@ -0,0 +1,404 @@
+from abc import ABC, abstractmethod
+import itertools
+import numpy as np
+import pandas as pd
+
+
+def _as_rows(values):
+    """Series or arrays as a float matrix with one series per row."""
+    return np.atleast_2d(np.asarray(values, dtype=float))
+
+
+def _future_index(index, steps):
+    """Index of the `steps` periods after `index`, or positions for a non-date index."""
+    if isinstance(index, pd.DatetimeIndex):
+        freq = index.freq or (pd.infer_freq(index) if len(index) > 2 else None)
+        if freq is not None:
+            return pd.date_range(index[-1], periods=steps + 1, freq=freq)[1:]
+    return pd.RangeIndex(len(index), len(index) + steps)
+
+
+def holt_winters_filter(values, period, alpha, beta, gamma, trend=True, seasonal=True, keep=()):
+    """
+    Run additive Holt-Winters recursions over many series at once.
+
+    The loop runs over time only; every step updates all series (rows)
+    with a handful of vector operations, so the cost per series shrinks
+    as more series are filtered together. Initial states come from the
+    first one (level, season) and two (trend) seasons.
+
+    Args:
+        values (np.ndarray): Shape (n_series, length).
+        period (int): Season length.
+        alpha, beta, gamma (np.ndarray): Level, trend and season smoothing
+            weights, one per series.
+        trend (bool): Include a linear trend.
+        seasonal (bool): Include an additive season.
+        keep (iterable): Positions t at which to snapshot the state fitted
+            to values[:, :t] (e.g. backtest origins).
+
+    Returns:
+        dict: Sum of squared one-step errors per series, the final state
+        and the snapshots as {t: state}.
+    """
+    n, length = values.shape
+    m = period if seasonal else 1
+    level = values[:, :m].mean(axis=1)
+    slope = np.zeros(n)
+    if trend and length >= 2 * m:
+        slope = (values[:, m:2 * m].mean(axis=1) - level) / m
+    # Time-major copies so each step reads and writes contiguous rows
+    observed = np.ascontiguousarray(values.T)
+    season = np.ascontiguousarray((values[:, :m] - level[:, None]).T) if seasonal else np.zeros((1, n))
+    alpha, beta, gamma = (np.broadcast_to(np.asarray(w, dtype=float), (n,)) for w in (alpha, beta, gamma))
+    sse = np.zeros(n)
+    error = np.empty(n)
+    keep = set(keep)
+    snapshots = {}
+
+    def state(t):
+        return {"level": level.copy(), "slope": slope.copy(), "season": season.T.copy(), "t": t}
+
+    for t in range(length):
+        if t in keep:
+            snapshots[t] = state(t)
+        s = season[t % m]
+        # Error-correction form: every state moves by its weight times the one-step error
+        np.subtract(observed[t], level, out=error)
+        error -= slope
+        error -= s
+        sse += error * error
+        level += slope
+        level += alpha * error
+        if trend:
+            slope += alpha * beta * error
+        if seasonal:
+            s += gamma * error
+    return {"sse": sse, "state": state(length), "snapshots": snapshots}
+
+
+class BaselineResults:
+    def __init__(self, baseline, state, index, sse, nobs):
+        """
+        A baseline fitted to one series.
+
+        Args:
+            baseline: The SeasonalNaive, Drift or HoltWinters that was fitted.
+            state (dict): Fitted state for this series (arrays of one row).
+            index (pd.Index): Index of the training data.
+            sse (float): Sum of squared in-sample one-step errors.
+            nobs (int): Number of in-sample one-step errors.
+        """
+        self.baseline = baseline
+        self.state = state
+        self.index = index
+        self.sse = float(sse)
+        self.nobs = int(nobs)
+
+    @property
+    def sigma2(self):
+        """Variance of the in-sample one-step errors."""
+        return self.sse / self.nobs if self.nobs else float("nan")
+
+    @property
+    def aic(self):
+        """Gaussian AIC of the one-step errors; only comparable between baselines."""
+        if not self.nobs or self.sse <= 0:
+            return float("nan")
+        return self.nobs * np.log(self.sse / self.nobs) + 2 * self.baseline.n_params
+
+    @property
+    def params(self):
+        return self.baseline.fitted_params(self.state)
+
+    def forecast(self, steps=1):
+        """
+        Forecast the periods after the training data.
+
+        Args:
+            steps (int): Forecast horizon.
+
+        Returns:
+            pd.Series: Forecasts indexed by the future dates.
+        """
+        values = self.baseline.forecast_state(self.state, steps)[0]
+        return pd.Series(values, index=_future_index(self.index, steps), name="predicted_mean")
+
+    def forecast_index(self, steps):
+        return _future_index(self.index, steps)
+
+    def forecast_std(self, steps):
+        """Standard deviation of the forecast errors, or None where no closed form is used."""
+        std = self.baseline.forecast_std(np.array([self.sigma2]), self.nobs, steps)
+        return None if std is None else std[0]
+
+    def simulate(self, steps, n_paths, rng=None):
+        """
+        Simulate future sample paths with Gaussian errors of the in-sample variance.
+
+        Args:
+            steps (int): Forecast horizon.
+            n_paths (int): Number of paths, all simulated in one batch.
+            rng (np.random.Generator): Random generator (default: unseeded).
+
+        Returns:
+            np.ndarray: Paths of shape (n_paths, steps).
+        """
+        rng = rng if rng is not None else np.random.default_rng()
+        return self.baseline.simulate_state(self.state, np.array([self.sigma2]), self.nobs, steps, n_paths, rng)[0]
+
+
+class _Baseline(ABC):
+    """Shared fitting and forecasting entry points; subclasses fill in fit_many, forecast_state and simulate_state."""
+
+    name = None
+    n_params = 0
+
+    @abstractmethod
+    def fit_many(self, values):
+        """Fit every row of `values`; returns the state, per-row SSE and error count."""
+
+    @abstractmethod
+    def forecast_state(self, state, steps):
+        """Forecasts of shape (n_series, steps) from a fitted state."""
+
+    def fitted_params(self, state):
+        return {}
+
+    def forecast_std(self, sigma2, nobs, steps):
+        """Closed-form forecast standard deviations (n_series, steps), or None."""
+        return None
+
+    @abstractmethod
+    def simulate_state(self, state, sigma2, nobs, steps, n_paths, rng):
+        """Sample paths (n_series, n_paths, steps) from a fitted state."""
+
+    def simulate_many(self, values, steps, n_paths, seed=None):
+        """
+        Fit many series and simulate sample paths for all of them in one batch.
+
+        Args:
+            values (np.ndarray): Shape (n_series, length), or one series.
+            steps (int): Forecast horizon.
+            n_paths (int): Paths per series.
+            seed (int): Seed for reproducible paths.
+
+        Returns:
+            np.ndarray: Paths of shape (n_series, n_paths, steps).
+        """
+        state, sse, nobs = self.fit_many(_as_rows(values))
+        return self.simulate_state(state, sse / nobs, nobs, steps, n_paths, np.random.default_rng(seed))
+
+    def forecast_many(self, values, steps):
+        """
+        Fit and forecast many series in one vectorized pass.
+
+        Args:
+            values (np.ndarray): Shape (n_series, length), or one series.
+            steps (int): Forecast horizon.
+
+        Returns:
+            np.ndarray: Forecasts of shape (n_series, steps).
+        """
+        state, _, _ = self.fit_many(_as_rows(values))
+        return self.forecast_state(state, steps)
+
+    def fit(self, data):
+        """
+        Fit one series.
+
+        Args:
+            data (pd.Series): The time series.
+
+        Returns:
+            BaselineResults: Fitted baseline with forecast(), aic and params.
+        """
+        state, sse, nobs = self.fit_many(_as_rows(data))
+        return BaselineResults(self, state, data.index, sse[0], nobs)
+
+    def backtest(self, values, origins, steps):
+        """
+        Forecast `steps` ahead from every origin of one series.
+
+        Args:
+            values (np.ndarray): The series.
+            origins (list): Positions where each fold's training data ends.
+            steps (int): Forecast horizon.
+
+        Returns:
+            np.ndarray: Forecasts of shape (len(origins), steps).
+        """
+        values = np.asarray(values, dtype=float)
+        return np.vstack([self.forecast_many(values[:origin], steps) for origin in origins])
+
+
+class SeasonalNaive(_Baseline):
+    name = "seasonal_naive"
+
+    def __init__(self, period=7):
+        """
+        Repeat the last observed season.
+
+        Args:
+            period (int): Season length (1 gives the naive last-value forecast).
+        """
+        self.period = period
+
+    def fit_many(self, values):
+        m = self.period
+        errors = values[:, m:] - values[:, :-m]
+        return {"last": values[:, -m:]}, (errors ** 2).sum(axis=1), errors.shape[1]
+
+    def forecast_state(self, state, steps):
+        return state["last"][:, np.arange(steps) % self.period]
+
+    def forecast_std(self, sigma2, nobs, steps):
+        # Each further season adds one more error to the repeated value
+        seasons = np.arange(steps) // self.period + 1
+        return np.sqrt(sigma2[:, None] * seasons)
+
+    def simulate_state(self, state, sigma2, nobs, steps, n_paths, rng):
+        errors = rng.standard_normal((len(sigma2), n_paths, steps)) * np.sqrt(sigma2)[:, None, None]
+        paths = np.empty_like(errors)
+        m = self.period
+        for h in range(steps):
+            previous = paths[:, :, h - m] if h >= m else state["last"][:, None, h]
+            paths[:, :, h] = previous + errors[:, :, h]
+        return paths
+
+
+class Drift(_Baseline):
+    name = "drift"
+    n_params = 1
+
+    def fit_many(self, values):
+        """The slope is the average change between the first and last observation."""
+        slope = (values[:, -1] - values[:, 0]) / max(values.shape[1] - 1, 1)
+        errors = np.diff(values, axis=1) - slope[:, None]
+        return {"last": values[:, -1], "slope": slope}, (errors ** 2).sum(axis=1), errors.shape[1]
+
+    def forecast_state(self, state, steps):
+        return state["last"][:, None] + state["slope"][:, None] * np.arange(1, steps + 1)
+
+    def forecast_std(self, sigma2, nobs, steps):
+        # Random-walk error plus the uncertainty of the slope, a mean of `nobs` changes
+        h = np.arange(1, steps + 1)
+        return np.sqrt(sigma2[:, None] * h * (1 + h / nobs))
+
+    def simulate_state(self, state, sigma2, nobs, steps, n_paths, rng):
+        sigma = np.sqrt(sigma2)[:, None, None]
+        errors = rng.standard_normal((len(sigma2), n_paths, steps)) * sigma
+        paths = self.forecast_state(state, steps)[:, None, :] + np.cumsum(errors, axis=2)
+        if nobs:
+            # Draw the slope too, so the paths match forecast_std
+            slope_error = rng.standard_normal((len(sigma2), n_paths, 1)) * sigma / np.sqrt(nobs)
+            paths += slope_error * np.arange(1, steps + 1)
+        return paths
+
+    def fitted_params(self, state):
+        return {"slope": float(state["slope"][0])}
+
+
+class HoltWinters(_Baseline):
+    name = "holt_winters"
+
+    def __init__(self, period=7, trend=True, seasonal=True, alphas=(0.1, 0.3, 0.5, 0.8),
+                 betas=(0.01, 0.1), gammas=(0.05, 0.2, 0.5)):
+        """
+        Additive Holt-Winters (ETS(A,A,A)) exponential smoothing.
+
+        Smoothing weights are chosen per series from a small grid by the
+        in-sample one-step squared error. The whole grid for every series
+        is filtered in one vectorized pass (see holt_winters_filter).
+
+        Args:
+            period (int): Season length.
+            trend (bool): Include a linear trend.
+            seasonal (bool): Include an additive season.
+            alphas, betas, gammas (tuple): Grid of level, trend and season weights.
+        """
+        self.period = period
+        self.trend = trend
+        self.seasonal = seasonal
+        self.alphas = tuple(alphas)
+        self.betas = tuple(betas) if trend else (0.0,)
+        self.gammas = tuple(gammas) if seasonal else (0.0,)
+
+    @property
+    def n_params(self):
+        # Smoothing weights plus the initial level, slope and season
+        m = self.period if self.seasonal else 0
+        return 2 + 2 * self.trend + self.seasonal + m
+
+    def _grid(self):
+        return np.array(list(itertools.product(self.alphas, self.betas, self.gammas))).T
+
+    def _select(self, values):
+        """Grid-search the weights for every row; returns the best filter outputs and weights."""
+        n = values.shape[0]
+        alpha, beta, gamma = self._grid()
+        size = len(alpha)
+        # Row i * size + j filters series i with grid point j
+        result = holt_winters_filter(np.repeat(values, size, axis=0), self.period,
+                                     np.tile(alpha, n), np.tile(beta, n), np.tile(gamma, n),
+                                     trend=self.trend, seasonal=self.seasonal)
+        best = np.arange(n) * size + result["sse"].reshape(n, size).argmin(axis=1)
+        state = {key: value[best] if isinstance(value, np.ndarray) else value
+                 for key, value in result["state"].items()}
+        weights = {"alpha": np.tile(alpha, n)[best], "beta": np.tile(beta, n)[best],
+                   "gamma": np.tile(gamma, n)[best]}
+        return state, result["sse"][best], weights
+
+    def fit_many(self, values):
+        if values.shape[1] < (2 if self.seasonal else 1) * self.period:
+            raise ValueError(f"Holt-Winters needs at least two seasons ({2 * self.period} points).")
+        state, sse, weights = self._select(values)
+        state.update(weights)
+        return state, sse, values.shape[1]
+
+    def forecast_state(self, state, steps):
+        h = np.arange(1, steps + 1)
+        m = state["season"].shape[1]
+        season = state["season"][:, (state["t"] + h - 1) % m]
+        return state["level"][:, None] + state["slope"][:, None] * h + season
+
+    def fitted_params(self, state):
+        return {key: float(state[key][0]) for key in ("alpha", "beta", "gamma")}
+
+    def simulate_state(self, state, sigma2, nobs, steps, n_paths, rng):
+        """Run the recursions forward with random errors, one row per (series, path)."""
+        n = len(sigma2)
+        m = state["season"].shape[1]
+
+        def rows(value):
+            return np.repeat(value, n_paths, axis=0)
+
+        level, slope = rows(state["level"]), rows(state["slope"])
+        season = np.ascontiguousarray(rows(state["season"]).T)
+        alpha, beta, gamma = rows(state["alpha"]), rows(state["beta"]), rows(state["gamma"])
+        errors = rng.standard_normal((steps, n * n_paths)) * rows(np.sqrt(sigma2))
+        paths = np.empty((steps, n * n_paths))
+        for h in range(steps):
+            s = season[(state["t"] + h) % m]
+            error = errors[h]
+            paths[h] = level + slope + s + error
+            level += slope + alpha * error
+            if self.trend:
+                slope += alpha * beta * error
+            if self.seasonal:
+                s += gamma * error
+        return paths.T.reshape(n, n_paths, steps)
+
+    def backtest(self, values, origins, steps):
+        """
+        Forecast from every origin with weights chosen on the first fold.
+
+        Like the SARIMA backtest, the weights are estimated once at the first
+        origin and later origins only extend the filtered state, so every
+        fold comes out of a single pass over the series.
+        """
+        values = _as_rows(values)
+        _, _, weights = self._select(values[:, :origins[0]])
+        result = holt_winters_filter(values, self.period, weights["alpha"], weights["beta"],
+                                     weights["gamma"], trend=self.trend, seasonal=self.seasonal, keep=origins)
+        return np.vstack([self.forecast_state(result["snapshots"][o], steps) for o in origins])
@@ -0,0 +1,238 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from src.ets_decomposition import batch_seasonal_decompose
+from src.hyperparametertune import HyperparameterTuning
+from src.time_series_models import TimeSeriesModels
+from src.model_saving import ModelSaver
+
+DEFAULT_GRID = {
+    "p_values": [0, 1], "d_values": [0, 1], "q_values": [0, 1],
+    "P_values": [0, 1], "D_values": [0, 1], "Q_values": [0, 1],
+}
+
+
+def decompose_residuals(series_list, period):
+    """
+    Residuals of the additive seasonal decomposition of equally long series.
+
+    Args:
+        series_list (list): pd.Series of the same length.
+        period (int): The seasonal period.
+
+    Returns:
+        list: The residual of each series, without the NaN ends of the trend.
+    """
+    values = np.vstack([series.to_numpy(dtype=float) for series in series_list])
+    if np.isnan(values).any():
+        raise ValueError("This function does not handle missing values")
+    residuals = batch_seasonal_decompose(values, period)["residual"]
+    return [pd.Series(row, index=series.index, name="resid").dropna()
+            for row, series in zip(residuals, series_list)]
+
+
+def forecast_series(series_id, series, period, grid, strategy, test_size, save_dir, baseline=None,
+                    work_queue=None, residual=None):
+    """
+    Decompose, tune and train a SARIMA model for one series.
+
+    With a baseline, the SARIMA search only runs where a probe fit beats it;
+    otherwise (or if the tuned SARIMA does not beat it either) the baseline
+    is trained instead.
+
+    Kept at module level so it can be pickled and sent to worker processes.
+    Only the forecast and a few scalars are returned; the fitted model is
+    written to disk (if save_dir is set) and dropped.
+
+    Args:
+        series_id: Identifier of the series.
+        series (pd.Series): Views indexed by date.
+        period (int): The seasonal period.
+        grid (dict): Order lists passed to HyperparameterTuning.tune_sarima.
+        strategy: Search strategy from src.search_strategies, or None for a grid.
+        test_size (float): Proportion of data held out for evaluation.
+        save_dir (str): Directory for the fitted models, or None to skip saving.
+        baseline: SeasonalNaive, Drift or HoltWinters from src.baseline_models, or None.
+        work_queue (SQLiteWorkQueue): Queue the candidate fits are sent to, or None.
+        residual (pd.Series): Residual of the series already decomposed with
+            others of its length (see decompose_residuals), or None.
+
+    Returns:
+        dict: Status, chosen model and orders, MAE and forecast for the series.
+    """
+    try:
+        if residual is None:
+            residual = decompose_residuals([series], period)[0]
+
+        tuner = HyperparameterTuning(residual, baseline=baseline, work_queue=work_queue)
+        tuned = tuner.tune_sarima(**grid, m=period, strategy=strategy)
+        models = TimeSeriesModels(residual, test_size=test_size)
+        if tuned.get("baseline_won"):
+            model_name, order, seasonal_order = baseline.name, None, None
+            results = models.train_baseline(baseline)
+        else:
+            if tuned["best_params"] is None:
+                raise ValueError("no candidate could be fitted")
+            order, seasonal_order = tuned["best_params"][:3], tuned["best_params"][3:] + (period,)
+            model_name = "SARIMA"
+            results = models.train_sarima(order=order, seasonal_order=seasonal_order)
+        mae = models.evaluate(results["predictions"], f"{model_name}[{series_id}]")
+        if save_dir is not None:
+            ModelSaver(save_dir).save_model(results["model"], f"{series_id}_{model_name}")
+        return {
+            "series_id": series_id, "status": "ok", "error": None, "model": model_name,
+            "order": order, "seasonal_order": seasonal_order, "mae": mae,
+            "forecast": results["predictions"],
+        }
+    except Exception as e:
+        return _failed(series_id, e)
+
+
+def _failed(series_id, error):
+    """Outcome of a series that could not be forecast."""
+    return {
+        "series_id": series_id, "status": "failed", "error": f"{type(error).__name__}: {error}", "model": None,
+        "order": None, "seasonal_order": None, "mae": None, "forecast": None,
+    }
+
+
+class BatchForecaster:
+    def __init__(self, output_dir="time-series-project/data/forecasts", period=7, freq="D", grid=None,
+                 strategy=None, test_size=0.2, n_jobs=1, chunk_size=100, save_dir=None, baseline=None,
+                 work_queue=None):
+        """
+        Initialize the BatchForecaster class.
+
+        Args:
+            output_dir (str): Directory for the forecasts and status CSV files.
+            period (int): The seasonal period (e.g., 7 for weekly data).
+            freq (str): Frequency of the dates in every series.
+            grid (dict): Order lists for tune_sarima (default DEFAULT_GRID).
+            strategy: Search strategy from src.search_strategies, or None for a grid.
+            test_size (float): Proportion of each series held out for evaluation.
+            n_jobs (int): Number of worker processes; each handles whole series.
+            chunk_size (int): Number of series scheduled, collected and written
+                at a time. Bounds how many results are held in memory.
+            save_dir (str): Directory for per-series fitted models, or None.
+            baseline: SeasonalNaive, Drift or HoltWinters from
+                src.baseline_models. Series where a SARIMA probe does not
+                beat it skip the search and keep the baseline.
+            work_queue (SQLiteWorkQueue): Send every candidate fit to this
+                queue. The series of a chunk are then coordinated from
+                threads, so all their fits are queued at once for the
+                workers, and n_jobs is ignored.
+        """
+        self.output_dir = output_dir
+        self.period = period
+        self.freq = freq
+        self.grid = grid or DEFAULT_GRID
+        self.strategy = strategy
+        self.test_size = test_size
+        self.n_jobs = n_jobs
+        self.chunk_size = chunk_size
+        self.save_dir = save_dir
+        self.baseline = baseline
+        self.work_queue = work_queue
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.forecast_file = os.path.join(self.output_dir, "forecasts.csv")
+        self.status_file = os.path.join(self.output_dir, "status.csv")
+
+    def _write_chunk(self, outcomes, first):
+        """Append one chunk of forecasts and statuses to the output files."""
+        forecasts = [
+            pd.DataFrame({
+                "series_id": o["series_id"],
+                "Date": o["forecast"].index,
+                "Forecast": o["forecast"].values,
+            })
+            for o in outcomes if o["forecast"] is not None
+        ]
+        mode = "w" if first else "a"
+        if forecasts:
+            pd.concat(forecasts).to_csv(self.forecast_file, mode=mode, header=first, index=False)
+        elif first:
+            pd.DataFrame(columns=["series_id", "Date", "Forecast"]).to_csv(self.forecast_file, index=False)
+        status = pd.DataFrame([{k: v for k, v in o.items() if k != "forecast"} for o in outcomes])
+        status.to_csv(self.status_file, mode=mode, header=first, index=False)
+        return status
+
+    def _decompose_chunk(self, chunk_series):
+        """
+        Decompose the series of a chunk in one vectorized pass per length.
+
+        Series with gaps or too short to decompose get None, so
+        forecast_series decomposes them itself and reports why it failed.
+        """
+        residuals = [None] * len(chunk_series)
+        by_length = {}
+        for i, series in enumerate(chunk_series):
+            if len(series) >= 2 * self.period and not series.isna().any():
+                by_length.setdefault(len(series), []).append(i)
+        for positions in by_length.values():
+            decomposed = decompose_residuals([chunk_series[i] for i in positions], self.period)
+            for i, residual in zip(positions, decomposed):
+                residuals[i] = residual
+        return residuals
+
+    def run(self, frame, id_col="series_id", date_col="Date", value_col="Views"):
+        """
+        Forecast every series in a long-format frame.
+
+        Args:
+            frame (pd.DataFrame): One row per (series, date).
+            id_col (str): Column name for the series identifier.
+            date_col (str): Column name for the date.
+            value_col (str): Column name for the value.
+
+        Returns:
+            pd.DataFrame: Per-series status (forecasts are written to disk).
+        """
+        groups = frame.groupby(id_col, sort=True).indices
+        series_ids = list(groups)
+        print(f"Forecasting {len(series_ids)} series in chunks of {self.chunk_size}.")
+
+        if self.work_queue is not None:
+            # Coordinators mostly wait on the queue; the fits run on the workers
+            executor = ThreadPoolExecutor(max_workers=self.chunk_size)
+        else:
+            executor = ProcessPoolExecutor(max_workers=self.n_jobs) if self.n_jobs != 1 else None
+        statuses = []
+        try:
+            for start in range(0, len(series_ids), self.chunk_size):
+                chunk = series_ids[start:start + self.chunk_size]
+                outcomes = {}
+                ready_ids, chunk_series = [], []
+                for series_id in chunk:
+                    rows = frame.iloc[groups[series_id]]
+                    try:
+                        series = pd.Series(
+                            rows[value_col].values, index=pd.to_datetime(rows[date_col]), name=value_col
+                        ).sort_index().asfreq(self.freq)
+                    except Exception as e:
+                        # e.g. duplicate dates, which cannot be put on a regular index
+                        outcomes[series_id] = _failed(series_id, e)
+                        continue
+                    ready_ids.append(series_id)
+                    chunk_series.append(series)
+                residuals = self._decompose_chunk(chunk_series)
+                args = [(series_id, series, self.period, self.grid, self.strategy, self.test_size,
+                         self.save_dir, self.baseline, self.work_queue, residual)
+                        for series_id, series, residual in zip(ready_ids, chunk_series, residuals)]
+                if executor is None:
+                    forecasts = [forecast_series(*a) for a in args]
+                else:
+                    forecasts = list(executor.map(forecast_series, *zip(*args))) if args else []
+                outcomes.update(zip(ready_ids, forecasts))
+                outcomes = [outcomes[series_id] for series_id in chunk]
+                statuses.append(self._write_chunk(outcomes, first=start == 0))
+                done = min(start + self.chunk_size, len(series_ids))
+                print(f"Processed {done}/{len(series_ids)} series.")
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        status = pd.concat(statuses, ignore_index=True) if statuses else pd.DataFrame()
+        failed = int((status["status"] != "ok").sum()) if len(status) else 0
+        print(f"Batch forecasting finished: {len(status) - failed} ok, {failed} failed.")
+        return status
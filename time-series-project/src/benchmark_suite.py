@@ -0,0 +1,301 @@
+import contextlib
+import io
+import json
+import math
+import os
+import platform
+import statistics
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+import statsmodels
+from scipy.signal import lfilter
+from src.baseline_models import HoltWinters, SeasonalNaive
+from src.ets_decomposition import ETSDecomposition
+from src.etl_pipeline import ETLPipeline
+from src.hyperparametertune import HyperparameterTuning, SCORE_STEPS
+from src.local_s3 import DirectoryS3Client
+from src.model_saving import ModelSaver
+from src.time_series_models import TimeSeriesModels
+
+# Sizes per profile: `rows` for the ETL, `points` for single-series
+# decomposition, `series` (of `series_length` points) for the wide
+# decomposition and `fit_lengths` for everything that fits a model.
+PROFILES = {
+    "quick": {
+        "rows": [550, 100_000],
+        "points": [550, 100_000],
+        "series": [10, 100],
+        "series_length": 550,
+        "fit_lengths": [550, 2000],
+    },
+    "full": {
+        "rows": [550, 100_000, 1_000_000, 5_000_000],
+        "points": [550, 100_000, 1_000_000],
+        "series": [10, 100, 1000, 5000],
+        "series_length": 1000,
+        "fit_lengths": [550, 2000, 10_000],
+    },
+}
+
+# Small grids so a tuning benchmark measures fitting speed, not grid size
+ARIMA_GRID = {"p_values": [0, 1], "d_values": [0, 1], "q_values": [0, 1]}
+SEASONAL_GRID = {"p_values": [0, 1], "d_values": [1], "q_values": [0, 1],
+                 "P_values": [0, 1], "D_values": [0], "Q_values": [0, 1], "m": 7}
+
+
+def synthetic_values(length, n_series=1, seed=0):
+    """
+    Positive daily series shaped like final_data.csv: a level around 20,
+    weekly seasonality, a slow trend and AR(1) noise.
+
+    Returns:
+        np.ndarray: Shape (n_series, length).
+    """
+    rng = np.random.default_rng(seed)
+    t = np.arange(length)
+    level = rng.uniform(10, 30, size=(n_series, 1))
+    weekly = rng.uniform(0.5, 3, size=(n_series, 1)) * np.sin(2 * np.pi * t / 7)
+    trend = rng.normal(0, 0.002, size=(n_series, 1)) * t
+    noise = lfilter([1.0], [1.0, -0.6], rng.normal(0, 1, size=(n_series, length)), axis=1)
+    return level + weekly + trend + noise
+
+
+def synthetic_series(length, seed=0):
+    """One synthetic series with a daily DatetimeIndex."""
+    index = pd.date_range("2015-07-01", periods=length, freq="D")
+    return pd.Series(synthetic_values(length, seed=seed)[0], index=index, name="Views")
+
+
+def weekend_exog(series):
+    """Weekend indicator aligned with a synthetic series, used as SARIMAX exog."""
+    return pd.DataFrame({"weekend": (series.index.dayofweek >= 5).astype(float)}, index=series.index)
+
+
+def synthetic_raw_frame(n_rows, seed=0):
+    """Raw 'Date,Views' rows as read from S3, with string dates and a few bad values."""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("2015-07-01", periods=min(n_rows, 20_000), freq="D").strftime("%Y-%m-%d")
+    views = np.round(rng.normal(20, 5, size=n_rows), 2).astype(str).astype(object)
+    views[rng.random(n_rows) < 0.001] = "n/a"
+    return pd.DataFrame({"Date": np.resize(np.asarray(dates), n_rows), "Views": views})
+
+
+def _fit_count(result):
+    return result["n_fits"]
+
+
+def _cases(profile, workdir):
+    """
+    Benchmark cases for a profile as (name, unit, sizes, setup, run) tuples.
+
+    setup(size) builds the inputs outside the timed region; run(state)
+    does the measured work and returns how many units it processed.
+    """
+    sizes = PROFILES[profile]
+    etl = ETLPipeline("benchmark", "raw.csv", os.path.join(workdir, "raw.csv"),
+                      os.path.join(workdir, "processed"), s3_client=DirectoryS3Client(workdir))
+
+    def transform(raw):
+        return len(etl.transform_data(raw.copy()))
+
+    def decomposer(data, value_col):
+        ets = ETSDecomposition(file_path=None, date_col="Date", value_col=value_col)
+        ets.data = data
+        return ets
+
+    def single_series(size):
+        return decomposer(synthetic_series(size).to_frame(), "Views")
+
+    def wide_series(n_series):
+        length = sizes["series_length"]
+        columns = [f"series_{i}" for i in range(n_series)]
+        data = pd.DataFrame(synthetic_values(length, n_series).T, columns=columns,
+                            index=pd.date_range("2015-07-01", periods=length, freq="D"))
+        return decomposer(data, columns)
+
+    def decompose(ets):
+        ets.decompose(period=7)
+        return ets.data[ets.value_col].size
+
+    def many_series(n_series):
+        return synthetic_values(sizes["series_length"], n_series)
+
+    def baseline_forecasts(baseline):
+        def run(values):
+            return len(baseline.forecast_many(values, 14))
+        return run
+
+    def tuner(size):
+        return HyperparameterTuning(synthetic_series(size))
+
+    def tuner_with_exog(size):
+        series = synthetic_series(size)
+        future_index = pd.date_range(series.index[-1], periods=SCORE_STEPS + 1, freq=series.index.freq)[1:]
+        return HyperparameterTuning(series, exog_train=weekend_exog(series),
+                                    exog_future=weekend_exog(pd.Series(0.0, index=future_index)))
+
+    def models(size):
+        return TimeSeriesModels(synthetic_series(size))
+
+    def train_sarimax(m):
+        exog = weekend_exog(m.data)
+        m.train_sarimax((1, 1, 1), (0, 1, 1, 7), exog_train=exog.iloc[:len(m.train)],
+                        exog_test=exog.iloc[len(m.train):])
+        return 1
+
+    def fitted(size):
+        return TimeSeriesModels(synthetic_series(size)).train_sarima((1, 1, 1), (0, 1, 1, 7))["model"]
+
+    saver = ModelSaver(os.path.join(workdir, "models"))
+
+    def save_load(compact):
+        def run(model):
+            saver.save_model(model, "benchmark", compact=compact)
+            saver.load_model("benchmark")
+            saver.delete_model("benchmark")
+            return 1
+        return run
+
+    return [
+        ("etl.transform_data", "rows", sizes["rows"], synthetic_raw_frame, transform),
+        ("ets.decompose", "points", sizes["points"], single_series, decompose),
+        ("ets.decompose_wide", "points", sizes["series"], wide_series, decompose),
+        ("baseline.seasonal_naive", "series", sizes["series"], many_series, baseline_forecasts(SeasonalNaive())),
+        ("baseline.holt_winters", "series", sizes["series"], many_series, baseline_forecasts(HoltWinters())),
+        ("tune.arima", "fits", sizes["fit_lengths"], tuner, lambda t: _fit_count(t.tune_arima(**ARIMA_GRID))),
+        ("tune.sarima", "fits", sizes["fit_lengths"], tuner, lambda t: _fit_count(t.tune_sarima(**SEASONAL_GRID))),
+        ("tune.sarimax", "fits", sizes["fit_lengths"], tuner_with_exog,
+         lambda t: _fit_count(t.tune_sarimax(**SEASONAL_GRID))),
+        ("train.arima", "fits", sizes["fit_lengths"], models, lambda m: bool(m.train_arima((1, 1, 1)))),
+        ("train.sarima", "fits", sizes["fit_lengths"], models,
+         lambda m: bool(m.train_sarima((1, 1, 1), (0, 1, 1, 7)))),
+        ("train.sarimax", "fits", sizes["fit_lengths"], models, train_sarimax),
+        ("model_saver.pickle", "round trips", sizes["fit_lengths"], fitted, save_load(compact=False)),
+        ("model_saver.compact", "round trips", sizes["fit_lengths"], fitted, save_load(compact=True)),
+    ]
+
+
+def measure(run, state, repeats=3, min_time=0.5):
+    """
+    Time `run(state)` and measure its peak traced memory.
+
+    Fast cases are repeated until `min_time` seconds have been timed so
+    millisecond-scale numbers are stable. Timing and memory are measured
+    in separate passes because tracing allocations slows the code down.
+
+    Returns:
+        dict: Median and minimum seconds, units processed and peak MB.
+    """
+    timings = []
+    while len(timings) < repeats or (sum(timings) < min_time and len(timings) < 1000):
+        start = time.perf_counter()
+        units = run(state)
+        timings.append(time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        run(state)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"seconds": statistics.median(timings), "min_seconds": min(timings), "runs": len(timings),
+            "units": int(units), "peak_mb": peak / 1024 ** 2}
+
+
+def environment():
+    """Versions and hardware the numbers were measured on."""
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "statsmodels": statsmodels.__version__,
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def run_suite(profile="quick", select=None, repeats=3, quiet=True):
+    """
+    Run every benchmark case of a profile at each of its sizes.
+
+    Args:
+        profile (str): 'quick' (final_data.csv scale) or 'full' (up to
+            millions of points and thousands of series).
+        select (str): Only run cases whose name contains this text.
+        repeats (int): Timed runs per case and size.
+        quiet (bool): Hide the progress prints of the code under test.
+
+    Returns:
+        dict: Environment and one result row per case and size.
+    """
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown profile '{profile}', expected one of {sorted(PROFILES)}.")
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for name, unit, sizes, setup, run in _cases(profile, workdir):
+            if select and select not in name:
+                continue
+            previous = None
+            for size in sizes:
+                with contextlib.redirect_stdout(io.StringIO()) if quiet else contextlib.nullcontext():
+                    state = setup(size)
+                    row = measure(run, state, repeats)
+                row.update({"case": name, "size": size, "unit": unit,
+                            "throughput": row["units"] / row["seconds"] if row["seconds"] else None})
+                # Empirical exponent: 1.0 is linear scaling from the previous size
+                row["scaling"] = None
+                if previous is not None and previous["seconds"] > 0 and row["seconds"] > 0:
+                    row["scaling"] = math.log(row["seconds"] / previous["seconds"]) / math.log(size / previous["size"])
+                results.append(row)
+                previous = row
+                print(format_row(row))
+    return {"profile": profile, "environment": environment(), "results": results}
+
+
+def format_row(row):
+    throughput = f"{row['throughput']:,.1f} {row['unit']}/s" if row["throughput"] else "-"
+    scaling = f"{row['scaling']:.2f}" if row.get("scaling") is not None else "-"
+    line = (f"{row['case']:<22} {row['size']:>10,} {row['seconds'] * 1000:>11.2f} ms "
+            f"{throughput:>24} {row['peak_mb']:>9.1f} MB  scaling {scaling:>5}")
+    return line
+
+
+def compare(report, baseline, tolerance=1.25):
+    """
+    Compare a report against a baseline report.
+
+    Args:
+        report (dict): Output of run_suite().
+        baseline (dict): An earlier report.
+        tolerance (float): Slowdown ratio above which a case counts as a regression.
+
+    Returns:
+        list: One dict per case and size found in both, with the ratio of
+        the best (minimum) times and 'regression', 'faster' or 'ok'.
+    """
+    base = {(row["case"], row["size"]): row for row in baseline["results"]}
+    rows = []
+    for row in report["results"]:
+        old = base.get((row["case"], row["size"]))
+        if old is None:
+            continue
+        # The minimum is the least noisy estimate of what the code costs
+        ratio = row["min_seconds"] / old["min_seconds"] if old["min_seconds"] else float("inf")
+        status = "regression" if ratio > tolerance else "faster" if ratio < 1 / tolerance else "ok"
+        rows.append({"case": row["case"], "size": row["size"], "ratio": ratio, "status": status})
+    if baseline.get("environment") != report.get("environment"):
+        print("Warning: the baseline was measured on a different environment; ratios are indicative only.")
+    return rows
+
+
+def save_report(report, path):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+
+
+def load_report(path):
+    with open(path) as f:
+        return json.load(f)
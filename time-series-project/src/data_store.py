@@ -0,0 +1,292 @@
+import os
+import shutil
+import numpy as np
+import pandas as pd
+
+DAY_NAMES = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+
+def _typed(data, date_col="Date"):
+    """Return a copy with a datetime date column and a categorical day name column."""
+    data = data.copy()
+    data[date_col] = pd.to_datetime(data[date_col])
+    if "Day_of_Week" in data.columns:
+        data["Day_of_Week"] = pd.Categorical(data["Day_of_Week"], categories=DAY_NAMES, ordered=True)
+    return data
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError as e:
+        raise ImportError("The feather and parquet stores need pyarrow: pip install pyarrow") from e
+
+
+class CSVStore:
+    extension = ".csv"
+
+    def __init__(self, path, date_col="Date"):
+        """
+        Processed data stored as a single CSV file.
+
+        Args:
+            path (str): Path of the CSV file.
+            date_col (str): Column name for the date.
+        """
+        self.path = path
+        self.date_col = date_col
+
+    def write(self, data):
+        """Replace the stored data with `data`."""
+        self.write_chunks([data])
+
+    def write_chunks(self, chunks):
+        """Write an iterable of DataFrames one after another, then swap the file in."""
+        tmp_file = f"{self.path}.tmp"
+        with open(tmp_file, "w", newline="") as f:
+            for i, chunk in enumerate(chunks):
+                chunk.to_csv(f, header=i == 0, index=False)
+        os.replace(tmp_file, self.path)
+
+    def replace_after(self, data, cutoff):
+        """
+        Replace the stored rows dated after `cutoff` with `data`.
+
+        Rows are stored in date order, so the file is scanned backwards
+        from the end to the last row on or before `cutoff`, truncated
+        there, and `data` is appended. Earlier rows are not read.
+
+        Args:
+            data (pd.DataFrame): Rows dated after `cutoff`, sorted by date.
+            cutoff: Last date whose stored rows are kept.
+        """
+        with open(self.path, "rb+") as f:
+            header = f.readline()
+            columns = header.decode().rstrip("\r\n").split(",")
+            keep = _csv_offset_after(f, len(header), columns.index(self.date_col), pd.Timestamp(cutoff))
+            f.seek(keep)
+            f.truncate()
+            if keep > len(header):
+                f.seek(keep - 1)
+                if f.read(1) != b"\n":
+                    f.write(b"\n")
+            f.write(data[columns].to_csv(header=False, index=False).encode())
+
+    def read(self, columns=None, start=None, end=None):
+        """
+        Read the stored data.
+
+        Args:
+            columns (list): Columns to load (the date column is always loaded).
+            start, end: Inclusive date bounds, or None for no bound.
+        """
+        usecols = None if columns is None else list(dict.fromkeys([self.date_col] + list(columns)))
+        data = _typed(pd.read_csv(self.path, usecols=usecols), self.date_col)
+        return _filter_dates(data, self.date_col, start, end)
+
+
+class FeatherStore(CSVStore):
+    extension = ".feather"
+
+    def write_chunks(self, chunks):
+        """Write uncompressed Arrow IPC batches so reads can be memory-mapped."""
+        _require_pyarrow()
+        import pyarrow as pa
+
+        tmp_file = f"{self.path}.tmp"
+        writer = None
+        try:
+            for chunk in chunks:
+                table = pa.Table.from_pandas(_typed(chunk, self.date_col), preserve_index=False)
+                if writer is None:
+                    writer = pa.ipc.new_file(tmp_file, table.schema)
+                writer.write_table(table)
+        finally:
+            if writer is not None:
+                writer.close()
+        if writer is not None:
+            os.replace(tmp_file, self.path)
+
+    def replace_after(self, data, cutoff):
+        """
+        Replace the stored rows dated after `cutoff` with `data`.
+
+        An Arrow IPC file cannot be truncated in place, so the kept rows are
+        copied from the memory-mapped file as Arrow batches (no conversion
+        to pandas) ahead of the new rows.
+        """
+        _require_pyarrow()
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+        import pyarrow.feather as feather
+
+        table = feather.read_table(self.path, memory_map=True)
+        kept = table.filter(_arrow_date_filter(ds.field(self.date_col), None, cutoff))
+        new = pa.Table.from_pandas(_typed(data, self.date_col), schema=table.schema, preserve_index=False)
+        tmp_file = f"{self.path}.tmp"
+        with pa.ipc.new_file(tmp_file, table.schema) as writer:
+            writer.write_table(kept)
+            writer.write_table(new)
+        os.replace(tmp_file, self.path)
+
+    def read(self, columns=None, start=None, end=None):
+        _require_pyarrow()
+        import pyarrow.dataset as ds
+        import pyarrow.feather as feather
+
+        usecols = None if columns is None else list(dict.fromkeys([self.date_col] + list(columns)))
+        table = feather.read_table(self.path, columns=usecols, memory_map=True)
+        date_filter = _arrow_date_filter(ds.field(self.date_col), start, end)
+        if date_filter is not None:
+            table = table.filter(date_filter)
+        return table.to_pandas()
+
+
+class ParquetStore(CSVStore):
+    extension = ".parquet"
+
+    def write_chunks(self, chunks):
+        """Write a dataset partitioned by year and month of the date column."""
+        _require_pyarrow()
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        tmp_dir = f"{self.path}.tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        for i, chunk in enumerate(chunks):
+            chunk = _typed(chunk, self.date_col)
+            chunk["year_month"] = chunk[self.date_col].dt.strftime("%Y-%m")
+            pq.write_to_dataset(
+                pa.Table.from_pandas(chunk, preserve_index=False), tmp_dir,
+                partition_cols=["year_month"], basename_template=f"part-{i}-{{i}}.parquet",
+            )
+        shutil.rmtree(self.path, ignore_errors=True)
+        os.replace(tmp_dir, self.path)
+
+    def replace_after(self, data, cutoff):
+        """
+        Replace the stored rows dated after `cutoff` with `data`.
+
+        Only the year_month partitions from the cutoff's month on are
+        rewritten; the cutoff month keeps its rows up to `cutoff`.
+        """
+        _require_pyarrow()
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        cutoff = pd.Timestamp(cutoff)
+        first_month = cutoff.strftime("%Y-%m")
+        data = _typed(data, self.date_col)
+        kept = self.read(start=f"{first_month}-01", end=cutoff)
+        data = pd.concat([kept, data], ignore_index=True)
+        data["year_month"] = data[self.date_col].dt.strftime("%Y-%m")
+
+        tmp_dir = f"{self.path}.tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        pq.write_to_dataset(pa.Table.from_pandas(data, preserve_index=False), tmp_dir,
+                            partition_cols=["year_month"], basename_template="part-0-{i}.parquet")
+        for name in os.listdir(self.path):
+            if name.startswith("year_month=") and name.split("=", 1)[1] >= first_month:
+                shutil.rmtree(os.path.join(self.path, name))
+        for name in os.listdir(tmp_dir):
+            os.replace(os.path.join(tmp_dir, name), os.path.join(self.path, name))
+        shutil.rmtree(tmp_dir)
+
+    def read(self, columns=None, start=None, end=None):
+        """Read only the requested columns and the partitions overlapping the date range."""
+        _require_pyarrow()
+        import pyarrow.dataset as ds
+
+        dataset = ds.dataset(self.path, format="parquet", partitioning="hive")
+        usecols = None if columns is None else list(dict.fromkeys([self.date_col] + list(columns)))
+        if usecols is None:
+            usecols = [name for name in dataset.schema.names if name != "year_month"]
+
+        # Prune partitions first, then filter rows within them
+        filters = []
+        if start is not None:
+            filters.append(ds.field("year_month") >= pd.Timestamp(start).strftime("%Y-%m"))
+        if end is not None:
+            filters.append(ds.field("year_month") <= pd.Timestamp(end).strftime("%Y-%m"))
+        date_filter = _arrow_date_filter(ds.field(self.date_col), start, end)
+        if date_filter is not None:
+            filters.append(date_filter)
+        combined = None
+        for f in filters:
+            combined = f if combined is None else combined & f
+        data = dataset.to_table(columns=usecols, filter=combined).to_pandas()
+        data = data.sort_values(self.date_col, kind="stable").reset_index(drop=True)
+        if "Day_of_Week" in data.columns:
+            data["Day_of_Week"] = pd.Categorical(data["Day_of_Week"], categories=DAY_NAMES, ordered=True)
+        return data
+
+
+STORES = {"csv": CSVStore, "feather": FeatherStore, "parquet": ParquetStore}
+
+
+def get_store(storage_format, processed_dir, name="processed_data", date_col="Date"):
+    """
+    Build the store for a format inside the processed directory.
+
+    Args:
+        storage_format (str): 'csv', 'feather' or 'parquet'.
+        processed_dir (str): Directory holding the processed data.
+        name (str): File name without extension.
+        date_col (str): Column name for the date.
+    """
+    if storage_format not in STORES:
+        raise ValueError(f"Unknown storage format '{storage_format}', expected one of {sorted(STORES)}.")
+    store_cls = STORES[storage_format]
+    return store_cls(os.path.join(processed_dir, f"{name}{store_cls.extension}"), date_col=date_col)
+
+
+def store_for_path(path, date_col="Date"):
+    """Pick the store matching a processed data path by its extension."""
+    for store_cls in STORES.values():
+        if path.rstrip("/").endswith(store_cls.extension):
+            return store_cls(path.rstrip("/"), date_col=date_col)
+    return CSVStore(path, date_col=date_col)
+
+
+def _csv_offset_after(f, header_end, date_index, cutoff, block_size=1 << 16):
+    """
+    Byte offset just past the last row dated on or before `cutoff` in a
+    date-ordered CSV file, found by reading blocks backwards from the end.
+    """
+    position = f.seek(0, os.SEEK_END)
+    partial = b""
+    while position > header_end:
+        start = max(header_end, position - block_size)
+        f.seek(start)
+        buffer = f.read(position - start) + partial
+        # Line starts inside the buffer; the first line is only complete at the header
+        starts = np.flatnonzero(np.frombuffer(buffer, dtype=np.uint8) == ord("\n")) + 1
+        if start == header_end:
+            starts = np.concatenate([[0], starts])
+        ends = list(starts[1:]) + [len(buffer)]
+        lines = [buffer[a:b].rstrip(b"\r\n") for a, b in zip(starts, ends)]
+        fields = [line.split(b",")[date_index].decode().strip('"') if line else "" for line in lines]
+        on_or_before = np.flatnonzero(pd.to_datetime(fields, errors="coerce") <= cutoff)
+        if len(on_or_before):
+            return start + int(ends[on_or_before[-1]])
+        partial = buffer[:starts[0]] if len(starts) else buffer
+        position = start
+    return header_end
+
+
+def _filter_dates(data, date_col, start, end):
+    if start is not None:
+        data = data[data[date_col] >= pd.Timestamp(start)]
+    if end is not None:
+        data = data[data[date_col] <= pd.Timestamp(end)]
+    return data.reset_index(drop=True)
+
+
+def _arrow_date_filter(field, start, end):
+    date_filter = None
+    if start is not None:
+        date_filter = field >= pd.Timestamp(start).to_pydatetime()
+    if end is not None:
+        upper = field <= pd.Timestamp(end).to_pydatetime()
+        date_filter = upper if date_filter is None else date_filter & upper
+    return date_filter
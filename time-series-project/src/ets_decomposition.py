@@ -1,49 +1,146 @@
+import numpy as np
 import pandas as pd
-from statsmodels.tsa.seasonal import seasonal_decompose
-import matplotlib.pyplot as plt
+from src.result_cache import ResultCache
+from src.data_store import store_for_path
+from src.instrumentation import span, timed
+from src.lazy_imports import import_lock
+
+
+def batch_seasonal_decompose(values, period, model='additive'):
+    """
+    Classical seasonal decomposition of many equally long series at once.
+
+    Matches statsmodels' seasonal_decompose (two-sided moving average,
+    no trend extrapolation) for every row, without a Python loop per series.
+
+    Args:
+        values (np.ndarray): 2-D array of shape (n_series, n_time).
+        period (int): The seasonal period (e.g., 7 for weekly data).
+        model (str): Type of decomposition ('additive' or 'multiplicative').
+
+    Returns:
+        dict: Trend, seasonal and residual arrays, each shaped like `values`.
+    """
+    values = np.asarray(values, dtype=float)
+    n_series, n_time = values.shape
+    if n_time < 2 * period:
+        raise ValueError(f"x must have 2 complete cycles requires {2 * period} observations. x only has {n_time} observation(s)")
+    multiplicative = model.startswith('m')
+    if multiplicative and np.any(values <= 0):
+        raise ValueError("Multiplicative seasonality is not appropriate for zero and negative values")
+
+    # Centered moving average, the same filter statsmodels uses
+    if period % 2 == 0:
+        filt = np.array([.5] + [1] * (period - 1) + [.5]) / period
+    else:
+        filt = np.repeat(1. / period, period)
+    half = len(filt) // 2
+    trend = np.full_like(values, np.nan)
+    windows = np.lib.stride_tricks.sliding_window_view(values, len(filt), axis=1)
+    trend[:, half:n_time - half] = windows @ filt
+
+    detrended = values / trend if multiplicative else values - trend
+
+    # Mean of each seasonal position, ignoring the NaN ends of the trend
+    n_cycles = -(-n_time // period)
+    padded = np.full((n_series, n_cycles * period), np.nan)
+    padded[:, :n_time] = detrended
+    period_averages = np.nanmean(padded.reshape(n_series, n_cycles, period), axis=1)
+    if multiplicative:
+        period_averages /= period_averages.mean(axis=1, keepdims=True)
+    else:
+        period_averages -= period_averages.mean(axis=1, keepdims=True)
+    seasonal = np.tile(period_averages, n_cycles)[:, :n_time]
+
+    resid = values / seasonal / trend if multiplicative else detrended - seasonal
+    return {"trend": trend, "seasonal": seasonal, "residual": resid}
 
 
 class ETSDecomposition:
-    def __init__(self, file_path, date_col, value_col):
+    def __init__(self, file_path, date_col, value_col, result_cache=None):
         """
         Initialize the ETSDecomposition class.
         
         Args:
-            file_path (str): Path to the CSV file.
+            file_path (str): Path to the processed data (CSV, feather or parquet).
             date_col (str): Column name for the date.
-            value_col (str): Column name for the value.
+            value_col (str or list): Column name for the value, or a list of
+                column names to decompose a wide frame in one vectorized pass.
+            result_cache (ResultCache): On-disk cache of decompositions.
+                None (default) always recomputes.
         """
         self.file_path = file_path
         self.date_col = date_col
         self.value_col = value_col
+        self.result_cache = result_cache
         self.data = None
 
-    def load_data(self):
-        """Loads the data from the CSV file."""
-        self.data = pd.read_csv(self.file_path)
-        self.data[self.date_col] = pd.to_datetime(self.data[self.date_col])
-        self.data.set_index(self.date_col, inplace=True)
+    def load_data(self, start=None, end=None):
+        """
+        Loads the date and value columns from the processed data.
+
+        Args:
+            start, end: Inclusive date bounds, or None to load the whole range.
+        """
+        columns = list(self.value_col) if isinstance(self.value_col, (list, tuple)) else [self.value_col]
+        store = store_for_path(self.file_path, date_col=self.date_col)
+        with span("ets.load_data", store=type(store).__name__) as fields:
+            self.data = store.read(columns=columns, start=start, end=end)
+            self.data.set_index(self.date_col, inplace=True)
+            fields["rows"] = len(self.data)
         print("Data loaded successfully.")
 
-    def decompose(self, period, model='additive'):
+    @timed("ets.decompose")
+    def decompose(self, period, model='additive', plot_dir=None):
         """
         Perform ETS decomposition on the time series data.
         
         Args:
             period (int): The seasonal period (e.g., 7 for weekly data).
             model (str): Type of decomposition ('additive' or 'multiplicative').
+            plot_dir (str): If given, also render the decomposition into this
+                directory before returning. By default nothing is plotted; use
+                src.reporting.DecompositionReporter to render in the background.
         
         Returns:
             dict: A dictionary containing trend, seasonality, and residual components.
+            For a wide frame (several value columns) each component is a DataFrame.
         """
+        if self.result_cache is not None:
+            key = ResultCache.make_key("decompose", self.data[self.value_col], period=period, model=model)
+            found, components = self.result_cache.get(key)
+        if self.result_cache is None or not found:
+            components = self._decompose(period, model)
+            if self.result_cache is not None:
+                self.result_cache.put(key, components)
+
+        if plot_dir is not None:
+            from src.reporting import DecompositionReporter
+            reporter = DecompositionReporter(output_dir=plot_dir)
+            reporter.submit("decomposition", self.data[self.value_col], components)
+            reporter.wait()
+        return components
+
+    def _decompose(self, period, model):
+        """Run the decomposition without any caching or plotting."""
+        if isinstance(self.value_col, (list, tuple)):
+            return self._decompose_wide(period, model)
+        with import_lock:
+            from statsmodels.tsa.seasonal import seasonal_decompose
         decomposition = seasonal_decompose(self.data[self.value_col], model=model, period=period)
-        decomposition.plot()
-        plt.show()
-        plt.savefig(fname='time-series-project/picture')
-        
         print("ETS Decomposition completed.")
         return {
             "trend": decomposition.trend,
             "seasonal": decomposition.seasonal,
             "residual": decomposition.resid
         }
+
+    def _decompose_wide(self, period, model):
+        """Decompose every value column with batch_seasonal_decompose."""
+        wide = self.data[list(self.value_col)]
+        arrays = batch_seasonal_decompose(wide.to_numpy().T, period=period, model=model)
+        print(f"ETS Decomposition completed for {wide.shape[1]} series.")
+        return {
+            name: pd.DataFrame(array.T, index=wide.index, columns=wide.columns)
+            for name, array in arrays.items()
+        }
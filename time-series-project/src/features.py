@@ -0,0 +1,161 @@
+import functools
+import os
+import numpy as np
+import pandas as pd
+from src.data_store import DAY_NAMES
+
+
+@functools.lru_cache(maxsize=8)
+def _holiday_days(holidays_file, mtime):
+    """Holiday dates as sorted datetime64[D]; `mtime` makes edits to the file invalidate the cache."""
+    if holidays_file is None:
+        return np.array([], dtype="datetime64[D]")
+    dates = pd.read_csv(holidays_file, usecols=["Date"])["Date"]
+    return np.unique(pd.to_datetime(dates).to_numpy().astype("datetime64[D]"))
+
+
+@functools.lru_cache(maxsize=64)
+def _calendar_block(start, periods, freq, holidays_file, mtime, drop_first):
+    """Calendar features for one date range, cached so repeated splits and horizons are free."""
+    index = pd.date_range(start, periods=periods, freq=freq)
+    days = index.to_numpy().astype("datetime64[D]")
+    # 1970-01-01 was a Thursday (Monday = 0)
+    day_of_week = (days.astype(np.int64) + 3) % 7
+    first = 1 if drop_first else 0
+    one_hot = (day_of_week[:, None] == np.arange(first, 7)[None, :]).astype(float)
+    holiday = np.isin(days, _holiday_days(holidays_file, mtime)).astype(float)
+    values = np.column_stack([one_hot, holiday])
+    columns = [f"dow_{name[:3].lower()}" for name in DAY_NAMES[first:]] + ["holiday"]
+    return values, columns
+
+
+def _lag(values, k):
+    lagged = np.full(len(values), np.nan)
+    lagged[k:] = values[:-k]
+    return lagged
+
+
+def _rolling(values, window, shift):
+    """Rolling mean and standard deviation of values[t - shift - window + 1 .. t - shift]."""
+    # Centering keeps the running sums small, so differences of them stay accurate
+    offset = np.nanmean(values)
+    centered = values - offset
+    sums = np.concatenate([[0.0], np.cumsum(centered)])
+    squares = np.concatenate([[0.0], np.cumsum(centered ** 2)])
+    mean = np.full(len(values), np.nan)
+    std = np.full(len(values), np.nan)
+    ends = np.arange(window, len(values) + 1)
+    total = sums[ends] - sums[ends - window]
+    mean[ends - 1] = total / window + offset
+    variance = (squares[ends] - squares[ends - window] - total ** 2 / window) / (window - 1)
+    std[ends - 1] = np.sqrt(np.maximum(variance, 0.0))
+    return _lag(mean, shift) if shift else mean, _lag(std, shift) if shift else std
+
+
+class FeatureBuilder:
+    def __init__(self, holidays_file="time-series-project/data/calendar/holidays.csv", lags=(),
+                 rolling_windows=(), drop_first=True):
+        """
+        Build numeric exogenous matrices for SARIMAX.
+
+        Calendar features (day-of-week one-hots and a holiday flag from a
+        local table) are known for any date, so they can be generated for
+        the forecast horizon. Lags and rolling statistics of the target are
+        only known up to the shortest lag ahead, which bounds the horizon.
+
+        Args:
+            holidays_file (str): CSV with a 'Date' column, or None for no holidays.
+            lags (tuple): Lags of the target to include, e.g. (7, 14).
+            rolling_windows (tuple): Windows for rolling mean/std of the
+                target, shifted by the shortest lag (or 1 without lags).
+            drop_first (bool): Drop the Monday column so the one-hots are not
+                collinear with a constant.
+        """
+        self.holidays_file = holidays_file
+        self.lags = tuple(lags)
+        self.rolling_windows = tuple(rolling_windows)
+        self.drop_first = drop_first
+
+    @property
+    def max_horizon(self):
+        """Longest horizon future() can fill; None when only calendar features are used."""
+        if not self.lags and not self.rolling_windows:
+            return None
+        return min(self.lags) if self.lags else 1
+
+    def calendar(self, index):
+        """
+        Calendar features for a DatetimeIndex.
+
+        Args:
+            index (pd.DatetimeIndex): Regularly spaced dates.
+
+        Returns:
+            pd.DataFrame: One float column per feature, indexed like `index`.
+        """
+        freq = index.freq or (pd.infer_freq(index) if len(index) > 2 else None)
+        if freq is None:
+            raise ValueError("Calendar features need a regularly spaced DatetimeIndex.")
+        freq = pd.tseries.frequencies.to_offset(freq).freqstr
+        mtime = os.path.getmtime(self.holidays_file) if self.holidays_file else None
+        values, columns = _calendar_block(index[0], len(index), freq, self.holidays_file, mtime, self.drop_first)
+        # Copy so callers cannot modify the cached block
+        return pd.DataFrame(values.copy(), index=index, columns=columns)
+
+    def _target_features(self, values):
+        shift = self.max_horizon or 1
+        columns = {}
+        for k in self.lags:
+            columns[f"lag_{k}"] = _lag(values, k)
+        for window in self.rolling_windows:
+            columns[f"rolling_mean_{window}"], columns[f"rolling_std_{window}"] = _rolling(values, window, shift)
+        return columns
+
+    def build(self, series):
+        """
+        Exogenous matrix aligned with a series.
+
+        Rows whose lags or rolling windows reach before the start of the
+        series are dropped, so the returned series and matrix can be passed
+        straight to TimeSeriesModels or HyperparameterTuning.
+
+        Args:
+            series (pd.Series): Target series with a DatetimeIndex.
+
+        Returns:
+            tuple: (trimmed series, exog DataFrame) with identical indexes.
+        """
+        exog = self.calendar(series.index)
+        for name, column in self._target_features(np.asarray(series, dtype=float)).items():
+            exog[name] = column
+        complete = ~np.isnan(exog.to_numpy()).any(axis=1)
+        return series[complete], exog[complete]
+
+    def future(self, series, steps):
+        """
+        Exogenous matrix for the `steps` periods after the end of a series.
+
+        Args:
+            series (pd.Series): The history the forecast starts from.
+            steps (int): Forecast horizon.
+
+        Returns:
+            pd.DataFrame: Exog for the horizon, indexed by the future dates.
+        """
+        if self.max_horizon is not None and steps > self.max_horizon:
+            raise ValueError(f"Target lags only cover {self.max_horizon} step(s) ahead, not {steps}.")
+        freq = series.index.freq or pd.infer_freq(series.index)
+        index = pd.date_range(series.index[-1], periods=steps + 1, freq=freq)[1:]
+        exog = self.calendar(index)
+        if self.lags or self.rolling_windows:
+            # Compute on history + placeholders and keep the horizon rows
+            values = np.concatenate([np.asarray(series, dtype=float), np.full(steps, np.nan)])
+            for name, column in self._target_features(values).items():
+                exog[name] = column[-steps:]
+        return exog
+
+    @staticmethod
+    def split(exog, test_size=0.2):
+        """Split exog exactly like TimeSeriesModels.split_data splits the series."""
+        n_test = int(len(exog) * test_size)
+        return exog[:-n_test], exog[-n_test:]
@@ -0,0 +1,128 @@
+import hashlib
+import numpy as np
+
+
+def data_fingerprint(data, exog=None):
+    """
+    Hash the values of a series (and its exogenous variables).
+
+    Args:
+        data (pd.Series): The time series data.
+        exog (pd.DataFrame): Exogenous variables, or None.
+
+    Returns:
+        str: Hex digest identifying the data.
+    """
+    digest = hashlib.sha1(np.ascontiguousarray(np.asarray(data, dtype=float)).tobytes())
+    if exog is not None:
+        digest.update(np.ascontiguousarray(np.asarray(exog, dtype=float)).tobytes())
+    return digest.hexdigest()
+
+
+def fit_with_warm_start(model, start_values=None, **fit_kwargs):
+    """
+    Fit a statsmodels state-space model, starting from known parameter values.
+
+    Parameters found in `start_values` (by name, e.g. 'ar.L1' or 'sigma2')
+    replace the model's default starting values. If the warm-started fit
+    fails, the model is refitted from its defaults.
+
+    Args:
+        model: An unfitted ARIMA or SARIMAX model.
+        start_values (dict): Parameter name -> value, or None for a cold start.
+        **fit_kwargs: Passed through to model.fit().
+
+    Returns:
+        The fitted results object.
+    """
+    if start_values:
+        start = np.array(model.start_params, dtype=float)
+        for i, name in enumerate(model.param_names):
+            if name in start_values:
+                start[i] = start_values[name]
+        try:
+            return model.fit(start_params=start, **fit_kwargs)
+        except Exception:
+            pass
+    return model.fit(**fit_kwargs)
+
+
+def fit_summary(fitted):
+    """
+    Extract what the cache needs from a fitted results object.
+
+    Returns:
+        dict: Parameter name -> value, the optimizer iteration count and
+        whether the optimizer reported convergence.
+    """
+    params = dict(zip(fitted.model.param_names, np.asarray(fitted.params, dtype=float)))
+    retvals = getattr(fitted, "mle_retvals", None) or {}
+    return {"params": params, "iterations": retvals.get("iterations"), "converged": retvals.get("converged")}
+
+
+class FitCache:
+    def __init__(self):
+        """
+        In-memory store of fitted parameter vectors.
+
+        Entries are keyed by (data fingerprint, order, seasonal order) and are
+        looked up by order distance, so a candidate can start from the
+        estimates of its nearest already-fitted neighbour.
+        """
+        self.entries = {}
+        self.total_iterations = 0
+        self.n_fits = 0
+        self.n_warm_starts = 0
+
+    def record(self, fingerprint, order, seasonal_order, summary, warm=False):
+        """
+        Store the parameters of a fitted candidate.
+
+        Args:
+            fingerprint (str): Fingerprint of the data the model was fitted on.
+            order (tuple): ARIMA order (p, d, q).
+            seasonal_order (tuple): Seasonal order (P, D, Q, m), or None.
+            summary (dict): Output of fit_summary().
+            warm (bool): Whether the fit was warm-started.
+        """
+        self.entries[(fingerprint, tuple(order), _seasonal_key(seasonal_order))] = summary["params"]
+        self.n_fits += 1
+        self.n_warm_starts += int(warm)
+        self.total_iterations += summary["iterations"] or 0
+
+    def lookup(self, fingerprint, order, seasonal_order):
+        """
+        Find starting values for a candidate.
+
+        Entries fitted on the same data win over entries fitted on other data
+        (e.g. a truncated history or the full series before a train/test
+        split); among those the closest order wins.
+
+        Returns:
+            dict: Parameter name -> value, or None if nothing usable is cached.
+        """
+        seasonal = _seasonal_key(seasonal_order)
+        best, best_key = None, None
+        for (entry_fp, entry_order, entry_seasonal), params in self.entries.items():
+            if entry_seasonal[3:] != seasonal[3:]:
+                continue
+            distance = sum(
+                abs(a - b) for a, b in zip(entry_order + entry_seasonal[:3], tuple(order) + seasonal[:3])
+            )
+            key = (entry_fp != fingerprint, distance)
+            if best_key is None or key < best_key:
+                best, best_key = params, key
+        return best
+
+    def stats(self):
+        """Return fit, warm start and optimizer iteration counts."""
+        return {
+            "n_fits": self.n_fits,
+            "n_warm_starts": self.n_warm_starts,
+            "total_iterations": self.total_iterations,
+        }
+
+
+def _seasonal_key(seasonal_order):
+    """Normalise a missing seasonal order to (0, 0, 0, 0)."""
+    return tuple(seasonal_order) if seasonal_order is not None else (0, 0, 0, 0)
@@ -0,0 +1,262 @@
+import numpy as np
+import pandas as pd
+from src.lazy_imports import import_lock
+
+
+def _quantile_columns(quantiles):
+    return [f"q{q:g}" for q in quantiles]
+
+
+class ForecastDistribution:
+    def __init__(self, index, mean, std=None, samples=None, histogram=None):
+        """
+        Predictive distribution of a forecast, one marginal per horizon.
+
+        Exactly one representation is set: a normal distribution (`std`),
+        sample paths (`samples`), or a per-horizon histogram built by
+        from_sampler() when the samples were too many to keep.
+
+        Args:
+            index (pd.Index): Dates (or positions) of the forecast horizon.
+            mean (np.ndarray): Forecast mean per horizon.
+            std (np.ndarray): Forecast standard deviation per horizon.
+            samples (np.ndarray): Sample paths, shape (n_samples, steps).
+            histogram (dict): 'edges' (steps, bins + 1) and 'counts' (steps, bins).
+        """
+        self.index = index
+        self.mean = np.asarray(mean, dtype=float)
+        self.std = None if std is None else np.asarray(std, dtype=float)
+        self.samples = samples
+        self.histogram = histogram
+
+    @classmethod
+    def from_samples(cls, index, samples):
+        samples = np.asarray(samples, dtype=float)
+        return cls(index, samples.mean(axis=0), samples=samples)
+
+    @classmethod
+    def from_sampler(cls, index, sample, n_samples, batch_size=100_000, bins=2000):
+        """
+        Build the distribution from batches of paths without keeping them.
+
+        Each batch is binned into a fixed histogram per horizon, so memory
+        is bounded by batch_size x steps whatever n_samples is. The bins
+        span the first batch's range widened by half of it on both sides;
+        the rare later samples outside it are counted in the edge bins.
+
+        Args:
+            index (pd.Index): Dates (or positions) of the forecast horizon.
+            sample (callable): sample(n) returns n paths, shape (n, steps).
+            n_samples (int): Total number of paths.
+            batch_size (int): Paths simulated at a time.
+            bins (int): Histogram bins per horizon.
+        """
+        edges, counts, total = None, None, None
+        drawn = 0
+        while drawn < n_samples:
+            batch = sample(min(batch_size, n_samples - drawn))
+            steps = batch.shape[1]
+            if edges is None:
+                low, high = batch.min(axis=0), batch.max(axis=0)
+                pad = np.maximum(0.5 * (high - low), 1e-9)
+                edges = np.linspace(low - pad, high + pad, bins + 1, axis=1)
+                counts = np.zeros(steps * bins, dtype=np.int64)
+                total = np.zeros(steps)
+            width = edges[:, 1] - edges[:, 0]
+            bin_index = np.clip(((batch - edges[:, 0]) / width).astype(np.int64), 0, bins - 1)
+            counts += np.bincount((bin_index + np.arange(steps) * bins).ravel(), minlength=steps * bins)
+            total += batch.sum(axis=0)
+            drawn += len(batch)
+        return cls(index, total / drawn, histogram={"edges": edges, "counts": counts.reshape(-1, bins)})
+
+    @property
+    def kind(self):
+        return "normal" if self.std is not None else "samples" if self.samples is not None else "histogram"
+
+    def _histogram_cdf(self):
+        counts = self.histogram["counts"]
+        cdf = np.cumsum(counts, axis=1) / counts.sum(axis=1, keepdims=True)
+        return np.concatenate([np.zeros((len(cdf), 1)), cdf], axis=1)
+
+    def quantiles(self, quantiles=(0.05, 0.5, 0.95)):
+        """
+        Forecast quantiles.
+
+        Args:
+            quantiles (tuple): Probabilities between 0 and 1.
+
+        Returns:
+            pd.DataFrame: One column per quantile, indexed by the horizon.
+        """
+        quantiles = np.asarray(quantiles, dtype=float)
+        if self.kind == "normal":
+            with import_lock:
+                from scipy.stats import norm
+            values = self.mean[:, None] + self.std[:, None] * norm.ppf(quantiles)[None, :]
+        elif self.kind == "samples":
+            values = np.quantile(self.samples, quantiles, axis=0).T
+        else:
+            cdf, edges = self._histogram_cdf(), self.histogram["edges"]
+            values = np.vstack([np.interp(quantiles, cdf[h], edges[h]) for h in range(len(cdf))])
+        return pd.DataFrame(values, index=self.index, columns=_quantile_columns(quantiles))
+
+    def interval(self, alpha=0.05):
+        """Central (1 - alpha) prediction interval as 'lower' and 'upper' columns."""
+        bounds = self.quantiles((alpha / 2, 1 - alpha / 2))
+        bounds.columns = ["lower", "upper"]
+        return bounds
+
+    def crps(self, actual):
+        """
+        Continuous ranked probability score per horizon (lower is better).
+
+        Exact for a normal distribution and for samples; integrated over
+        the bins for a histogram.
+
+        Args:
+            actual (array-like): Observed values for the horizon.
+
+        Returns:
+            np.ndarray: CRPS per horizon.
+        """
+        y = np.asarray(actual, dtype=float)
+        if self.kind == "normal":
+            with import_lock:
+                from scipy.stats import norm
+            z = (y - self.mean) / self.std
+            return self.std * (z * (2 * norm.cdf(z) - 1) + 2 * norm.pdf(z) - 1 / np.sqrt(np.pi))
+        if self.kind == "samples":
+            # E|X - y| - E|X - X'| / 2, with the pair term from the sorted samples
+            ordered = np.sort(self.samples, axis=0)
+            n = len(ordered)
+            weights = (2 * np.arange(1, n + 1) - n - 1)[:, None]
+            return np.abs(ordered - y).mean(axis=0) - (weights * ordered).sum(axis=0) / n ** 2
+        cdf, edges = self._histogram_cdf(), self.histogram["edges"]
+        centres = (edges[:, 1:] + edges[:, :-1]) / 2
+        step = (centres >= y[:, None]).astype(float)
+        cdf_mid = (cdf[:, 1:] + cdf[:, :-1]) / 2
+        inside = ((cdf_mid - step) ** 2 * np.diff(edges, axis=1)).sum(axis=1)
+        # Outside the bins F is 0 or 1, so only the stretch up to y contributes
+        return inside + np.maximum(edges[:, 0] - y, 0) + np.maximum(y - edges[:, -1], 0)
+
+    def pinball_loss(self, actual, quantiles=(0.05, 0.5, 0.95)):
+        """Mean pinball (quantile) loss over the horizon for each quantile."""
+        y = np.asarray(actual, dtype=float)[:, None]
+        predicted = self.quantiles(quantiles).to_numpy()
+        q = np.asarray(quantiles, dtype=float)[None, :]
+        loss = np.maximum(q * (y - predicted), (q - 1) * (y - predicted)).mean(axis=0)
+        return dict(zip(_quantile_columns(quantiles), loss))
+
+    def coverage(self, actual, alpha=0.05):
+        """Share of observations inside the (1 - alpha) interval."""
+        y = np.asarray(actual, dtype=float)
+        bounds = self.interval(alpha)
+        return float(((y >= bounds["lower"].to_numpy()) & (y <= bounds["upper"].to_numpy())).mean())
+
+
+def _psd_sqrt(cov):
+    """Square root of a (possibly singular) covariance matrix."""
+    values, vectors = np.linalg.eigh(cov)
+    return vectors * np.sqrt(np.clip(values, 0, None))
+
+
+def state_space_sampler(results, steps, mean, bootstrap=False, rng=None):
+    """
+    Sampler of forecast paths from a fitted ARIMA/SARIMA(X) model.
+
+    The model is linear, so a path is the forecast mean plus a deviation
+    that starts from the uncertainty of the final state and is driven by
+    new shocks. Deviations are propagated for all paths at once with one
+    matrix product per step, and need no exog.
+
+    Args:
+        results: Fitted statsmodels ARIMA or SARIMAX results.
+        steps (int): Forecast horizon.
+        mean (np.ndarray): The forecast mean per step.
+        bootstrap (bool): Draw shocks from the model's standardized
+            residuals instead of a normal distribution.
+        rng (np.random.Generator): Random generator.
+
+    Returns:
+        callable: sample(n) -> paths of shape (n, steps).
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    filtered = results.filter_results
+    design = filtered.design[:, :, -1]
+    transition = filtered.transition[:, :, -1]
+    selection = filtered.selection[:, :, -1]
+    state_root = _psd_sqrt(filtered.state_cov[:, :, -1])
+    obs_root = _psd_sqrt(filtered.obs_cov[:, :, -1])
+    initial_root = _psd_sqrt(filtered.predicted_state_cov[:, :, -1])
+    residuals = None
+    if bootstrap:
+        residuals = np.asarray(filtered.standardized_forecasts_error[0], dtype=float)
+        residuals = residuals[results.loglikelihood_burn:]
+        residuals = residuals[np.isfinite(residuals)]
+
+    def shocks(n, k):
+        if residuals is None:
+            return rng.standard_normal((n, k))
+        return rng.choice(residuals, size=(n, k))
+
+    def sample(n):
+        deviation = rng.standard_normal((n, initial_root.shape[1])) @ initial_root.T
+        paths = np.empty((n, steps))
+        for h in range(steps):
+            noise = rng.standard_normal((n, obs_root.shape[1])) @ obs_root.T
+            paths[:, h] = (deviation @ design.T + noise)[:, 0]
+            deviation = deviation @ transition.T + (shocks(n, state_root.shape[1]) @ state_root.T) @ selection.T
+        return paths + mean
+
+    return sample
+
+
+def forecast_distribution(results, steps, exog=None, method="auto", n_samples=1000, batch_size=None,
+                          bootstrap=False, seed=None):
+    """
+    Predictive distribution of a fitted model's forecast.
+
+    Args:
+        results: Fitted statsmodels results (ARIMA, SARIMA, SARIMAX) or a
+            BaselineResults from src.baseline_models.
+        steps (int): Forecast horizon.
+        exog (pd.DataFrame): Future exogenous values for SARIMAX.
+        method (str): 'analytic' (normal, from the model's forecast
+            variance), 'simulate' (Monte-Carlo sample paths) or 'auto'
+            (analytic where the model has a closed form; Holt-Winters and
+            bootstrapped shocks are simulated).
+        n_samples (int): Number of sample paths when simulating.
+        batch_size (int): Simulate in batches of this many paths and keep
+            only a histogram per horizon (see ForecastDistribution.from_sampler).
+            None keeps every path.
+        bootstrap (bool): Resample the model's residuals instead of drawing
+            normal shocks (statsmodels models only).
+        seed (int): Seed for reproducible paths.
+
+    Returns:
+        ForecastDistribution: The forecast distribution.
+    """
+    if method not in ("auto", "analytic", "simulate"):
+        raise ValueError(f"Unknown method '{method}', expected 'auto', 'analytic' or 'simulate'.")
+    rng = np.random.default_rng(seed)
+    if hasattr(results, "get_forecast"):
+        prediction = results.get_forecast(steps=steps, exog=exog)
+        index = prediction.predicted_mean.index
+        mean = np.asarray(prediction.predicted_mean, dtype=float)
+        if method == "analytic" or (method == "auto" and not bootstrap):
+            return ForecastDistribution(index, mean, std=np.asarray(prediction.se_mean, dtype=float))
+        sample = state_space_sampler(results, steps, mean, bootstrap=bootstrap, rng=rng)
+    else:
+        index = results.forecast_index(steps)
+        std = results.forecast_std(steps)
+        if method == "analytic" or (method == "auto" and std is not None):
+            if std is None:
+                raise ValueError(f"{results.baseline.name} has no closed-form forecast variance; simulate it.")
+            return ForecastDistribution(index, np.asarray(results.forecast(steps), dtype=float), std=std)
+
+        def sample(n):
+            return results.simulate(steps, n, rng)
+
+    if batch_size is None:
+        return ForecastDistribution.from_samples(index, sample(n_samples))
+    return ForecastDistribution.from_sampler(index, sample, n_samples, batch_size=batch_size)
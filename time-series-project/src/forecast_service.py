@@ -0,0 +1,311 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+import pandas as pd
+from src.model_saving import ModelSaver, latest_model_name
+from src.forecast_distribution import forecast_distribution
+from src.features import FeatureBuilder
+
+logger = logging.getLogger("TimeSeriesPipeline")
+
+
+class ModelRegistry:
+    def __init__(self, model_saver, max_models=8, check_interval=1.0):
+        """
+        Keep loaded models in memory, bounded by a least-recently-used policy.
+
+        Args:
+            model_saver (ModelSaver): Where the saved models live.
+            max_models (int): Number of models held in memory at once.
+            check_interval (float): Seconds between checks of a model's files
+                for changes; a changed file is reloaded on the next request.
+        """
+        self.model_saver = model_saver
+        self.max_models = max_models
+        self.check_interval = check_interval
+        self.models = OrderedDict()
+        self.lock = threading.Lock()
+        self.loads = 0
+        self.reloads = 0
+
+    def _signature(self, model_name):
+        """Modification times of the pickle and compact files, None where missing."""
+        signature = []
+        for compact in (False, True):
+            path = self.model_saver.model_path(model_name, compact=compact)
+            signature.append(os.path.getmtime(path) if os.path.exists(path) else None)
+        return tuple(signature)
+
+    @staticmethod
+    def _check_name(model_name):
+        """Only accept names of models saved directly in the model directory."""
+        if (not isinstance(model_name, str) or not model_name or ".." in model_name
+                or any(sep in model_name for sep in ("/", "\\", os.sep))):
+            raise ValueError(f"Invalid model name {model_name!r}.")
+
+    def resolve(self, model_name):
+        """
+        Saved model a request's name refers to.
+
+        A branch name such as 'SARIMA' stands for the newest of its tuned
+        model and the baseline that beat it, as in `main.py forecast`; any
+        other name is taken as the name a model was saved under.
+        """
+        self._check_name(model_name)
+        return latest_model_name(self.model_saver, model_name) or model_name
+
+    def get(self, model_name):
+        """
+        Return a loaded model, loading or reloading it from disk when needed.
+
+        Args:
+            model_name (str): Name the model was saved under.
+
+        Raises:
+            ValueError: If the name could point outside the model directory.
+            FileNotFoundError: If no model is saved under the name.
+        """
+        with self.lock:
+            entry = self.models.get(model_name)
+            now = time.monotonic()
+            if entry is not None and now - entry["checked"] < self.check_interval:
+                self.models.move_to_end(model_name)
+                return entry["model"]
+
+            self._check_name(model_name)
+            signature = self._signature(model_name)
+            if signature == (None, None):
+                raise FileNotFoundError(f"No saved model named {model_name!r}.")
+            if entry is not None and signature == entry["signature"]:
+                entry["checked"] = now
+                self.models.move_to_end(model_name)
+                return entry["model"]
+
+            model = self.model_saver.load_model(model_name)
+            if entry is None:
+                self.loads += 1
+            else:
+                self.reloads += 1
+                logger.info(f"Reloaded model {model_name} after its file changed.")
+            self.models[model_name] = {"model": model, "signature": signature, "checked": now}
+            self.models.move_to_end(model_name)
+            while len(self.models) > self.max_models:
+                evicted, _ = self.models.popitem(last=False)
+                logger.info(f"Evicted model {evicted} from the registry.")
+            return model
+
+    def stats(self):
+        """Loaded model names and load/reload counts."""
+        with self.lock:
+            return {"loaded": list(self.models), "loads": self.loads, "reloads": self.reloads}
+
+
+class ForecastService:
+    def __init__(self, registry, latency_window=10000, features=None):
+        """
+        Serve forecasts from a model registry and track request latency.
+
+        Args:
+            registry (ModelRegistry): Source of loaded models.
+            latency_window (int): Number of recent requests kept for percentiles.
+            features (FeatureBuilder): Generates future exog for models fitted
+                with exogenous variables when a request does not supply it.
+        """
+        self.registry = registry
+        self.features = features
+        self.latencies = deque(maxlen=latency_window)
+        self.lock = threading.Lock()
+
+    def forecast(self, requests):
+        """
+        Answer a batch of forecast requests.
+
+        Requests for the same model and interval width, without future exog,
+        share a single forecast at the longest horizon asked for, which is
+        then cut to each request's horizon.
+
+        Args:
+            requests (list): Dicts with 'model' (a saved model name, or a
+                branch such as 'SARIMA' for its newest tuned or baseline
+                model), 'steps', and optionally
+                'alpha' (interval width, default 0.05) and 'exog' (future
+                exogenous values as a list of rows).
+
+        Returns:
+            list: One dict per request, in order, with 'mean', 'lower',
+            'upper' and 'index', or 'error' and its HTTP 'status' (400 for a
+            bad request, 404 for an unknown model).
+        """
+        start = time.perf_counter()
+        responses = [None] * len(requests)
+        # Seconds from the batch arriving to each request's response being ready
+        latencies = [None] * len(requests)
+        steps = [None] * len(requests)
+        groups = OrderedDict()
+        for i, request in enumerate(requests):
+            error = self._validate(request)
+            if error is not None:
+                model_name = request.get("model") if isinstance(request, dict) else None
+                responses[i] = {"model": model_name, "error": error, "status": 400}
+                latencies[i] = time.perf_counter() - start
+                continue
+            steps[i] = int(request["steps"])
+            if request.get("exog") is None:
+                key = (request["model"], request.get("alpha", 0.05))
+                groups.setdefault(key, []).append(i)
+            else:
+                responses[i] = self._answer(request, steps[i], request["exog"])
+                latencies[i] = time.perf_counter() - start
+
+        for (model_name, alpha), members in groups.items():
+            shared = self._answer({"model": model_name, "alpha": alpha}, max(steps[i] for i in members))
+            ready = time.perf_counter() - start
+            for i in members:
+                responses[i] = self._cut(shared, steps[i])
+                latencies[i] = ready
+
+        with self.lock:
+            self.latencies.extend(latencies)
+        return responses
+
+    @staticmethod
+    def _validate(request):
+        """Reason a request cannot be answered, or None if it is well formed."""
+        if not isinstance(request, dict):
+            return "Each request must be a JSON object."
+        if not isinstance(request.get("model"), str):
+            return "'model' must be the name of a saved model."
+        steps = request.get("steps")
+        if isinstance(steps, bool) or not isinstance(steps, (int, str)):
+            return "'steps' must be a positive integer."
+        try:
+            if int(steps) < 1:
+                return "'steps' must be a positive integer."
+        except ValueError:
+            return "'steps' must be a positive integer."
+        alpha = request.get("alpha", 0.05)
+        if isinstance(alpha, bool) or not isinstance(alpha, (int, float)) or not 0 < alpha < 1:
+            return "'alpha' must be a number between 0 and 1."
+        if request.get("exog") is not None and not isinstance(request["exog"], list):
+            return "'exog' must be a list of rows."
+        return None
+
+    def _answer(self, request, steps, exog=None):
+        try:
+            model = self.registry.get(self.registry.resolve(request["model"]))
+            # Baselines (BaselineResults) have no statsmodels model and no exog
+            k_exog = getattr(getattr(model, "model", None), "k_exog", 0)
+            if exog is not None:
+                exog = np.asarray(exog, dtype=float)
+            elif self.features is not None and k_exog:
+                history = pd.Series(np.asarray(model.model.endog)[:, 0], index=model.model._index)
+                exog = self.features.future(history, steps)
+            distribution = forecast_distribution(model, steps, exog=exog)
+            interval = distribution.interval(request.get("alpha", 0.05))
+            return {
+                "model": request["model"],
+                "index": [str(i.date()) if isinstance(i, pd.Timestamp) else int(i) for i in distribution.index],
+                "mean": np.asarray(distribution.mean, dtype=float).tolist(),
+                "lower": interval["lower"].tolist(),
+                "upper": interval["upper"].tolist(),
+            }
+        except FileNotFoundError as e:
+            return {"model": request.get("model"), "error": f"{type(e).__name__}: {e}", "status": 404}
+        except ValueError as e:
+            return {"model": request.get("model"), "error": f"{type(e).__name__}: {e}", "status": 400}
+        except Exception as e:
+            return {"model": request.get("model"), "error": f"{type(e).__name__}: {e}", "status": 500}
+
+    @staticmethod
+    def _cut(response, steps):
+        if "error" in response:
+            return response
+        return {key: value[:steps] if isinstance(value, list) else value for key, value in response.items()}
+
+    def latency_stats(self):
+        """p50 and p99 request latency in milliseconds over the recent window."""
+        with self.lock:
+            latencies = np.asarray(self.latencies) * 1000
+        if len(latencies) == 0:
+            return {"count": 0, "p50_ms": None, "p99_ms": None}
+        return {
+            "count": len(latencies),
+            "p50_ms": float(np.percentile(latencies, 50)),
+            "p99_ms": float(np.percentile(latencies, 99)),
+        }
+
+
+def make_handler(service):
+    """Build an HTTP handler class bound to a ForecastService."""
+    class ForecastHandler(BaseHTTPRequestHandler):
+        def _send(self, status, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            if self.path != "/forecast":
+                self._send(404, {"error": f"Unknown path {self.path}"})
+                return
+            try:
+                payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            except ValueError as e:
+                self._send(400, {"error": f"Invalid JSON: {e}"})
+                return
+            if not isinstance(payload, dict):
+                self._send(400, {"error": "Expected a JSON object."})
+                return
+            # A single request object or {"requests": [...]} for a batch
+            if "requests" in payload:
+                if not isinstance(payload["requests"], list):
+                    self._send(400, {"error": "'requests' must be a list."})
+                    return
+                self._send(200, {"forecasts": service.forecast(payload["requests"])})
+            else:
+                response = service.forecast([payload])[0]
+                self._send(response.get("status", 200), response)
+
+        def do_GET(self):
+            if self.path == "/metrics":
+                self._send(200, {"latency": service.latency_stats(), "registry": service.registry.stats()})
+            else:
+                self._send(404, {"error": f"Unknown path {self.path}"})
+
+        def log_message(self, format, *args):
+            logger.debug(format % args)
+
+    return ForecastHandler
+
+
+def serve(model_dir="time-series-project/models", host="127.0.0.1", port=8000, max_models=8):
+    """
+    Run the forecast service over HTTP until interrupted.
+
+    POST /forecast takes {"model": ..., "steps": ...} or {"requests": [...]};
+    GET /metrics returns p50/p99 latency and the loaded models.
+
+    Args:
+        model_dir (str): Directory the ModelSaver reads models from.
+        host (str): Interface to listen on.
+        port (int): Port to listen on.
+        max_models (int): Number of models held in memory at once.
+    """
+    service = ForecastService(ModelRegistry(ModelSaver(model_dir), max_models=max_models),
+                              features=FeatureBuilder())
+    server = ThreadingHTTPServer((host, port), make_handler(service))
+    print(f"Serving forecasts on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"Latency: {service.latency_stats()}")
@@ -1,23 +1,397 @@
 import itertools
-from statsmodels.tsa.arima.model import ARIMA
-from statsmodels.tsa.statespace.sarimax import SARIMAX
-from sklearn.metrics import mean_squared_error
+import os
+import socket
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from src.search_strategies import GridSearch
+from src.fit_cache import data_fingerprint, fit_summary, fit_with_warm_start
+from src.result_cache import ResultCache
+from src.lazy_imports import import_lock
+from src.instrumentation import record
 import numpy as np
 
+# Forecast steps compared with the end of the series to score a candidate
+SCORE_STEPS = 11
+
+
+def fit_candidate(data, exog, order, seasonal_order=None, maxiter=None, start_values=None, backtester=None,
+                  exog_future=None):
+    """
+    Fit and score a single candidate order.
+
+    Kept at module level so it can be pickled and sent to worker processes.
+
+    Args:
+        data (pd.Series): The time series data to train on.
+        exog (pd.DataFrame): Exogenous variables, or None.
+        order (tuple): ARIMA order (p, d, q).
+        seasonal_order (tuple): Seasonal order (P, D, Q, m), or None for plain ARIMA.
+        maxiter (int): Cap on optimizer iterations, or None for the statsmodels default.
+        start_values (dict): Parameter name -> starting value from a neighbouring fit.
+        backtester (RollingOriginBacktester): Score by rolling-origin backtest
+            instead of comparing a forecast with the last in-sample points.
+        exog_future (pd.DataFrame): Exogenous variables for the SCORE_STEPS
+            periods after the end of `data`; required with `exog`.
+
+    Returns:
+        dict: The candidate score, AIC, fitted parameters and fit duration,
+        or the error that prevented fitting it.
+    """
+    start = time.perf_counter()
+    try:
+        if backtester is not None:
+            outcome = backtester.score(data, order, seasonal_order, exog, start_values, maxiter)
+            return {"error": None, "seconds": time.perf_counter() - start, **outcome}
+        # Imported here so coordinators that only queue fits never load them
+        with import_lock:
+            from statsmodels.tsa.arima.model import ARIMA
+            from statsmodels.tsa.statespace.sarimax import SARIMAX
+            from sklearn.metrics import mean_squared_error
+        if seasonal_order is None:
+            method_kwargs = {"maxiter": maxiter} if maxiter is not None else None
+            model = fit_with_warm_start(
+                ARIMA(data, order=order), start_values, method_kwargs=method_kwargs
+            )
+        else:
+            fit_kwargs = {"maxiter": maxiter} if maxiter is not None else {}
+            model = fit_with_warm_start(
+                SARIMAX(data, exog=exog, order=order, seasonal_order=seasonal_order),
+                start_values, disp=False, **fit_kwargs
+            )
+        if exog is not None and exog_future is None:
+            raise ValueError("Scoring a candidate with exog needs exog_future for the forecast steps.")
+        predictions = model.predict(start=len(data), end=len(data) + SCORE_STEPS - 1,
+                                    exog=exog_future[:SCORE_STEPS] if exog is not None else None)
+        mse = mean_squared_error(data[-len(predictions):], predictions)
+        return {"score": mse, "aic": model.aic, "error": None, "seconds": time.perf_counter() - start,
+                **fit_summary(model)}
+    except Exception as e:
+        return {"score": None, "aic": None, "error": f"{type(e).__name__}: {e}",
+                "seconds": time.perf_counter() - start}
+
+
+def score_baseline(data, baseline, backtester=None):
+    """
+    Score a baseline exactly like fit_candidate scores a SARIMA candidate.
+
+    Baselines ignore exogenous variables.
+
+    Args:
+        data (pd.Series): The time series data to train on.
+        baseline: A SeasonalNaive, Drift or HoltWinters from src.baseline_models.
+        backtester (RollingOriginBacktester): Score by rolling-origin backtest.
+
+    Returns:
+        dict: The baseline's name, score and fit duration, or its error.
+    """
+    start = time.perf_counter()
+    try:
+        if backtester is not None:
+            outcome = backtester.score_baseline(data, baseline)
+        else:
+            with import_lock:
+                from sklearn.metrics import mean_squared_error
+            predictions = baseline.fit(data).forecast(steps=SCORE_STEPS)
+            outcome = {"score": mean_squared_error(data[-len(predictions):], predictions)}
+        return {"name": baseline.name, "error": None, "seconds": time.perf_counter() - start, **outcome}
+    except Exception as e:
+        return {"name": baseline.name, "score": None, "error": f"{type(e).__name__}: {e}",
+                "seconds": time.perf_counter() - start}
+
+
+def _probe_candidate(candidates):
+    """
+    The candidate closest to the airline model, (0, 1, 1)(0, 1, 1, m), or to
+    (0, 1, 1) in a non-seasonal grid: the ARIMA counterparts of exponential
+    smoothing, so the probe and the baseline share their structure.
+    """
+    def distance(candidate):
+        _, order, seasonal_order = candidate
+        spec = tuple(order) + tuple((seasonal_order or (0, 0, 0))[:3])
+        target = (0, 1, 1) + ((0, 1, 1) if seasonal_order is not None else (0, 0, 0))
+        return sum(abs(a - b) for a, b in zip(spec, target))
+    return min(candidates, key=distance)
+
 
 class HyperparameterTuning:
-    def __init__(self, time_series_data, exog_train=None):
+    def __init__(self, time_series_data, exog_train=None, n_jobs=1, fit_cache=None, result_cache=None,
+                 backtester=None, progress=None, baseline=None, baseline_margin=0.0, work_queue=None,
+                 exog_future=None, queue_idle_timeout=120.0):
         """
         Initialize the HyperparameterTuning class.
 
         Args:
             time_series_data (pd.Series): The time series data to train on.
             exog_train (pd.DataFrame): Exogenous variables for SARIMAX, default is None.
+            n_jobs (int): Number of worker processes used to fit candidates.
+                1 (default) fits them one after another in this process.
+            fit_cache (FitCache): Warm-start cache shared with other tuners and
+                TimeSeriesModels. None (default) fits every candidate cold.
+            result_cache (ResultCache): On-disk cache of finished searches.
+                None (default) always runs the search.
+            backtester (RollingOriginBacktester): Score candidates by rolling-origin
+                backtest. None (default) keeps the single in-sample comparison.
+            progress (callable): Called as progress(fits_done, n_candidates)
+                after every fit. An exception raised from it (e.g. a
+                cancelled background job) stops the search.
+            baseline: SeasonalNaive, Drift or HoltWinters from
+                src.baseline_models. When set, one probe candidate is fitted
+                first and the search only runs if the probe beats the
+                baseline's score; the result then says whether the baseline won.
+            baseline_margin (float): Relative improvement over the baseline
+                score a SARIMA fit needs to count as beating it.
+            work_queue (SQLiteWorkQueue): Send candidate fits to this queue
+                for workers (src.work_queue.run_worker) instead of fitting
+                them here; n_jobs is then ignored.
+            exog_future (pd.DataFrame): Exogenous variables for the
+                SCORE_STEPS periods after the series, which score each SARIMAX
+                forecast (e.g. FeatureBuilder.future(time_series_data, SCORE_STEPS)).
+                Required with exog_train unless a backtester scores the candidates.
+            queue_idle_timeout (float): Seconds queued fits may wait without
+                any worker running them before the unfinished ones are fitted
+                here instead. None waits for workers indefinitely.
         """
         self.data = time_series_data
         self.exog_train = exog_train
+        self.n_jobs = n_jobs
+        self.fit_cache = fit_cache
+        self.result_cache = result_cache
+        self.backtester = backtester
+        self.progress = progress
+        self.baseline = baseline
+        self.baseline_margin = baseline_margin
+        self.work_queue = work_queue
+        self.exog_future = exog_future
+        self.queue_idle_timeout = queue_idle_timeout
+
+    def _fit_all(self, candidates, data, exog=None, maxiter=None, on_fit=None):
+        """
+        Fit candidates in-process or across the worker pool, preserving order.
+
+        With a fit cache, candidates are fitted in waves of increasing total
+        order so each wave can warm-start from the one before it. Starting
+        values are resolved once per wave, which keeps the parallel and
+        serial paths identical. `on_fit` is called after each finished fit;
+        if it raises, queued fits are cancelled and the exception propagates.
+        """
+        if self.fit_cache is None:
+            waves = [list(range(len(candidates)))]
+        else:
+            fingerprint = data_fingerprint(data, exog)
+            levels = {}
+            for i, (_, order, seasonal_order) in enumerate(candidates):
+                levels.setdefault(sum(order) + sum((seasonal_order or (0,))[:3]), []).append(i)
+            waves = [levels[level] for level in sorted(levels)]
+
+        executor = None
+        if self.work_queue is None and self.n_jobs != 1 and len(candidates) > 1:
+            executor = ProcessPoolExecutor(max_workers=self.n_jobs)
+        outcomes = [None] * len(candidates)
+        try:
+            for wave in waves:
+                args = []
+                for i in wave:
+                    _, order, seasonal_order = candidates[i]
+                    start_values = None
+                    if self.fit_cache is not None:
+                        start_values = self.fit_cache.lookup(fingerprint, order, seasonal_order)
+                    args.append((data, exog, order, seasonal_order, maxiter, start_values, self.backtester,
+                                 self.exog_future if exog is not None else None))
+                if self.work_queue is not None:
+                    results = self._fit_queued(args, on_fit)
+                else:
+                    futures = None
+                    if executor is not None:
+                        futures = [executor.submit(fit_candidate, *a) for a in args]
+                    results = []
+                    for k, a in enumerate(args):
+                        results.append(fit_candidate(*a) if futures is None else futures[k].result())
+                        if on_fit is not None:
+                            on_fit()
+                for i, a, outcome in zip(wave, args, results):
+                    outcomes[i] = outcome
+                    record("tune.fit", order=a[2], seasonal_order=a[3], n_obs=len(data), maxiter=maxiter,
+                           warm=a[5] is not None, duration_s=outcome["seconds"], aic=outcome["aic"],
+                           iterations=outcome.get("iterations"), converged=outcome.get("converged"),
+                           error=outcome["error"])
+                    if self.fit_cache is not None and outcome["error"] is None:
+                        _, order, seasonal_order = candidates[i]
+                        self.fit_cache.record(fingerprint, order, seasonal_order, outcome,
+                                              warm=a[5] is not None)
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+        return outcomes
+
+    def _fit_queued(self, args, on_fit=None):
+        """
+        Fit candidates through the work queue and return their outcomes in order.
+
+        Each fit is keyed by its data and specification, so a fit another
+        coordinator has already queued or finished is not repeated. A task that
+        fails on every attempt comes back as a failed fit. If no worker runs
+        any of the tasks for `queue_idle_timeout` seconds, the remaining fits
+        run in this process. On the way out the tasks, their results and
+        the shared blobs are removed from the queue unless another
+        coordinator still waits for them.
+        """
+        data, exog, exog_future = args[0][0], args[0][1], args[0][7]
+        data_ref = self.work_queue.put_blob(data)
+        exog_ref = self.work_queue.put_blob(exog) if exog is not None else None
+        future_ref = self.work_queue.put_blob(exog_future) if exog_future is not None else None
+        tasks = []
+        for _, _, order, seasonal_order, maxiter, start_values, backtester, _ in args:
+            key = ResultCache.make_key(
+                "fit", data, exog, order=order, seasonal_order=seasonal_order, maxiter=maxiter,
+                start_values=start_values, backtester=vars(backtester) if backtester is not None else None,
+                exog_future=data_fingerprint(exog_future) if exog_future is not None else None,
+            )
+            tasks.append((key, "src.hyperparametertune:fit_candidate",
+                          (data_ref, exog_ref, order, seasonal_order, maxiter, start_values, backtester,
+                           future_ref)))
+        keys = [key for key, _, _ in tasks]
+        owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.work_queue.submit(tasks, owner=owner)
+        finished = {}
+
+        def on_result(key, result, error):
+            finished[key] = (result, error)
+            if on_fit is not None:
+                on_fit()
 
-    def tune_arima(self, p_values, d_values, q_values):
+        try:
+            try:
+                self.work_queue.wait(keys, on_result=on_result, idle_timeout=self.queue_idle_timeout)
+            except TimeoutError as e:
+                print(f"{e} Is a tune_worker.py process reading the queue? "
+                      f"Fitting the {len(set(keys) - set(finished))} remaining candidate(s) here.")
+                # Stop workers from picking the fits up while they run here
+                self.work_queue.cancel(keys, owner=owner)
+                for key, a in zip(keys, args):
+                    if key not in finished:
+                        on_result(key, fit_candidate(*a), None)
+        finally:
+            # Drops queued fits nobody else waits for and the results already collected
+            self.work_queue.release(keys, owner)
+        outcomes = []
+        for key in keys:
+            result, error = finished[key]
+            outcomes.append(result if result is not None else
+                            {"score": None, "aic": None, "error": f"Task failed: {error}", "seconds": 0.0})
+        return outcomes
+
+    def _evaluate_grid(self, candidates, exog=None, strategy=None):
+        """
+        Search the candidates and pick the best one.
+
+        Full fits are reduced in the order the strategy returns them (grid
+        order for the built-in strategies) whatever the number of workers, so
+        the parallel path returns exactly what the serial path would.
+
+        Args:
+            candidates (list): (params, order, seasonal_order) tuples.
+            exog (pd.DataFrame): Exogenous variables passed to every fit.
+            strategy: Search strategy from src.search_strategies (default GridSearch).
+
+        Returns:
+            dict: Best parameters, model performance, per-candidate errors and
+            the number of (full) fits that were run.
+        """
+        strategy = strategy or GridSearch()
+        if self.result_cache is None:
+            return self._search(candidates, exog, strategy)
+        exog_future = self.exog_future if exog is not None else None
+        key = ResultCache.make_key(
+            "tune", self.data, exog,
+            candidates=[candidate[1:] for candidate in candidates],
+            strategy={"name": type(strategy).__name__, **vars(strategy)},
+            warm_start=self.fit_cache is not None,
+            backtester=vars(self.backtester) if self.backtester is not None else None,
+            baseline=self._baseline_spec(),
+            exog_future=data_fingerprint(exog_future) if exog_future is not None else None,
+        )
+        return self.result_cache.get_or_compute(key, lambda: self._search(candidates, exog, strategy))
+
+    def _baseline_spec(self):
+        if self.baseline is None:
+            return None
+        return {"name": self.baseline.name, "margin": self.baseline_margin, **vars(self.baseline)}
+
+    def _beats(self, outcome, baseline):
+        """Whether a SARIMA outcome's score beats the baseline's by the margin."""
+        if baseline["error"] is not None:
+            return True
+        return outcome["error"] is None and outcome["score"] < baseline["score"] * (1 - self.baseline_margin)
+
+    def _search(self, candidates, exog, strategy):
+        """Run the strategy over the candidates (see _evaluate_grid)."""
+        stats = {"n_fits": 0, "n_full_fits": 0}
+        errors = []
+        fits_done = 0
+        n_planned = len(candidates) + (self.baseline is not None)
+
+        def on_fit():
+            nonlocal fits_done
+            fits_done += 1
+            self.progress(fits_done, n_planned)
+
+        # Outcomes of full fits by params, so the baseline probe is not fitted again by the search
+        full_outcomes = {}
+
+        def evaluate(subset, fraction=1.0, maxiter=None, min_obs=0):
+            full = fraction >= 1 and maxiter is None
+            pending = [candidate for candidate in subset if not (full and candidate[0] in full_outcomes)]
+            stats["n_fits"] += len(pending)
+            if full:
+                stats["n_full_fits"] += len(pending)
+            data, sliced_exog = self.data, exog
+            n_obs = max(int(len(self.data) * fraction), min_obs)
+            if n_obs < len(self.data):
+                data = self.data[-n_obs:]
+                sliced_exog = exog[-n_obs:] if exog is not None else None
+            outcomes = self._fit_all(pending, data, sliced_exog, maxiter,
+                                     on_fit=on_fit if self.progress is not None else None) if pending else []
+            fitted = {}
+            for (params, _, _), outcome in zip(pending, outcomes):
+                fitted[params] = outcome
+                if outcome["error"] is not None:
+                    errors.append({"params": params, "error": outcome["error"]})
+            if full:
+                full_outcomes.update(fitted)
+                return [full_outcomes[params] for params, _, _ in subset]
+            return [fitted[params] for params, _, _ in subset]
+
+        baseline = None
+        if self.baseline is not None:
+            baseline = score_baseline(self.data, self.baseline, self.backtester)
+            probe = _probe_candidate(candidates)
+            probe_outcome = evaluate([probe])[0]
+            if not self._beats(probe_outcome, baseline):
+                print(f"{baseline['name']} (score {baseline['score']:.4g}) beats the probe {probe[0]}; "
+                      f"skipping the search.")
+                best_score = probe_outcome["score"] if probe_outcome["error"] is None else float("inf")
+                best_cfg = probe[0] if probe_outcome["error"] is None else None
+                return {"best_score": best_score, "best_params": best_cfg, "errors": errors, **stats,
+                        "baseline": baseline, "baseline_won": True, "search_skipped": True}
+
+        best_key, best_score, best_cfg = float("inf"), float("inf"), None
+        for (params, _, _), outcome in strategy.search(candidates, evaluate):
+            if outcome["error"] is None and outcome[strategy.criterion] < best_key:
+                best_key, best_score, best_cfg = outcome[strategy.criterion], outcome["score"], params
+        if errors:
+            print(f"{len(errors)} of {stats['n_fits']} candidate fits failed.")
+        print(f"Search ran {stats['n_fits']} fits ({stats['n_full_fits']} full).")
+        if self.fit_cache is not None:
+            print(f"Fit cache: {self.fit_cache.stats()}")
+        result = {"best_score": best_score, "best_params": best_cfg, "errors": errors, **stats}
+        if baseline is not None:
+            won = not self._beats({"error": None if best_cfg is not None else "no fit", "score": best_score},
+                                  baseline)
+            result.update({"baseline": baseline, "baseline_won": won, "search_skipped": False})
+        return result
+
+    def tune_arima(self, p_values, d_values, q_values, strategy=None):
         """
         Perform hyperparameter tuning for ARIMA.
 
@@ -25,23 +399,18 @@ class HyperparameterTuning:
             p_values (list): List of values for the AR parameter.
             d_values (list): List of values for the differencing parameter.
             q_values (list): List of values for the MA parameter.
+            strategy: Search strategy from src.search_strategies (default GridSearch).
 
         Returns:
             dict: Best parameters and model performance.
         """
-        best_score, best_cfg = float("inf"), None
-        for p, d, q in itertools.product(p_values, d_values, q_values):
-            try:
-                model = ARIMA(self.data, order=(p, d, q)).fit()
-                predictions = model.predict(start=len(self.data), end=len(self.data) + 10)
-                mse = mean_squared_error(self.data[-len(predictions):], predictions)
-                if mse < best_score:
-                    best_score, best_cfg = mse, (p, d, q)
-            except Exception as e:
-                continue
-        return {"best_score": best_score, "best_params": best_cfg}
-
-    def tune_sarima(self, p_values, d_values, q_values, P_values, D_values, Q_values, m):
+        candidates = [
+            ((p, d, q), (p, d, q), None)
+            for p, d, q in itertools.product(p_values, d_values, q_values)
+        ]
+        return self._evaluate_grid(candidates, strategy=strategy)
+
+    def tune_sarima(self, p_values, d_values, q_values, P_values, D_values, Q_values, m, strategy=None):
         """
         Perform hyperparameter tuning for SARIMA.
 
@@ -49,27 +418,20 @@ class HyperparameterTuning:
             p_values, d_values, q_values (list): ARIMA parameters for SARIMA.
             P_values, D_values, Q_values (list): Seasonal ARIMA parameters.
             m (int): Seasonal period.
+            strategy: Search strategy from src.search_strategies (default GridSearch).
 
         Returns:
             dict: Best parameters and model performance.
         """
-        best_score, best_cfg = float("inf"), None
-        for p, d, q, P, D, Q in itertools.product(
-            p_values, d_values, q_values, P_values, D_values, Q_values
-        ):
-            try:
-                model = SARIMAX(
-                    self.data, order=(p, d, q), seasonal_order=(P, D, Q, m)
-                ).fit()
-                predictions = model.predict(start=len(self.data), end=len(self.data) + 10)
-                mse = mean_squared_error(self.data[-len(predictions):], predictions)
-                if mse < best_score:
-                    best_score, best_cfg = mse, (p, d, q, P, D, Q)
-            except Exception as e:
-                continue
-        return {"best_score": best_score, "best_params": best_cfg}
-
-    def tune_sarimax(self, p_values, d_values, q_values, P_values, D_values, Q_values, m):
+        candidates = [
+            ((p, d, q, P, D, Q), (p, d, q), (P, D, Q, m))
+            for p, d, q, P, D, Q in itertools.product(
+                p_values, d_values, q_values, P_values, D_values, Q_values
+            )
+        ]
+        return self._evaluate_grid(candidates, strategy=strategy)
+
+    def tune_sarimax(self, p_values, d_values, q_values, P_values, D_values, Q_values, m, strategy=None):
         """
         Perform hyperparameter tuning for SARIMAX.
 
@@ -77,22 +439,18 @@ class HyperparameterTuning:
             p_values, d_values, q_values (list): ARIMA parameters for SARIMAX.
             P_values, D_values, Q_values (list): Seasonal ARIMA parameters.
             m (int): Seasonal period.
+            strategy: Search strategy from src.search_strategies (default GridSearch).
 
         Returns:
             dict: Best parameters and model performance.
         """
-        best_score, best_cfg = float("inf"), None
-        for p, d, q, P, D, Q in itertools.product(
-            p_values, d_values, q_values, P_values, D_values, Q_values
-        ):
-            try:
-                model = SARIMAX(
-                    self.data, exog=self.exog_train, order=(p, d, q), seasonal_order=(P, D, Q, m)
-                ).fit()
-                predictions = model.predict(start=len(self.data), end=len(self.data) + 10)
-                mse = mean_squared_error(self.data[-len(predictions):], predictions)
-                if mse < best_score:
-                    best_score, best_cfg = mse, (p, d, q, P, D, Q)
-            except Exception as e:
-                continue
-        return {"best_score": best_score, "best_params": best_cfg}
+        candidates = [
+            ((p, d, q, P, D, Q), (p, d, q), (P, D, Q, m))
+            for p, d, q, P, D, Q in itertools.product(
+                p_values, d_values, q_values, P_values, D_values, Q_values
+            )
+        ]
+        if self.exog_train is not None and self.exog_future is None and self.backtester is None:
+            raise ValueError(f"exog_future must hold the exog of the {SCORE_STEPS} forecast steps that score "
+                             f"each candidate, e.g. FeatureBuilder.future(data, {SCORE_STEPS}).")
+        return self._evaluate_grid(candidates, exog=self.exog_train, strategy=strategy)
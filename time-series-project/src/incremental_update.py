@@ -0,0 +1,113 @@
+import json
+import os
+import numpy as np
+from src.lazy_imports import import_lock
+
+
+class IncrementalUpdater:
+    def __init__(self, model_saver, refit_every=30, drift_threshold=3.0):
+        """
+        Initialize the IncrementalUpdater class.
+
+        New observations are appended to a saved model and run through the
+        Kalman filter with the existing parameters. Parameters are only
+        re-estimated every `refit_every` observations, or sooner when the
+        new observations drift away from what the model expected.
+
+        Args:
+            model_saver (ModelSaver): Where the fitted results are stored.
+            refit_every (int): Number of appended observations between full refits.
+            drift_threshold (float): Mean absolute standardized one-step-ahead
+                forecast error of the new observations that triggers a refit.
+        """
+        self.model_saver = model_saver
+        self.refit_every = refit_every
+        self.drift_threshold = drift_threshold
+
+    def _state_file(self, model_name):
+        return os.path.join(self.model_saver.save_dir, f"{model_name}.state.json")
+
+    def _load_state(self, model_name):
+        state_file = self._state_file(model_name)
+        if os.path.exists(state_file):
+            with open(state_file) as f:
+                return json.load(f)
+        return {"since_refit": 0}
+
+    def _save_state(self, model_name, state):
+        with open(self._state_file(model_name), "w") as f:
+            json.dump(state, f)
+
+    def update(self, model_name, new_observations, new_exog=None, save_as=None):
+        """
+        Append new observations to a saved model and save it back.
+
+        Args:
+            model_name (str): Name the model was saved under.
+            new_observations (pd.Series): Observations following the model's
+                last training point, indexed to continue its date index.
+            new_exog (pd.DataFrame): Exogenous variables for the new observations.
+            save_as (str): Name to save the updated model under instead of
+                `model_name`, e.g. to keep the trained model unchanged.
+
+        Returns:
+            dict: The updated model, whether it was refitted, and the drift score.
+        """
+        return self._append(model_name, self.model_saver.load_model(model_name), new_observations, new_exog,
+                            save_as)
+
+    def _append(self, model_name, results, new_observations, new_exog=None, save_as=None):
+        save_as = save_as or model_name
+        # The refit counter follows the saved model, so it starts over when a trained model is first updated
+        state = self._load_state(save_as)
+
+        updated = results.append(new_observations, exog=new_exog, refit=False)
+        errors = updated.standardized_forecasts_error[0, -len(new_observations):]
+        drift = float(np.nanmean(np.abs(errors)))
+        state["since_refit"] += len(new_observations)
+
+        refit = state["since_refit"] >= self.refit_every or drift > self.drift_threshold
+        if refit:
+            print(f"Refitting {model_name} (drift {drift:.2f}, "
+                  f"{state['since_refit']} observations since last refit).")
+            with import_lock:
+                from statsmodels.tsa.arima.model import ARIMA
+            # Start the optimizer from the current estimates
+            fit_kwargs = {"start_params": results.params}
+            if not isinstance(results.model, ARIMA):
+                fit_kwargs["disp"] = False
+            updated = results.append(new_observations, exog=new_exog, refit=True, fit_kwargs=fit_kwargs)
+            state["since_refit"] = 0
+        else:
+            print(f"Appended {len(new_observations)} observations to {model_name} (drift {drift:.2f}).")
+
+        self.model_saver.save_model(updated, save_as)
+        self._save_state(save_as, state)
+        return {"model": updated, "refit": refit, "drift": drift}
+
+    def catch_up(self, model_name, series, exog=None, save_as=None):
+        """
+        Append the observations of `series` dated after a saved model's last one.
+
+        Args:
+            model_name (str): Name the model was saved under.
+            series (pd.Series): The full, current series the model was trained on a prefix of.
+            exog (pd.DataFrame): Exogenous variables aligned with `series`, for models fitted with exog.
+            save_as (str): Name to save the updated model under (see update()).
+
+        Returns:
+            dict: As update(), or None when the series has nothing new.
+        """
+        results = self.model_saver.load_model(model_name)
+        new_observations = series[series.index > results.model._index[-1]]
+        if new_observations.empty:
+            print(f"{model_name} is up to date.")
+            return None
+        new_exog = exog.loc[new_observations.index] if exog is not None else None
+        return self._append(model_name, results, new_observations, new_exog, save_as)
+
+    def discard(self, model_name):
+        """Delete an updated model and its refit counter, e.g. once the model is retrained."""
+        self.model_saver.delete_model(model_name)
+        if os.path.exists(self._state_file(model_name)):
+            os.remove(self._state_file(model_name))
@@ -0,0 +1,178 @@
+import cProfile
+import functools
+import io
+import json
+import logging
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+logger = logging.getLogger("TimeSeriesPipeline")
+metrics_logger = logging.getLogger("TimeSeriesPipeline.metrics")
+# Metrics are JSON lines in their own file, not mixed into the text log
+metrics_logger.propagate = False
+# Traced-memory peak of every open span (and tracemalloc profile), as [peak] lists
+_open_peaks = []
+_peak_lock = threading.Lock()
+
+
+def enable_metrics(metrics_file):
+    """
+    Write structured metrics as JSON lines to `metrics_file`.
+
+    Until this is called spans are still timed but nothing is emitted, so
+    instrumented code costs little more than a perf_counter call.
+
+    Args:
+        metrics_file (str): Path of the JSON-lines file; appended to.
+    """
+    os.makedirs(os.path.dirname(metrics_file) or ".", exist_ok=True)
+    for handler in list(metrics_logger.handlers):
+        metrics_logger.removeHandler(handler)
+        handler.close()
+    handler = logging.FileHandler(metrics_file)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    metrics_logger.addHandler(handler)
+    metrics_logger.setLevel(logging.INFO)
+
+
+def metrics_enabled():
+    return bool(metrics_logger.handlers)
+
+
+def record(event, **fields):
+    """
+    Emit one structured metric.
+
+    Args:
+        event (str): Metric name, e.g. 'tune.fit'.
+        **fields: JSON-serialisable values (others are converted with str()).
+    """
+    if not metrics_enabled():
+        return
+    payload = {"ts": round(time.time(), 3), "event": event, "pid": os.getpid(), **fields}
+    metrics_logger.info(json.dumps(payload, default=str))
+
+
+def _track_peak(entry=None):
+    """
+    Fold the traced peak so far into every open span, then reset it.
+
+    tracemalloc keeps one peak per process, so each span resets it when it
+    starts and the peaks reached until then are carried over to the spans
+    still open, whatever their nesting or thread. Starts tracking `entry`
+    if given.
+    """
+    with _peak_lock:
+        peak = tracemalloc.get_traced_memory()[1]
+        for open_peak in _open_peaks:
+            open_peak[0] = max(open_peak[0], peak)
+        tracemalloc.reset_peak()
+        if entry is not None:
+            _open_peaks.append(entry)
+
+
+def _untrack_peak(entry):
+    """Stop tracking `entry` and return the highest traced memory seen while it was open."""
+    _track_peak()
+    with _peak_lock:
+        _open_peaks.remove(entry)
+    return entry[0]
+
+
+@contextmanager
+def span(name, **attrs):
+    """
+    Time a block and emit it as a 'span' metric.
+
+    Yields a dict the block can add fields to (e.g. a row count). The span
+    records its duration, whether it raised, and the traced memory peak
+    while tracemalloc is running (see profiled()).
+
+    Args:
+        name (str): Span name, e.g. 'etl.transform'.
+        **attrs: Fields recorded with the span.
+    """
+    fields = dict(attrs)
+    tracing = tracemalloc.is_tracing()
+    if tracing:
+        peak = [0]
+        _track_peak(peak)
+    start = time.perf_counter()
+    status = "ok"
+    try:
+        yield fields
+    except BaseException as e:
+        status = f"error: {type(e).__name__}"
+        raise
+    finally:
+        fields["duration_s"] = round(time.perf_counter() - start, 6)
+        if tracing:
+            fields["peak_traced_mb"] = round(_untrack_peak(peak) / 1024 ** 2, 3)
+        record("span", name=name, status=status, **fields)
+
+
+def timed(name):
+    """Decorator form of span() for methods and functions."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def profiled(mode=None, output_dir="../logs/profiles", top=25):
+    """
+    Optionally profile a block with cProfile or tracemalloc.
+
+    Args:
+        mode (str): 'cprofile', 'tracemalloc' or None (no profiling).
+        output_dir (str): Where the profile (.prof) or allocation report is
+            written; by default next to the logs from setup_logging().
+        top (int): Number of functions or allocation sites logged.
+    """
+    if mode is None:
+        yield
+        return
+    if mode not in ("cprofile", "tracemalloc"):
+        raise ValueError(f"Unknown profiling mode '{mode}', expected 'cprofile' or 'tracemalloc'.")
+    os.makedirs(output_dir, exist_ok=True)
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+
+    if mode == "cprofile":
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            output_file = os.path.join(output_dir, f"profile-{stamp}.prof")
+            profiler.dump_stats(output_file)
+            summary = io.StringIO()
+            pstats.Stats(profiler, stream=summary).sort_stats("cumulative").print_stats(top)
+            logger.info(f"cProfile written to {output_file}; top {top} by cumulative time:\n{summary.getvalue()}")
+        return
+
+    tracemalloc.start()
+    peak = [0]
+    _track_peak(peak)
+    try:
+        yield
+    finally:
+        snapshot = tracemalloc.take_snapshot()
+        peak = _untrack_peak(peak)
+        tracemalloc.stop()
+        stats = snapshot.statistics("lineno")[:top]
+        output_file = os.path.join(output_dir, f"allocations-{stamp}.txt")
+        with open(output_file, "w") as f:
+            f.write(f"Peak traced memory: {peak / 1024 ** 2:.1f} MB\n")
+            f.writelines(f"{stat}\n" for stat in stats)
+        record("tracemalloc", peak_mb=round(peak / 1024 ** 2, 3),
+               top=[{"site": str(stat.traceback), "mb": round(stat.size / 1024 ** 2, 3)} for stat in stats[:10]])
+        logger.info(f"Peak traced memory {peak / 1024 ** 2:.1f} MB; allocation report written to {output_file}")
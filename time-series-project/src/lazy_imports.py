@@ -0,0 +1,11 @@
+import threading
+
+# statsmodels, sklearn, scipy.stats and matplotlib are imported on first use so
+# entry points start quickly. Pipeline stages, background jobs and batch
+# forecasts run in threads, and two threads importing these packages for the
+# first time at once can trip the import system's deadlock detection (they
+# share dependencies with circular imports), so every such import holds this lock:
+#
+#     with import_lock:
+#         from statsmodels.tsa.arima.model import ARIMA
+import_lock = threading.RLock()
@@ -0,0 +1,89 @@
+import hashlib
+import io
+import os
+import shutil
+from datetime import datetime, timezone
+
+
+class DirectoryS3Client:
+    def __init__(self, root):
+        """
+        Local stand-in for the subset of the boto3 S3 client the pipeline uses.
+
+        Buckets are sub-directories of `root` and keys are relative paths,
+        so the ETL can be exercised without AWS credentials or network access.
+
+        Args:
+            root (str): Directory holding one sub-directory per bucket.
+        """
+        self.root = root
+
+    def _path(self, bucket, key):
+        return os.path.join(self.root, bucket, *key.split("/"))
+
+    def _stat(self, bucket, key):
+        path = self._path(bucket, key)
+        if not os.path.isfile(path):
+            raise FileNotFoundError(f"s3://{bucket}/{key} does not exist.")
+        with open(path, "rb") as f:
+            etag = hashlib.md5(f.read()).hexdigest()
+        return path, {
+            "ETag": f'"{etag}"',
+            "ContentLength": os.path.getsize(path),
+            "LastModified": datetime.fromtimestamp(os.path.getmtime(path), tz=timezone.utc),
+        }
+
+    def head_object(self, Bucket, Key):
+        return self._stat(Bucket, Key)[1]
+
+    def get_object(self, Bucket, Key, Range=None):
+        path, meta = self._stat(Bucket, Key)
+        with open(path, "rb") as f:
+            if Range is None:
+                body = f.read()
+            else:
+                first, last = Range.replace("bytes=", "").split("-")
+                f.seek(int(first))
+                body = f.read(int(last) - int(first) + 1 if last else -1)
+        return {**meta, "ContentLength": len(body), "Body": io.BytesIO(body)}
+
+    def download_file(self, Bucket, Key, Filename):
+        path, _ = self._stat(Bucket, Key)
+        os.makedirs(os.path.dirname(Filename) or ".", exist_ok=True)
+        shutil.copyfile(path, Filename)
+
+    def upload_file(self, Filename, Bucket, Key):
+        path = self._path(Bucket, Key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        shutil.copyfile(Filename, path)
+
+    def put_object(self, Bucket, Key, Body):
+        path = self._path(Bucket, Key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(Body.encode() if isinstance(Body, str) else Body)
+        return {"ETag": self.head_object(Bucket, Key)["ETag"]}
+
+    def list_objects_v2(self, Bucket, Prefix="", ContinuationToken=None, MaxKeys=1000):
+        bucket_dir = os.path.join(self.root, Bucket)
+        keys = []
+        for dirpath, _, filenames in os.walk(bucket_dir):
+            for name in filenames:
+                key = os.path.relpath(os.path.join(dirpath, name), bucket_dir).replace(os.sep, "/")
+                if key.startswith(Prefix):
+                    keys.append(key)
+        keys.sort()
+        start = int(ContinuationToken) if ContinuationToken else 0
+        page = keys[start:start + MaxKeys]
+        response = {
+            "Contents": [
+                {"Key": key, "Size": os.path.getsize(self._path(Bucket, key)),
+                 "ETag": self.head_object(Bucket, key)["ETag"]}
+                for key in page
+            ],
+            "KeyCount": len(page),
+            "IsTruncated": start + MaxKeys < len(keys),
+        }
+        if response["IsTruncated"]:
+            response["NextContinuationToken"] = str(start + MaxKeys)
+        return response
@@ -1,6 +1,15 @@
 import logging
 import os
-def setup_logging(log_file="app.log"):
+from src.instrumentation import enable_metrics
+
+def setup_logging(log_file="app.log", metrics_file=None):
+    """
+    Configure text logging, and optionally JSON-lines metrics, under ../logs.
+
+    Args:
+        log_file (str): Name of the text log file.
+        metrics_file (str): Name of the metrics file, or None to emit no metrics.
+    """
     try:
         log_dir = "../logs"
         if not os.path.exists(log_dir):
@@ -16,6 +25,8 @@ def setup_logging(log_file="app.log"):
                 logging.StreamHandler()
             ]
         )
+        if metrics_file is not None:
+            enable_metrics(os.path.join(log_dir, metrics_file))
         logging.info("Logging setup complete.")
     except Exception as e:
         print(f"Logging setup failed: {e}")
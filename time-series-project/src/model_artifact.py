@@ -0,0 +1,181 @@
+import io
+import json
+import os
+import pickle
+import time
+import numpy as np
+import pandas as pd
+from statsmodels.tsa.arima.model import ARIMA
+from statsmodels.tsa.statespace.sarimax import SARIMAX
+
+SCHEMA_VERSION = 1
+MODEL_CLASSES = {"ARIMA": ARIMA, "SARIMAX": SARIMAX}
+
+
+def to_artifact(results, tail_length=None):
+    """
+    Reduce fitted ARIMA/SARIMAX results to what is needed to forecast.
+
+    Keeps the model specification, the parameter vector, the last
+    `tail_length` observations and the predicted state (mean and
+    covariance) at the start of that tail. Filtering the tail from that
+    state reproduces the original filter exactly, so forecasts match.
+
+    Args:
+        results: Fitted statsmodels ARIMA or SARIMAX results.
+        tail_length (int): Observations to keep (default: number of states).
+
+    Returns:
+        tuple: (header dict, dict of numpy arrays).
+    """
+    model = results.model
+    model_class = type(model).__name__
+    if model_class not in MODEL_CLASSES:
+        raise ValueError(f"Compact artifacts support ARIMA and SARIMAX results, not {model_class}.")
+    nobs = int(results.nobs)
+    tail = min(nobs, tail_length or model.k_states)
+    start = nobs - tail
+
+    init_kwds = model._get_init_kwds()
+    if "trend_offset" in init_kwds:
+        init_kwds["trend_offset"] = int(init_kwds["trend_offset"]) + start
+    exog, exog_names = model.exog, model.exog_names
+    if model_class == "ARIMA" and exog is not None:
+        # ARIMA puts its trend columns in front of exog and rebuilds them from
+        # init_kwds (trend, trend_offset), so only the user's exog is kept
+        exog, exog_names = exog[:, model.k_trend:], exog_names[model.k_trend:]
+        if not exog_names:
+            exog, exog_names = None, None
+    index = model._index
+    header = {
+        "schema_version": SCHEMA_VERSION,
+        "model_class": model_class,
+        "init_kwds": init_kwds,
+        "param_names": list(model.param_names),
+        "endog_name": model.endog_names,
+        "exog_names": list(exog_names) if exog_names else None,
+        "nobs": nobs,
+        "index": (
+            {"type": "datetime", "start": str(index[start]), "freq": index.freqstr}
+            if isinstance(index, pd.DatetimeIndex) and index.freq is not None
+            else {"type": "range", "start": start}
+        ),
+    }
+    arrays = {
+        "params": np.asarray(results.params, dtype=float),
+        "endog": np.asarray(model.endog, dtype=float)[start:, 0],
+        "state": np.asarray(results.predicted_state[:, start]),
+        "state_cov": np.asarray(results.predicted_state_cov[:, :, start]),
+    }
+    if exog is not None:
+        arrays["exog"] = np.asarray(exog, dtype=float)[start:]
+    return header, arrays
+
+
+def from_artifact(header, arrays):
+    """
+    Rebuild forecast-ready results from an artifact.
+
+    Returns:
+        Filtered statsmodels results covering the stored tail.
+    """
+    if header["schema_version"] > SCHEMA_VERSION:
+        raise ValueError(f"Artifact schema {header['schema_version']} is newer than supported ({SCHEMA_VERSION}).")
+    kwds = dict(header["init_kwds"])
+    for key in ("order", "seasonal_order"):
+        if key in kwds:
+            kwds[key] = tuple(kwds[key])
+
+    n_tail = len(arrays["endog"])
+    if header["index"]["type"] == "datetime":
+        index = pd.date_range(header["index"]["start"], periods=n_tail, freq=header["index"]["freq"])
+    else:
+        start = header["index"]["start"]
+        index = pd.RangeIndex(start, start + n_tail)
+    endog = pd.Series(arrays["endog"], index=index, name=header["endog_name"])
+    exog = None
+    if "exog" in arrays:
+        exog = pd.DataFrame(arrays["exog"], index=index, columns=header["exog_names"])
+
+    model_class = MODEL_CLASSES[header["model_class"]]
+    # The fitted model already passed the constant-column check, which a
+    # short tail of exog (e.g. one row) would fail spuriously
+    kwds["validate_specification"] = False
+    model = model_class(endog, exog=exog, **kwds)
+    if model_class is ARIMA:
+        # ARIMA builds in-sample trend columns from trend_offset but extends
+        # them for forecasts from the base class attribute, which it leaves at 1
+        model.trend_offset = kwds["trend_offset"]
+    model.ssm.initialize_known(arrays["state"], arrays["state_cov"])
+    return model.filter(arrays["params"])
+
+
+def save_artifact(results, path, compress=True, tail_length=None):
+    """
+    Write results as a compact .npz artifact (no pickled objects).
+
+    Args:
+        results: Fitted statsmodels ARIMA or SARIMAX results.
+        path (str): Destination file.
+        compress (bool): Use zlib compression.
+        tail_length (int): Observations to keep (default: number of states).
+    """
+    header, arrays = to_artifact(results, tail_length)
+    header_bytes = np.frombuffer(json.dumps(header).encode(), dtype=np.uint8)
+    writer = np.savez_compressed if compress else np.savez
+    buffer = io.BytesIO()
+    writer(buffer, header=header_bytes, **arrays)
+    with open(path, "wb") as f:
+        f.write(buffer.getvalue())
+
+
+def load_artifact(path):
+    """Read a compact artifact and rebuild forecast-ready results."""
+    with np.load(path, allow_pickle=False) as npz:
+        header = json.loads(npz["header"].tobytes().decode())
+        arrays = {name: npz[name] for name in npz.files if name != "header"}
+    return from_artifact(header, arrays)
+
+
+def compare_with_pickle(results, workdir, steps=30, repeats=5):
+    """
+    Compare size, load latency and forecasts of a pickle and a compact artifact.
+
+    Args:
+        results: Fitted statsmodels ARIMA or SARIMAX results.
+        workdir (str): Directory for the temporary files.
+        steps (int): Forecast length used to check both copies agree.
+        repeats (int): Number of loads averaged for the latency.
+
+    Returns:
+        dict: File sizes in bytes, mean load seconds and the largest forecast difference.
+    """
+    os.makedirs(workdir, exist_ok=True)
+    pickle_file = os.path.join(workdir, "compare.pkl")
+    artifact_file = os.path.join(workdir, "compare.npz")
+    with open(pickle_file, "wb") as f:
+        pickle.dump(results, f)
+    save_artifact(results, artifact_file)
+
+    def timed(load):
+        start = time.perf_counter()
+        for _ in range(repeats):
+            loaded = load()
+        return loaded, (time.perf_counter() - start) / repeats
+
+    def load_pickle():
+        with open(pickle_file, "rb") as f:
+            return pickle.load(f)
+
+    from_pickle, pickle_seconds = timed(load_pickle)
+    from_compact, compact_seconds = timed(lambda: load_artifact(artifact_file))
+    difference = np.max(np.abs(
+        np.asarray(from_pickle.forecast(steps)) - np.asarray(from_compact.forecast(steps))
+    ))
+    return {
+        "pickle_bytes": os.path.getsize(pickle_file),
+        "compact_bytes": os.path.getsize(artifact_file),
+        "pickle_load_seconds": pickle_seconds,
+        "compact_load_seconds": compact_seconds,
+        "max_forecast_difference": float(difference),
+    }
@@ -1,5 +1,6 @@
 import os
 import pickle
+from src.instrumentation import span
 
 class ModelSaver:
     def __init__(self, save_dir="time-series-project/models"):
@@ -12,33 +13,97 @@ class ModelSaver:
         self.save_dir = save_dir
         os.makedirs(self.save_dir, exist_ok=True)
     
-    def save_model(self, model, model_name):
+    def model_path(self, model_name, compact=False):
+        """
+        Return the file path used for a model name.
+        
+        Args:
+            model_name (str): Name of the model (used as the filename).
+            compact (bool): Path of the compact artifact instead of the pickle.
+        """
+        extension = "npz" if compact else "pkl"
+        return os.path.join(self.save_dir, f"{model_name}.{extension}")
+
+    def save_model(self, model, model_name, compact=False):
         """
         Save the model to a file.
         
         Args:
             model: The trained model object to save.
             model_name (str): Name of the model (used as the filename).
+            compact (bool): Save fitted ARIMA/SARIMAX results as a compact
+                artifact (spec, parameters and final state only) instead of
+                pickling the whole results object.
         """
-        model_file = os.path.join(self.save_dir, f"{model_name}.pkl")
-        with open(model_file, 'wb') as f:
-            pickle.dump(model, f)
+        model_file = self.model_path(model_name, compact=compact)
+        with span("model.save", model=model_name, compact=compact) as fields:
+            if compact:
+                from src.model_artifact import save_artifact
+                save_artifact(model, model_file)
+            else:
+                with open(model_file, 'wb') as f:
+                    pickle.dump(model, f)
+            fields["bytes"] = os.path.getsize(model_file)
         print(f"Model saved: {model_file}")
     
     def load_model(self, model_name):
         """
         Load a saved model from a file.
         
+        If both a pickle and a compact artifact exist, the newer one is loaded.
+        
         Args:
             model_name (str): Name of the model (used as the filename).
         
         Returns:
             The loaded model object.
         """
-        model_file = os.path.join(self.save_dir, f"{model_name}.pkl")
-        if not os.path.exists(model_file):
-            raise FileNotFoundError(f"Model file {model_file} not found.")
-        with open(model_file, 'rb') as f:
-            model = pickle.load(f)
+        candidates = [
+            path for path in (self.model_path(model_name), self.model_path(model_name, compact=True))
+            if os.path.exists(path)
+        ]
+        if not candidates:
+            raise FileNotFoundError(f"Model file {self.model_path(model_name)} not found.")
+        model_file = max(candidates, key=os.path.getmtime)
+        with span("model.load", model=model_name, compact=model_file.endswith(".npz"),
+                  bytes=os.path.getsize(model_file)):
+            if model_file.endswith(".npz"):
+                from src.model_artifact import load_artifact
+                model = load_artifact(model_file)
+            else:
+                with open(model_file, 'rb') as f:
+                    model = pickle.load(f)
         print(f"Model loaded: {model_file}")
         return model
+
+    def delete_model(self, model_name):
+        """
+        Delete a saved model file if it exists.
+        
+        Args:
+            model_name (str): Name of the model (used as the filename).
+        """
+        for model_file in (self.model_path(model_name), self.model_path(model_name, compact=True)):
+            if os.path.exists(model_file):
+                os.remove(model_file)
+                print(f"Model deleted: {model_file}")
+
+
+def latest_model_name(model_saver, model_name):
+    """
+    Name of the newest saved model of a branch: its tuned model, the
+    baseline that beat it (see the train stage in main.py) or the tuned
+    model with newer data appended (see `main.py update`), or None if none
+    is saved.
+
+    Args:
+        model_saver (ModelSaver): Where the models are saved.
+        model_name (str): The branch, e.g. 'SARIMA'.
+    """
+    saved = {}
+    for name in (f"{model_name}_Tuned", f"{model_name}_Baseline", f"{model_name}_Updated"):
+        for compact in (False, True):
+            path = model_saver.model_path(name, compact=compact)
+            if os.path.exists(path):
+                saved[name] = max(saved.get(name, 0.0), os.path.getmtime(path))
+    return max(saved, key=saved.get) if saved else None
@@ -0,0 +1,231 @@
+import hashlib
+import json
+import logging
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from src.model_saving import ModelSaver
+from src.instrumentation import record
+
+logger = logging.getLogger("TimeSeriesPipeline")
+
+
+def hash_path(path, memo=None):
+    """
+    Content hash of a file or directory (e.g. a parquet dataset), or None if missing.
+
+    Args:
+        path (str): File or directory to hash.
+        memo (dict): path -> [mtime_ns, size, hash] from an earlier run. A
+            file whose modification time and size are unchanged is not re-read.
+    """
+    if not os.path.exists(path):
+        return None
+    if os.path.isdir(path):
+        digest = hashlib.sha256()
+        for dirpath, dirnames, filenames in os.walk(path):
+            dirnames.sort()
+            for name in sorted(filenames):
+                file_path = os.path.join(dirpath, name)
+                digest.update(os.path.relpath(file_path, path).encode())
+                digest.update(hash_path(file_path, memo).encode())
+        return digest.hexdigest()
+    stat = os.stat(path)
+    if memo is not None and memo.get(path, [None, None])[:2] == [stat.st_mtime_ns, stat.st_size]:
+        return memo[path][2]
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 ** 2), b""):
+            digest.update(block)
+    if memo is not None:
+        memo[path] = [stat.st_mtime_ns, stat.st_size, digest.hexdigest()]
+    return digest.hexdigest()
+
+
+class Stage:
+    def __init__(self, name, func, deps=(), inputs=(), outputs=(), params=None, fingerprint=None):
+        """
+        One step of a Pipeline.
+
+        Args:
+            name (str): Unique stage name.
+            func (callable): Called with the values of `deps`, in order; its
+                return value is handed to dependent stages.
+            deps (tuple): Names of the stages this one consumes.
+            inputs (tuple): Files read by the stage that no upstream stage produces.
+            outputs (tuple): Files written by the stage. They are hashed into
+                the stage's result, so edits or deletions force a rerun.
+            params (dict): Settings that change the result (orders, grids, ...).
+            fingerprint (callable): Optional zero-argument function returning
+                extra state to key on, e.g. the ETag of a remote object.
+        """
+        self.name = name
+        self.func = func
+        self.deps = tuple(deps)
+        self.inputs = tuple(inputs)
+        self.outputs = tuple(outputs)
+        self.params = params or {}
+        self.fingerprint = fingerprint
+
+
+class Pipeline:
+    def __init__(self, state_dir="time-series-project/models/pipeline", max_workers=4):
+        """
+        Run stages as a DAG, skipping those whose inputs have not changed.
+
+        A stage's key hashes its name, params, input files and the results of
+        the stages it depends on. Each finished stage's value is saved
+        through ModelSaver and recorded in a manifest with its key, so a
+        later run (or a rerun after a failure) reloads unchanged stages
+        instead of recomputing them. Independent stages run concurrently in
+        threads; a failed stage only blocks the stages downstream of it.
+
+        Args:
+            state_dir (str): Directory holding the manifest and stage values.
+            max_workers (int): Stages run at the same time.
+        """
+        self.state_dir = state_dir
+        self.saver = ModelSaver(save_dir=state_dir)
+        self.manifest_file = os.path.join(state_dir, "manifest.json")
+        self.max_workers = max_workers
+        self.stages = {}
+        self.values = {}
+        self.manifest = {"stages": {}, "files": {}}
+        if os.path.exists(self.manifest_file):
+            with open(self.manifest_file) as f:
+                self.manifest = json.load(f)
+
+    def add(self, name, func, deps=(), inputs=(), outputs=(), params=None, fingerprint=None):
+        """Register a stage (see Stage); dependencies must be added first."""
+        if name in self.stages:
+            raise ValueError(f"Stage '{name}' is already defined.")
+        missing = [dep for dep in deps if dep not in self.stages]
+        if missing:
+            raise ValueError(f"Stage '{name}' depends on unknown stage(s) {missing}.")
+        self.stages[name] = Stage(name, func, deps, inputs, outputs, params, fingerprint)
+        return name
+
+    def _key(self, stage):
+        payload = {
+            "name": stage.name,
+            "params": stage.params,
+            "inputs": {path: hash_path(path, self.manifest["files"]) for path in stage.inputs},
+            "deps": [self.manifest["stages"][dep]["result"] for dep in stage.deps],
+            "fingerprint": stage.fingerprint() if stage.fingerprint is not None else None,
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+    def _result_hash(self, stage):
+        """Hash of the saved value and the output files, which downstream keys build on."""
+        digest = hashlib.sha256(hash_path(self.saver.model_path(stage.name), self.manifest["files"]).encode())
+        for path in stage.outputs:
+            digest.update(str(hash_path(path, self.manifest["files"])).encode())
+        return digest.hexdigest()
+
+    def _is_current(self, stage, key):
+        record = self.manifest["stages"].get(stage.name)
+        return (
+            record is not None
+            and record["status"] == "done"
+            and record["key"] == key
+            and os.path.exists(self.saver.model_path(stage.name))
+            and self._result_hash(stage) == record["result"]
+        )
+
+    def _write_manifest(self):
+        tmp_file = f"{self.manifest_file}.tmp"
+        with open(tmp_file, "w") as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(tmp_file, self.manifest_file)
+
+    def value(self, name):
+        """Value of a finished stage from this run, loading it from disk if it was skipped."""
+        if name not in self.values:
+            self.values[name] = self.saver.load_model(name)
+        return self.values[name]
+
+    def upstream(self, targets):
+        """Names of the target stages and every stage they depend on."""
+        needed, pending = set(), list(targets)
+        while pending:
+            name = pending.pop()
+            if name not in self.stages:
+                raise ValueError(f"Unknown stage '{name}'.")
+            if name not in needed:
+                needed.add(name)
+                pending.extend(self.stages[name].deps)
+        return needed
+
+    def run(self, force=(), targets=None):
+        """
+        Run every stage whose key changed since the last successful run.
+
+        Args:
+            force (tuple): Stage names to rerun even if unchanged.
+            targets (list): Only run these stages and their upstream stages.
+                None (default) runs the whole DAG.
+
+        Returns:
+            dict: Stage name -> 'skipped', 'done', 'failed' or 'blocked'.
+        """
+        stages = list(self.stages.values())
+        if targets is not None:
+            needed = self.upstream(targets)
+            stages = [stage for stage in stages if stage.name in needed]
+        status = {}
+        running = {}
+        started = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while len(status) < len(stages):
+                for stage in stages:
+                    if stage.name in status or stage.name in running.values():
+                        continue
+                    dep_status = [status.get(dep) for dep in stage.deps]
+                    if any(s in ("failed", "blocked") for s in dep_status):
+                        status[stage.name] = "blocked"
+                        logger.warning(f"Stage {stage.name} blocked by a failed upstream stage.")
+                        continue
+                    if not all(s in ("skipped", "done") for s in dep_status):
+                        continue
+                    try:
+                        key = self._key(stage)
+                    except Exception as e:
+                        status[stage.name] = "failed"
+                        logger.error(f"Stage {stage.name} failed to hash its inputs: {e}", exc_info=True)
+                        continue
+                    if stage.name not in force and self._is_current(stage, key):
+                        status[stage.name] = "skipped"
+                        record("pipeline.stage", name=stage.name, status="skipped")
+                        logger.info(f"Stage {stage.name} skipped (inputs unchanged).")
+                        continue
+                    logger.info(f"Stage {stage.name} started.")
+                    args = [self.value(dep) for dep in stage.deps]
+                    future = executor.submit(stage.func, *args)
+                    running[future] = stage.name
+                    started[stage.name] = (key, time.perf_counter())
+
+                if not running:
+                    continue
+                finished, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    key, start = started[name]
+                    seconds = time.perf_counter() - start
+                    try:
+                        self.values[name] = future.result()
+                        self.saver.save_model(self.values[name], name)
+                    except Exception as e:
+                        status[name] = "failed"
+                        self.manifest["stages"][name] = {"key": key, "status": "failed", "result": None,
+                                                         "error": f"{type(e).__name__}: {e}"}
+                        logger.error(f"Stage {name} failed after {seconds:.1f}s: {e}", exc_info=True)
+                    else:
+                        status[name] = "done"
+                        self.manifest["stages"][name] = {"key": key, "status": "done",
+                                                         "result": self._result_hash(self.stages[name]),
+                                                         "seconds": round(seconds, 3)}
+                        logger.info(f"Stage {name} completed in {seconds:.1f}s.")
+                    record("pipeline.stage", name=name, status=status[name], duration_s=round(seconds, 6))
+                    self._write_manifest()
+        logger.info(f"Pipeline finished: {status}")
+        return status
@@ -0,0 +1,104 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from src.lazy_imports import import_lock
+
+
+def render_decomposition(observed, components, output_file):
+    """
+    Plot a decomposition to an image file.
+
+    matplotlib is imported here, with the non-interactive Agg backend, so
+    the numeric pipeline never pays for it. Kept at module level so it can
+    be pickled and sent to worker processes.
+
+    Args:
+        observed (pd.Series): The decomposed series.
+        components (dict): Trend, seasonal and residual series from
+            ETSDecomposition.decompose().
+        output_file (str): Path of the image to write.
+
+    Returns:
+        str: The path that was written.
+    """
+    with import_lock:
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+
+    panels = [("Observed", observed), ("Trend", components["trend"]),
+              ("Seasonal", components["seasonal"]), ("Residual", components["residual"])]
+    fig, axes = plt.subplots(len(panels), 1, sharex=True, figsize=(10, 8))
+    for ax, (title, series) in zip(axes, panels):
+        if title == "Residual":
+            ax.plot(series, marker="o", linestyle="none", markersize=2)
+            ax.axhline(0, color="black", linewidth=0.5)
+        else:
+            ax.plot(series)
+        ax.set_ylabel(title)
+    fig.tight_layout()
+    os.makedirs(os.path.dirname(output_file) or ".", exist_ok=True)
+    fig.savefig(output_file)
+    plt.close(fig)
+    return output_file
+
+
+class DecompositionReporter:
+    def __init__(self, output_dir="time-series-project/picture", max_workers=1):
+        """
+        Render decomposition plots in background worker processes.
+
+        Args:
+            output_dir (str): Directory the images are written to.
+            max_workers (int): Number of rendering processes.
+        """
+        self.output_dir = output_dir
+        self.max_workers = max_workers
+        self.executor = None
+        self.futures = []
+
+    def submit(self, name, observed, components):
+        """
+        Queue one decomposition for rendering and return immediately.
+
+        Args:
+            name (str): Used as the image file name.
+            observed (pd.Series or pd.DataFrame): The decomposed series. For a
+                wide frame, one image is queued per column.
+            components (dict): Output of ETSDecomposition.decompose().
+
+        Returns:
+            list: Futures resolving to the written file paths.
+        """
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        if getattr(observed, "ndim", 1) == 1:
+            jobs = [(observed, components, os.path.join(self.output_dir, f"{name}.png"))]
+        else:
+            jobs = [
+                (observed[col], {k: v[col] for k, v in components.items()},
+                 os.path.join(self.output_dir, f"{name}_{col}.png"))
+                for col in observed.columns
+            ]
+        futures = [self.executor.submit(render_decomposition, *job) for job in jobs]
+        self.futures.extend(futures)
+        return futures
+
+    def wait(self):
+        """
+        Wait for every queued plot and shut the workers down.
+
+        Returns:
+            list: Paths of the written images. Failed plots are reported and skipped.
+        """
+        written = []
+        for future in self.futures:
+            try:
+                written.append(future.result())
+            except Exception as e:
+                print(f"Rendering a decomposition plot failed: {e}")
+        self.futures = []
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+        print(f"Rendered {len(written)} decomposition plot(s).")
+        return written
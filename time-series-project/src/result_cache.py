@@ -0,0 +1,144 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import numpy as np
+import pandas as pd
+import statsmodels
+from src.fit_cache import data_fingerprint
+from src.model_saving import ModelSaver
+
+logger = logging.getLogger("TimeSeriesPipeline")
+
+
+class ResultCache:
+    def __init__(self, cache_dir="time-series-project/models/cache", max_entries=256, max_bytes=512 * 1024 ** 2):
+        """
+        On-disk, content-addressed cache of tuning results and fitted models.
+
+        Entries are stored through ModelSaver under their key and evicted in
+        least-recently-used order once either limit is exceeded.
+
+        Args:
+            cache_dir (str): Directory holding cached entries and the index.
+            max_entries (int): Maximum number of cached entries.
+            max_bytes (int): Maximum total size of cached entries on disk.
+        """
+        self.saver = ModelSaver(save_dir=cache_dir)
+        self.index_file = os.path.join(cache_dir, "index.json")
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.index = {}
+        # get/put may be called from several pipeline stages at once
+        self.lock = threading.RLock()
+        if os.path.exists(self.index_file):
+            with open(self.index_file) as f:
+                self.index = json.load(f)
+
+    @staticmethod
+    def make_key(kind, data, exog=None, **spec):
+        """
+        Build a cache key from the input data and the model specification.
+
+        Args:
+            kind (str): What is cached, e.g. 'tune_sarima' or 'train_arima'.
+            data (pd.Series): The series the result was computed from.
+            exog (pd.DataFrame): Exogenous variables, or None.
+            **spec: Orders, seasonal orders and any other settings that
+                change the result. Values must be JSON serialisable (or str-able).
+
+        Returns:
+            str: Hex digest identifying the result.
+        """
+        payload = {
+            "kind": kind,
+            "data": data_fingerprint(data),
+            "index": _index_fingerprint(data),
+            "exog": data_fingerprint(exog) if exog is not None else None,
+            "spec": spec,
+            "versions": [statsmodels.__version__, np.__version__, pd.__version__],
+        }
+        encoded = json.dumps(payload, sort_keys=True, default=str).encode()
+        return hashlib.sha256(encoded).hexdigest()
+
+    def get(self, key):
+        """
+        Look up a cached entry.
+
+        Returns:
+            tuple: (found, value). value is None on a miss.
+        """
+        with self.lock:
+            if key in self.index and os.path.exists(self.saver.model_path(key)):
+                value = self.saver.load_model(key)
+                self.hits += 1
+                self.index[key]["last_access"] = time.time()
+                self._write_index()
+                logger.info(f"Result cache hit ({self.hits} hits, {self.misses} misses).")
+                return True, value
+            self.misses += 1
+            self.index.pop(key, None)
+            logger.info(f"Result cache miss ({self.hits} hits, {self.misses} misses).")
+            return False, None
+
+    def put(self, key, value):
+        """Store an entry and evict old ones if the cache is over its limits."""
+        with self.lock:
+            self.saver.save_model(value, key)
+            self.index[key] = {
+                "last_access": time.time(),
+                "size": os.path.getsize(self.saver.model_path(key)),
+            }
+            self._evict()
+            self._write_index()
+
+    def get_or_compute(self, key, compute):
+        """
+        Return the cached value for key, computing and storing it on a miss.
+
+        Args:
+            key (str): Key from make_key().
+            compute (callable): Zero-argument function producing the value.
+        """
+        found, value = self.get(key)
+        if not found:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def stats(self):
+        """Return hit/miss counts and the current cache size."""
+        with self.lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self.index),
+                "bytes": sum(entry["size"] for entry in self.index.values()),
+            }
+
+    def _evict(self):
+        """Drop least-recently-used entries until both limits are met."""
+        by_age = sorted(self.index, key=lambda k: self.index[k]["last_access"])
+        total = sum(entry["size"] for entry in self.index.values())
+        while by_age and (len(self.index) > self.max_entries or total > self.max_bytes):
+            key = by_age.pop(0)
+            total -= self.index.pop(key)["size"]
+            self.saver.delete_model(key)
+            logger.info(f"Result cache evicted {key}.")
+
+    def _write_index(self):
+        tmp_file = f"{self.index_file}.tmp"
+        with open(tmp_file, "w") as f:
+            json.dump(self.index, f)
+        os.replace(tmp_file, self.index_file)
+
+
+def _index_fingerprint(data):
+    """Hash the index of a pandas object so results carry the right dates."""
+    if not hasattr(data, "index"):
+        return None
+    return hashlib.sha1(pd.util.hash_pandas_object(data.index).values.tobytes()).hexdigest()
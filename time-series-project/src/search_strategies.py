@@ -0,0 +1,142 @@
+import math
+import random
+
+
+def _rank_key(outcome, criterion):
+    """Sort key that puts failed fits after every successful one."""
+    if outcome["error"] is not None or outcome[criterion] is None:
+        return float("inf")
+    value = outcome[criterion]
+    return value if value == value else float("inf")
+
+
+class GridSearch:
+    def __init__(self, criterion="score"):
+        """
+        Exhaustive search: fit every candidate on the full history.
+
+        Args:
+            criterion (str): Outcome key used to rank candidates ('score' or 'aic').
+        """
+        self.criterion = criterion
+
+    def search(self, candidates, evaluate):
+        """
+        Run the search.
+
+        Args:
+            candidates (list): Candidates in grid order.
+            evaluate (callable): evaluate(candidates, fraction=1.0, maxiter=None)
+                returns one outcome dict per candidate.
+
+        Returns:
+            list: (candidate, outcome) pairs for every full fit, in grid order.
+        """
+        return list(zip(candidates, evaluate(candidates)))
+
+
+class RandomSearch:
+    def __init__(self, n_iter=10, random_state=None, criterion="score"):
+        """
+        Fit a random subset of the grid on the full history.
+
+        Args:
+            n_iter (int): Number of candidates to sample.
+            random_state (int): Seed for reproducible sampling.
+            criterion (str): Outcome key used to rank candidates ('score' or 'aic').
+        """
+        self.n_iter = n_iter
+        self.random_state = random_state
+        self.criterion = criterion
+
+    def search(self, candidates, evaluate):
+        rng = random.Random(self.random_state)
+        picked = sorted(rng.sample(range(len(candidates)), min(self.n_iter, len(candidates))))
+        subset = [candidates[i] for i in picked]
+        return list(zip(subset, evaluate(subset)))
+
+
+class SuccessiveHalving:
+    def __init__(self, min_fraction=1 / 9, eta=3, maxiter=10, min_obs=60, criterion="score"):
+        """
+        Successive halving over history length.
+
+        Every candidate is first fitted on the most recent `min_fraction` of the
+        series with a capped number of optimizer iterations. Only the best
+        1/eta of each rung moves on to a rung with eta times more history,
+        and the survivors of the last rung get a full fit.
+
+        Args:
+            min_fraction (float): Share of the history used by the first rung.
+            eta (int): Reduction factor between rungs.
+            maxiter (int): Optimizer iteration cap for the cheap rungs.
+            min_obs (int): Never truncate the history below this many points.
+            criterion (str): Outcome key used to rank candidates ('score' or 'aic').
+        """
+        self.min_fraction = min_fraction
+        self.eta = eta
+        self.maxiter = maxiter
+        self.min_obs = min_obs
+        self.criterion = criterion
+
+    def search(self, candidates, evaluate):
+        survivors = list(candidates)
+        fraction = self.min_fraction
+        while fraction < 1 and len(survivors) > 1:
+            outcomes = evaluate(survivors, fraction=fraction, maxiter=self.maxiter,
+                                min_obs=self.min_obs)
+            order = sorted(range(len(survivors)),
+                           key=lambda i: (_rank_key(outcomes[i], self.criterion), i))
+            keep = sorted(order[:max(1, math.ceil(len(survivors) / self.eta))])
+            survivors = [survivors[i] for i in keep]
+            fraction *= self.eta
+        return list(zip(survivors, evaluate(survivors)))
+
+
+class StepwiseSearch:
+    def __init__(self, max_steps=20, criterion="aic"):
+        """
+        Greedy stepwise search in the style of auto-ARIMA.
+
+        Starts from the middle of the grid and repeatedly moves to the best
+        neighbour (one grid step up or down in a single order term), stopping
+        when no neighbour improves on the current candidate.
+
+        Args:
+            max_steps (int): Maximum number of moves.
+            criterion (str): Outcome key used to rank candidates ('aic' or 'score').
+        """
+        self.max_steps = max_steps
+        self.criterion = criterion
+
+    def search(self, candidates, evaluate):
+        params = [c[0] for c in candidates]
+        axes = [sorted(set(values)) for values in zip(*params)]
+        position = {
+            tuple(axis.index(v) for axis, v in zip(axes, p)): i for i, p in enumerate(params)
+        }
+        scored = {}
+
+        def score(indices):
+            todo = [i for i in indices if i not in scored]
+            for i, outcome in zip(todo, evaluate([candidates[i] for i in todo])):
+                scored[i] = outcome
+            return {i: _rank_key(scored[i], self.criterion) for i in indices}
+
+        current = position.get(tuple(len(axis) // 2 for axis in axes), 0)
+        best = score([current])[current]
+        for _ in range(self.max_steps):
+            here = [axes[k].index(v) for k, v in enumerate(params[current])]
+            neighbours = []
+            for k in range(len(axes)):
+                for step in (-1, 1):
+                    moved = list(here)
+                    moved[k] += step
+                    if tuple(moved) in position:
+                        neighbours.append(position[tuple(moved)])
+            ranks = score(sorted(neighbours))
+            move = min(ranks, key=lambda i: (ranks[i], i), default=None)
+            if move is None or ranks[move] >= best:
+                break
+            current, best = move, ranks[move]
+        return [(candidates[i], scored[i]) for i in sorted(scored)]
@@ -1,25 +1,40 @@
 import pandas as pd
-from statsmodels.tsa.arima.model import ARIMA
-from statsmodels.tsa.statespace.sarimax import SARIMAX
-from sklearn.metrics import mean_absolute_error
+from src.fit_cache import data_fingerprint, fit_summary, fit_with_warm_start
+from src.result_cache import ResultCache
+from src.lazy_imports import import_lock
+from src.instrumentation import timed
+from src.baseline_models import Drift, HoltWinters, SeasonalNaive
+from src.forecast_distribution import forecast_distribution
 import warnings
 
 warnings.filterwarnings("ignore")
 
 
 class TimeSeriesModels:
-    def __init__(self, data, test_size=0.2):
+    def __init__(self, data, test_size=0.2, fit_cache=None, result_cache=None, exog=None):
         """
         Initialize the TimeSeriesModels class.
         
         Args:
             data (pd.Series): Time series data.
             test_size (float): Proportion of data for testing (default 0.2).
+            fit_cache (FitCache): Warm-start cache, e.g. the one filled during
+                tuning. None (default) fits every model cold.
+            result_cache (ResultCache): On-disk cache of trained models.
+                None (default) always retrains.
+            exog (pd.DataFrame): Exogenous variables aligned with data (e.g.
+                from FeatureBuilder.build). They are split with the data and
+                used by train_sarimax when no exog is passed to it.
         """
         self.data = data
         self.train = None
         self.test = None
         self.test_size = test_size
+        self.fit_cache = fit_cache
+        self.result_cache = result_cache
+        self.exog = exog
+        self.exog_train = None
+        self.exog_test = None
         self.split_data()
 
     def split_data(self):
@@ -27,8 +42,30 @@ class TimeSeriesModels:
         n_test = int(len(self.data) * self.test_size)
         self.train = self.data[:-n_test]
         self.test = self.data[-n_test:]
+        if self.exog is not None:
+            self.exog_train = self.exog[:-n_test]
+            self.exog_test = self.exog[-n_test:]
         print("Train-test split completed.")
 
+    def _fit(self, model, order, seasonal_order, exog=None, **fit_kwargs):
+        """Fit a model, warm-starting from and recording into the fit cache."""
+        if self.fit_cache is None:
+            return model.fit(**fit_kwargs)
+        fingerprint = data_fingerprint(self.train, exog)
+        start_values = self.fit_cache.lookup(fingerprint, order, seasonal_order)
+        fitted_model = fit_with_warm_start(model, start_values, **fit_kwargs)
+        self.fit_cache.record(fingerprint, order, seasonal_order, fit_summary(fitted_model),
+                              warm=start_values is not None)
+        return fitted_model
+
+    def _cached(self, kind, train, exog=None, **spec):
+        """Return a cached training result, or run `train` and cache it."""
+        if self.result_cache is None:
+            return train()
+        key = ResultCache.make_key(kind, self.train, exog, n_test=len(self.test), **spec)
+        return self.result_cache.get_or_compute(key, train)
+
+    @timed("train.arima")
     def train_arima(self, order):
         """
         Train an ARIMA model.
@@ -40,11 +77,17 @@ class TimeSeriesModels:
             dict: Predictions and the fitted model.
         """
         print("Training ARIMA model...")
-        model = ARIMA(self.train, order=order)
-        fitted_model = model.fit()
-        predictions = fitted_model.forecast(steps=len(self.test))
-        return {"predictions": predictions, "model": fitted_model}
 
+        def train():
+            with import_lock:
+                from statsmodels.tsa.arima.model import ARIMA
+            model = ARIMA(self.train, order=order)
+            fitted_model = self._fit(model, order, None)
+            predictions = fitted_model.forecast(steps=len(self.test))
+            return {"predictions": predictions, "model": fitted_model}
+        return self._cached("train_arima", train, order=order)
+
+    @timed("train.sarima")
     def train_sarima(self, order, seasonal_order):
         """
         Train a SARIMA model.
@@ -57,30 +100,121 @@ class TimeSeriesModels:
             dict: Predictions and the fitted model.
         """
         print("Training SARIMA model...")
-        model = SARIMAX(self.train, order=order, seasonal_order=seasonal_order)
-        fitted_model = model.fit(disp=False)
-        predictions = fitted_model.forecast(steps=len(self.test))
-        return {"predictions": predictions, "model": fitted_model}
 
-    def train_sarimax(self, order, seasonal_order, exog_train, exog_test):
+        def train():
+            with import_lock:
+                from statsmodels.tsa.statespace.sarimax import SARIMAX
+            model = SARIMAX(self.train, order=order, seasonal_order=seasonal_order)
+            fitted_model = self._fit(model, order, seasonal_order, disp=False)
+            predictions = fitted_model.forecast(steps=len(self.test))
+            return {"predictions": predictions, "model": fitted_model}
+        return self._cached("train_sarima", train, order=order, seasonal_order=seasonal_order)
+
+    @timed("train.sarimax")
+    def train_sarimax(self, order, seasonal_order, exog_train=None, exog_test=None):
         """
         Train a SARIMAX model.
         
         Args:
             order (tuple): ARIMA order (p, d, q).
             seasonal_order (tuple): Seasonal order (P, D, Q, m).
-            exog_train (pd.DataFrame): Exogenous variables for training.
-            exog_test (pd.DataFrame): Exogenous variables for testing.
+            exog_train (pd.DataFrame): Exogenous variables for training
+                (default: the training split of the exog given at construction).
+            exog_test (pd.DataFrame): Exogenous variables for testing
+                (default: the test split of the exog given at construction).
         
         Returns:
             dict: Predictions and the fitted model.
         """
         print("Training SARIMAX model...")
-        model = SARIMAX(self.train, order=order, seasonal_order=seasonal_order, exog=exog_train)
-        fitted_model = model.fit(disp=False)
-        predictions = fitted_model.forecast(steps=len(self.test), exog=exog_test)
+        exog_train = self.exog_train if exog_train is None else exog_train
+        exog_test = self.exog_test if exog_test is None else exog_test
+
+        def train():
+            with import_lock:
+                from statsmodels.tsa.statespace.sarimax import SARIMAX
+            model = SARIMAX(self.train, order=order, seasonal_order=seasonal_order, exog=exog_train)
+            fitted_model = self._fit(model, order, seasonal_order, exog=exog_train, disp=False)
+            predictions = fitted_model.forecast(steps=len(self.test), exog=exog_test)
+            return {"predictions": predictions, "model": fitted_model}
+        return self._cached(
+            "train_sarimax", train, exog=exog_train, order=order, seasonal_order=seasonal_order,
+            exog_test=data_fingerprint(exog_test) if exog_test is not None else None,
+        )
+
+    @timed("train.baseline")
+    def train_baseline(self, baseline):
+        """
+        Train a baseline from src.baseline_models.
+
+        Baselines fit in well under a millisecond, so they are never cached.
+
+        Args:
+            baseline: A SeasonalNaive, Drift or HoltWinters instance.
+
+        Returns:
+            dict: Predictions and the fitted baseline.
+        """
+        print(f"Training {baseline.name} baseline...")
+        fitted_model = baseline.fit(self.train)
+        predictions = fitted_model.forecast(steps=len(self.test))
+        predictions.index = self.test.index
         return {"predictions": predictions, "model": fitted_model}
 
+    def train_seasonal_naive(self, period=7):
+        """Train a seasonal naive baseline (see train_baseline)."""
+        return self.train_baseline(SeasonalNaive(period=period))
+
+    def train_drift(self):
+        """Train a drift baseline (see train_baseline)."""
+        return self.train_baseline(Drift())
+
+    def train_holt_winters(self, period=7, trend=True, seasonal=True):
+        """Train an additive Holt-Winters baseline (see train_baseline)."""
+        return self.train_baseline(HoltWinters(period=period, trend=trend, seasonal=seasonal))
+
+    def forecast_distribution(self, model, exog=None, **kwargs):
+        """
+        Predictive distribution of a trained model over the test period.
+
+        Args:
+            model: The 'model' returned by one of the train_* methods.
+            exog (pd.DataFrame): Future exog for SARIMAX (default: the test
+                split of the exog given at construction).
+            **kwargs: Passed to src.forecast_distribution.forecast_distribution
+                (method, n_samples, batch_size, bootstrap, seed).
+
+        Returns:
+            ForecastDistribution: Quantiles, intervals and scores for the test period.
+        """
+        if exog is None and hasattr(model, "model") and model.model.k_exog:
+            exog = self.exog_test
+        distribution = forecast_distribution(model, len(self.test), exog=exog, **kwargs)
+        distribution.index = self.test.index
+        return distribution
+
+    def evaluate_distribution(self, distribution, model_name, quantiles=(0.05, 0.5, 0.95), alpha=0.05):
+        """
+        Evaluate a forecast distribution against the test set.
+
+        Args:
+            distribution (ForecastDistribution): From forecast_distribution().
+            model_name (str): Name of the model.
+            quantiles (tuple): Quantiles scored with the pinball loss.
+            alpha (float): Width of the interval whose coverage is reported.
+
+        Returns:
+            dict: Mean CRPS, pinball loss per quantile and interval coverage.
+        """
+        scores = {
+            "CRPS": float(distribution.crps(self.test).mean()),
+            **{f"pinball_{q}": float(v) for q, v in distribution.pinball_loss(self.test, quantiles).items()},
+            f"coverage_{1 - alpha:g}": distribution.coverage(self.test, alpha),
+        }
+        print(f"{model_name} CRPS: {scores['CRPS']}, {1 - alpha:.0%} interval coverage: "
+              f"{scores[f'coverage_{1 - alpha:g}']}")
+        return scores
+
     def evaluate(self, predictions, model_name):
         """
         Evaluate the model using Mean Absolute Error (MAE).
@@ -89,6 +223,8 @@ class TimeSeriesModels:
             predictions (pd.Series): Predictions from the model.
             model_name (str): Name of the model.
         """
+        with import_lock:
+            from sklearn.metrics import mean_absolute_error
         mae = mean_absolute_error(self.test, predictions)
         print(f"{model_name} Mean Absolute Error (MAE): {mae}")
         return mae
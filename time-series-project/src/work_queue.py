@@ -0,0 +1,412 @@
+import hashlib
+import importlib
+import logging
+import multiprocessing
+import os
+import pickle
+import socket
+import sqlite3
+import time
+import uuid
+from contextlib import contextmanager
+from src.instrumentation import record
+
+logger = logging.getLogger("TimeSeriesPipeline")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    key TEXT PRIMARY KEY,
+    payload BLOB NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    lease_until REAL,
+    result BLOB,
+    error TEXT,
+    submitted REAL NOT NULL,
+    finished REAL
+);
+CREATE INDEX IF NOT EXISTS tasks_status ON tasks (status, submitted);
+CREATE TABLE IF NOT EXISTS blobs (
+    key TEXT PRIMARY KEY,
+    data BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS waiters (
+    key TEXT NOT NULL,
+    owner TEXT NOT NULL,
+    PRIMARY KEY (key, owner)
+);
+"""
+
+
+class BlobRef:
+    def __init__(self, key):
+        """Placeholder in task arguments for a blob stored once in the queue (e.g. a series)."""
+        self.key = key
+
+
+class SQLiteWorkQueue:
+    def __init__(self, path="time-series-project/models/work_queue.sqlite", lease_seconds=600, max_attempts=3):
+        """
+        Task queue in a SQLite file, shared by a coordinator and any number of
+        worker processes on the same machine (or a filesystem with working locks).
+
+        Tasks are keyed by their content, so submitting a task twice runs it
+        once and a restarted coordinator picks up finished results. A claimed
+        task is leased to one worker; if the worker dies the lease expires
+        and another worker retries it, up to `max_attempts` times.
+
+        Another backend (e.g. a message broker) can replace this class by
+        providing the same methods: submit, claim, complete, fail, wait,
+        cancel, put_blob and get_blob.
+
+        Args:
+            path (str): SQLite database file, created if missing.
+            lease_seconds (float): How long a worker may hold a task before
+                it is handed to another worker.
+            max_attempts (int): Claims per task before it is marked failed.
+        """
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        # One short-lived connection per call keeps the queue usable from threads and processes
+        connection = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+        try:
+            yield connection
+        finally:
+            connection.close()
+
+    @contextmanager
+    def _transaction(self):
+        with self._connect() as connection:
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                yield connection
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            connection.execute("COMMIT")
+
+    def put_blob(self, obj):
+        """
+        Store an object once and return a reference to use in task arguments.
+
+        Args:
+            obj: Any picklable object, typically a series shared by many tasks.
+
+        Returns:
+            BlobRef: Reference resolved by workers before a task runs.
+        """
+        data = pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+        key = hashlib.sha256(data).hexdigest()
+        with self._connect() as connection:
+            connection.execute("INSERT OR IGNORE INTO blobs (key, data) VALUES (?, ?)", (key, data))
+        return BlobRef(key)
+
+    def get_blob(self, key):
+        with self._connect() as connection:
+            row = connection.execute("SELECT data FROM blobs WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            raise KeyError(f"Blob {key} is not in the queue.")
+        return pickle.loads(row[0])
+
+    def submit(self, tasks, owner=None):
+        """
+        Add tasks to the queue.
+
+        Tasks already queued, running or done are left alone; failed ones
+        are reset so they are tried again.
+
+        Args:
+            tasks (list): (key, func, args) tuples, where func is an import
+                path such as 'src.hyperparametertune:fit_candidate'.
+            owner (str): Coordinator waiting for the tasks. cancel() with the
+                same owner only drops tasks no other coordinator waits for.
+        """
+        now = time.time()
+        rows = [(key, pickle.dumps((func, tuple(args)), protocol=pickle.HIGHEST_PROTOCOL), now)
+                for key, func, args in tasks]
+        with self._transaction() as connection:
+            connection.executemany(
+                "INSERT INTO tasks (key, payload, submitted) VALUES (?, ?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET status = 'pending', attempts = 0, error = NULL "
+                "WHERE status = 'failed'",
+                rows,
+            )
+            if owner is not None:
+                connection.executemany("INSERT OR IGNORE INTO waiters (key, owner) VALUES (?, ?)",
+                                       [(key, owner) for key, _, _ in tasks])
+
+    def claim(self, worker_id):
+        """
+        Lease the oldest runnable task to a worker.
+
+        Returns:
+            tuple: (key, func, args), or None when nothing is runnable.
+        """
+        now = time.time()
+        with self._transaction() as connection:
+            connection.execute(
+                "UPDATE tasks SET status = 'failed', finished = ?, "
+                "error = 'Lease expired on the last attempt: ' || COALESCE(worker, '?') "
+                "WHERE status = 'running' AND lease_until < ? AND attempts >= ?",
+                (now, now, self.max_attempts),
+            )
+            row = connection.execute(
+                "SELECT key, payload FROM tasks WHERE status = 'pending' "
+                "OR (status = 'running' AND lease_until < ?) ORDER BY submitted LIMIT 1",
+                (now,),
+            ).fetchone()
+            if row is None:
+                return None
+            connection.execute(
+                "UPDATE tasks SET status = 'running', attempts = attempts + 1, worker = ?, lease_until = ? "
+                "WHERE key = ?",
+                (worker_id, now + self.lease_seconds, row[0]),
+            )
+        func, args = pickle.loads(row[1])
+        return row[0], func, args
+
+    def complete(self, key, worker_id, result):
+        """Store a task's result. The first result wins; later duplicates are dropped."""
+        with self._connect() as connection:
+            connection.execute(
+                "UPDATE tasks SET status = 'done', result = ?, error = NULL, worker = ?, finished = ? "
+                "WHERE key = ? AND status != 'done'",
+                (pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL), worker_id, time.time(), key),
+            )
+
+    def fail(self, key, worker_id, error):
+        """Return a task to the queue after an error, or mark it failed on its last attempt."""
+        with self._connect() as connection:
+            connection.execute(
+                "UPDATE tasks SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                "error = ?, lease_until = NULL WHERE key = ? AND worker = ? AND status = 'running'",
+                (self.max_attempts, error, key, worker_id),
+            )
+
+    def _finished(self, keys):
+        found = {}
+        with self._connect() as connection:
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                marks = ",".join("?" * len(chunk))
+                found.update({row[0]: row[1:] for row in connection.execute(
+                    f"SELECT key, status, result, error FROM tasks WHERE key IN ({marks})", chunk)})
+        return found
+
+    def wait(self, keys, on_result=None, poll_interval=0.2, timeout=None, idle_timeout=None):
+        """
+        Wait for tasks to finish.
+
+        Args:
+            keys (list): Task keys to wait for.
+            on_result (callable): Called as on_result(key, result, error) as
+                each task finishes. If it raises, waiting stops.
+            poll_interval (float): Seconds between checks of the queue.
+            timeout (float): Seconds to wait before raising TimeoutError.
+            idle_timeout (float): Raise TimeoutError once no task has finished
+                or been running for this many seconds, e.g. when no worker
+                is reading the queue.
+
+        Returns:
+            dict: key -> (result, error); result is None for failed tasks.
+        """
+        now = time.monotonic()
+        deadline = None if timeout is None else now + timeout
+        last_activity = now
+        pending = list(dict.fromkeys(keys))
+        outcomes = {}
+        while pending:
+            rows = self._finished(pending)
+            still_pending = []
+            for key in pending:
+                row = rows.get(key)
+                if row is None:
+                    outcome = (None, "Task was removed from the queue.")
+                elif row[0] == "done":
+                    outcome = (pickle.loads(row[1]), None)
+                elif row[0] == "failed":
+                    outcome = (None, row[2])
+                else:
+                    still_pending.append(key)
+                    continue
+                outcomes[key] = outcome
+                if on_result is not None:
+                    on_result(key, *outcome)
+            now = time.monotonic()
+            if len(still_pending) < len(pending) or any(rows[key][0] == "running" for key in still_pending):
+                last_activity = now
+            pending = still_pending
+            if pending:
+                if deadline is not None and now > deadline:
+                    raise TimeoutError(f"{len(pending)} task(s) still unfinished after {timeout}s.")
+                if idle_timeout is not None and now - last_activity > idle_timeout:
+                    raise TimeoutError(f"No worker has run any of {len(pending)} queued task(s) "
+                                       f"for {idle_timeout}s.")
+                time.sleep(poll_interval)
+        return outcomes
+
+    def cancel(self, keys, owner=None):
+        """
+        Drop tasks that no worker has claimed yet.
+
+        Args:
+            keys (list): Task keys.
+            owner (str): The coordinator giving up on the tasks, as passed to
+                submit(). Its claim on every key is released, and a pending
+                task is only dropped once no other coordinator waits for it.
+                None drops every pending task among the keys.
+        """
+        keys = list(keys)
+        with self._transaction() as connection:
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                marks = ",".join("?" * len(chunk))
+                if owner is None:
+                    connection.execute(f"DELETE FROM tasks WHERE status = 'pending' AND key IN ({marks})", chunk)
+                    continue
+                connection.execute(f"DELETE FROM waiters WHERE owner = ? AND key IN ({marks})", [owner, *chunk])
+                connection.execute(
+                    f"DELETE FROM tasks WHERE status = 'pending' AND key IN ({marks}) "
+                    "AND NOT EXISTS (SELECT 1 FROM waiters WHERE waiters.key = tasks.key)",
+                    chunk,
+                )
+
+    def release(self, keys, owner):
+        """
+        Forget tasks a coordinator has collected or given up on.
+
+        The owner's claim on every key is dropped, then tasks no other
+        coordinator waits for are deleted with their results (a worker
+        still running one finds it gone and drops its result), and the
+        blobs once no task is left to use them.
+
+        Args:
+            keys (list): Task keys, as passed to submit().
+            owner (str): The coordinator, as passed to submit().
+        """
+        keys = list(keys)
+        with self._transaction() as connection:
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                marks = ",".join("?" * len(chunk))
+                connection.execute(f"DELETE FROM waiters WHERE owner = ? AND key IN ({marks})", [owner, *chunk])
+                connection.execute(
+                    f"DELETE FROM tasks WHERE key IN ({marks}) "
+                    "AND NOT EXISTS (SELECT 1 FROM waiters WHERE waiters.key = tasks.key)",
+                    chunk,
+                )
+            connection.execute("DELETE FROM blobs WHERE NOT EXISTS (SELECT 1 FROM tasks)")
+
+    def purge(self):
+        """Delete finished tasks no coordinator waits for, and the blobs once no task is left to use them."""
+        with self._transaction() as connection:
+            connection.execute("DELETE FROM tasks WHERE status IN ('done', 'failed') "
+                               "AND NOT EXISTS (SELECT 1 FROM waiters WHERE waiters.key = tasks.key)")
+            connection.execute("DELETE FROM waiters WHERE key NOT IN (SELECT key FROM tasks)")
+            connection.execute("DELETE FROM blobs WHERE NOT EXISTS (SELECT 1 FROM tasks)")
+
+    def counts(self):
+        """Number of tasks per status."""
+        with self._connect() as connection:
+            return dict(connection.execute("SELECT status, COUNT(*) FROM tasks GROUP BY status").fetchall())
+
+
+def _resolve(func):
+    module, name = func.split(":")
+    return getattr(importlib.import_module(module), name)
+
+
+def run_task(queue, func, args, blob_cache=None):
+    """
+    Run one task: resolve blob references, then call the function.
+
+    Args:
+        queue: The queue holding the blobs.
+        func (str): Import path, 'package.module:function'.
+        args (tuple): Arguments, possibly containing BlobRef placeholders.
+        blob_cache (dict): Blobs already loaded by this worker.
+    """
+    blob_cache = {} if blob_cache is None else blob_cache
+    resolved = []
+    for arg in args:
+        if isinstance(arg, BlobRef):
+            if arg.key not in blob_cache:
+                if len(blob_cache) >= 32:
+                    blob_cache.pop(next(iter(blob_cache)))
+                blob_cache[arg.key] = queue.get_blob(arg.key)
+            arg = blob_cache[arg.key]
+        resolved.append(arg)
+    return _resolve(func)(*resolved)
+
+
+def run_worker(queue, worker_id=None, poll_interval=0.5, idle_timeout=None, max_tasks=None):
+    """
+    Claim and run tasks until the queue stays empty or a task limit is hit.
+
+    Workers keep no state besides a cache of blobs, so any number of them
+    can be started or killed at any time.
+
+    Args:
+        queue: A SQLiteWorkQueue (or another backend).
+        worker_id (str): Name recorded with claimed tasks (default host:pid:random).
+        poll_interval (float): Seconds to sleep when the queue is empty.
+        idle_timeout (float): Exit after this many idle seconds; None runs forever.
+        max_tasks (int): Exit after this many tasks; None for no limit.
+
+    Returns:
+        int: Number of tasks run.
+    """
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+    blob_cache = {}
+    done = 0
+    idle_since = time.monotonic()
+    while max_tasks is None or done < max_tasks:
+        task = queue.claim(worker_id)
+        if task is None:
+            if idle_timeout is not None and time.monotonic() - idle_since > idle_timeout:
+                break
+            time.sleep(poll_interval)
+            continue
+        key, func, args = task
+        start = time.perf_counter()
+        try:
+            result = run_task(queue, func, args, blob_cache)
+        except Exception as e:
+            logger.warning(f"Task {key[:12]} failed on {worker_id}: {type(e).__name__}: {e}")
+            queue.fail(key, worker_id, f"{type(e).__name__}: {e}")
+        else:
+            queue.complete(key, worker_id, result)
+        record("queue.task", key=key[:12], func=func, worker=worker_id,
+               duration_s=round(time.perf_counter() - start, 6))
+        done += 1
+        idle_since = time.monotonic()
+    return done
+
+
+def start_local_workers(queue, n_workers, **worker_kwargs):
+    """
+    Start worker processes on this machine.
+
+    Args:
+        queue: The queue the workers read from (it must be picklable).
+        n_workers (int): Number of processes.
+        **worker_kwargs: Passed to run_worker (e.g. idle_timeout).
+
+    Returns:
+        list: The started multiprocessing.Process objects.
+    """
+    processes = []
+    for _ in range(n_workers):
+        process = multiprocessing.Process(target=run_worker, args=(queue,), kwargs=worker_kwargs, daemon=True)
+        process.start()
+        processes.append(process)
+    return processes
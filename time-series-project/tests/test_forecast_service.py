@@ -0,0 +1,45 @@
+import pickle
+from src.forecast_service import ForecastService, ModelRegistry
+from src.model_saving import ModelSaver
+
+
+def make_service(tmp_path):
+    model_dir = tmp_path / "models"
+    return ForecastService(ModelRegistry(ModelSaver(str(model_dir))))
+
+
+def test_model_names_outside_the_model_directory_are_rejected(tmp_path):
+    service = make_service(tmp_path)
+    with open(tmp_path / "outside.pkl", "wb") as f:
+        pickle.dump("not a model", f)
+    for name in ("../outside", "sub/../../outside", str(tmp_path / "outside")):
+        response = service.forecast([{"model": name, "steps": 3}])[0]
+        assert response["status"] == 400
+    assert service.registry.stats()["loads"] == 0
+
+
+def test_unknown_models_are_not_found(tmp_path):
+    response = make_service(tmp_path).forecast([{"model": "ARIMA_Tuned", "steps": 3}])[0]
+    assert response["status"] == 404
+
+
+def test_malformed_requests_get_an_error_each(tmp_path):
+    requests = [{"model": "ARIMA_Tuned"}, {"model": "ARIMA_Tuned", "steps": "three"}, ["ARIMA_Tuned", 3],
+                {"model": "ARIMA_Tuned", "steps": 3, "alpha": 2}, {"steps": 3}]
+    responses = make_service(tmp_path).forecast(requests)
+    assert [response["status"] for response in responses] == [400] * len(requests)
+
+
+def test_branch_names_forecast_from_the_baseline_that_won(tmp_path):
+    import numpy as np
+    import pandas as pd
+    from src.baseline_models import SeasonalNaive
+    index = pd.date_range("2021-01-01", periods=28, freq="D")
+    series = pd.Series(np.tile(np.arange(7.0), 4) + np.linspace(0, 1, 28), index=index)
+    service = make_service(tmp_path)
+    service.registry.model_saver.save_model(SeasonalNaive(period=7).fit(series), "SARIMA_Baseline")
+    branch, saved = service.forecast([{"model": "SARIMA", "steps": 7}, {"model": "SARIMA_Baseline", "steps": 7}])
+    assert "error" not in branch
+    assert branch["mean"] == saved["mean"] == series.iloc[-7:].tolist()
+    assert branch["index"][0] == "2021-01-29"
+    assert all(low <= mean <= high for low, mean, high in zip(branch["lower"], branch["mean"], branch["upper"]))
@@ -0,0 +1,34 @@
+import warnings
+import numpy as np
+import pandas as pd
+from statsmodels.tsa.statespace.sarimax import SARIMAX
+from src.hyperparametertune import SCORE_STEPS, fit_candidate
+
+
+def weekly_series():
+    index = pd.date_range("2020-01-01", periods=120, freq="D")
+    rng = np.random.default_rng(0)
+    weekend = (index.dayofweek >= 5).astype(float)
+    series = pd.Series(10 + 5 * weekend + rng.normal(size=len(index)), index=index)
+    exog = pd.DataFrame({"weekend": weekend}, index=index)
+    future_index = pd.date_range(index[-1], periods=SCORE_STEPS + 1, freq="D")[1:]
+    exog_future = pd.DataFrame({"weekend": (future_index.dayofweek >= 5).astype(float)}, index=future_index)
+    return series, exog, exog_future
+
+
+def test_exog_candidates_are_scored_with_the_future_exog():
+    series, exog, exog_future = weekly_series()
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        outcome = fit_candidate(series, exog, (1, 0, 0), (0, 0, 0, 7), exog_future=exog_future)
+        model = SARIMAX(series, exog=exog, order=(1, 0, 0), seasonal_order=(0, 0, 0, 7)).fit(disp=False)
+    forecast = model.forecast(SCORE_STEPS, exog=exog_future)
+    expected = np.mean((series.to_numpy()[-SCORE_STEPS:] - forecast.to_numpy()) ** 2)
+    assert outcome["error"] is None
+    np.testing.assert_allclose(outcome["score"], expected, rtol=1e-6)
+
+
+def test_exog_candidates_without_future_exog_fail():
+    series, exog, _ = weekly_series()
+    outcome = fit_candidate(series, exog, (1, 0, 0), (0, 0, 0, 7))
+    assert outcome["score"] is None and "exog_future" in outcome["error"]
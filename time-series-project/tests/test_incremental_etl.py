@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.etl_pipeline import ETLPipeline
+from src.local_s3 import DirectoryS3Client
+
+
+class CountingS3Client(DirectoryS3Client):
+    def __init__(self, root):
+        super().__init__(root)
+        self.bytes_read = 0
+
+    def get_object(self, Bucket, Key, Range=None):
+        response = super().get_object(Bucket, Key, Range=Range)
+        self.bytes_read += response["ContentLength"]
+        return response
+
+
+def raw_rows(periods, corrected=0):
+    dates = pd.date_range("2015-01-01", periods=periods, freq="D")
+    views = np.round(np.random.default_rng(0).normal(20, 3, periods), 2)
+    views[len(views) - corrected:] += 100 if corrected else 0
+    return pd.DataFrame({"Date": dates.strftime("%Y-%m-%d"), "Views": views})
+
+
+@pytest.mark.parametrize("storage_format", ["csv", "feather", "parquet"])
+def test_incremental_run_matches_full_reload(tmp_path, storage_format):
+    (tmp_path / "s3" / "bucket").mkdir(parents=True)
+    source = tmp_path / "s3" / "bucket" / "raw.csv"
+    s3 = CountingS3Client(str(tmp_path / "s3"))
+    etl = ETLPipeline("bucket", "raw.csv", str(tmp_path / "raw.csv"), str(tmp_path / "processed"),
+                      storage_format=storage_format, s3_client=s3)
+
+    # First run, appended rows, then corrections inside the window
+    for raw, status in ((raw_rows(1000), "updated"), (raw_rows(1010), "updated"),
+                        (raw_rows(1010, corrected=3), "updated"), (raw_rows(1010, corrected=3), "unchanged")):
+        raw.to_csv(source, index=False)
+        s3.bytes_read = 0
+        assert etl.run_incremental(correction_window_days=7)["status"] == status
+        processed = etl.store.read()
+        np.testing.assert_allclose(processed["Views"].to_numpy(), raw["Views"].to_numpy())
+        assert (processed["Date"].dt.strftime("%Y-%m-%d") == raw["Date"]).all()
+
+    # Later runs only download the rows from the previous correction window on
+    raw_rows(1020).to_csv(source, index=False)
+    etl.run_incremental(correction_window_days=7)
+    assert 0 < s3.bytes_read < source.stat().st_size / 20
+
+
+def test_rewritten_source_is_read_whole(tmp_path):
+    (tmp_path / "s3" / "bucket").mkdir(parents=True)
+    source = tmp_path / "s3" / "bucket" / "raw.csv"
+    s3 = CountingS3Client(str(tmp_path / "s3"))
+    etl = ETLPipeline("bucket", "raw.csv", str(tmp_path / "raw.csv"), str(tmp_path / "processed"), s3_client=s3)
+    raw_rows(1000).to_csv(source, index=False)
+    etl.run_incremental()
+    raw_rows(500).to_csv(source, index=False)
+    s3.bytes_read = 0
+    etl.run_incremental()
+    assert s3.bytes_read == source.stat().st_size
+
+
+@pytest.mark.parametrize("prefix, quote", [("﻿", ""), ("", '"'), ("﻿", '"')])
+def test_quoted_header_and_bom_are_understood(tmp_path, prefix, quote):
+    (tmp_path / "s3" / "bucket").mkdir(parents=True)
+    source = tmp_path / "s3" / "bucket" / "raw.csv"
+    s3 = CountingS3Client(str(tmp_path / "s3"))
+    etl = ETLPipeline("bucket", "raw.csv", str(tmp_path / "raw.csv"), str(tmp_path / "processed"), s3_client=s3)
+    for periods in (100, 110):
+        body = raw_rows(periods).to_csv(index=False, header=False)
+        source.write_text(f"{prefix}{quote}Date{quote},{quote}Views{quote}\n{body}", encoding="utf-8")
+        s3.bytes_read = 0
+        assert etl.run_incremental()["status"] == "updated"
+    assert len(etl.store.read()) == 110
+    assert s3.bytes_read < source.stat().st_size
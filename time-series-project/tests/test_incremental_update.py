@@ -0,0 +1,27 @@
+import os
+import warnings
+import numpy as np
+import pandas as pd
+from statsmodels.tsa.arima.model import ARIMA
+from src.incremental_update import IncrementalUpdater
+from src.model_saving import ModelSaver, latest_model_name
+
+
+def test_updates_leave_the_trained_model_alone(tmp_path):
+    index = pd.date_range("2021-01-01", periods=60, freq="D")
+    series = pd.Series(np.random.default_rng(0).normal(size=60), index=index)
+    saver = ModelSaver(str(tmp_path))
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        saver.save_model(ARIMA(series[:50], order=(1, 0, 0)).fit(), "ARIMA_Tuned")
+        trained = os.path.getmtime(saver.model_path("ARIMA_Tuned"))
+        updater = IncrementalUpdater(saver)
+        updater.catch_up("ARIMA_Tuned", series, save_as="ARIMA_Updated")
+    assert os.path.getmtime(saver.model_path("ARIMA_Tuned")) == trained
+    assert latest_model_name(saver, "ARIMA") == "ARIMA_Updated"
+    assert saver.load_model("ARIMA_Updated").model._index[-1] == index[-1]
+    assert updater.catch_up("ARIMA_Updated", series, save_as="ARIMA_Updated") is None
+
+    updater.discard("ARIMA_Updated")
+    assert latest_model_name(saver, "ARIMA") == "ARIMA_Tuned"
+    assert not os.path.exists(updater._state_file("ARIMA_Updated"))
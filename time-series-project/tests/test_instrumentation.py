@@ -0,0 +1,23 @@
+import json
+import tracemalloc
+from src.instrumentation import enable_metrics, metrics_logger, span
+
+
+def test_nested_span_keeps_the_outer_peak(tmp_path):
+    metrics_file = tmp_path / "metrics.jsonl"
+    enable_metrics(str(metrics_file))
+    tracemalloc.start()
+    try:
+        with span("outer"):
+            block = bytearray(8 * 1024 ** 2)
+            del block
+            with span("inner"):
+                pass
+    finally:
+        tracemalloc.stop()
+        for handler in list(metrics_logger.handlers):
+            metrics_logger.removeHandler(handler)
+            handler.close()
+    peaks = {row["name"]: row["peak_traced_mb"] for row in map(json.loads, metrics_file.read_text().splitlines())}
+    assert peaks["outer"] >= 8
+    assert peaks["inner"] < 1
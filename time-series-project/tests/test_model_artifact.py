@@ -0,0 +1,71 @@
+import warnings
+import numpy as np
+import pandas as pd
+import pytest
+from statsmodels.tsa.arima.model import ARIMA
+from statsmodels.tsa.statespace.sarimax import SARIMAX
+from src.model_artifact import from_artifact, load_artifact, save_artifact, to_artifact
+
+STEPS = 10
+
+
+@pytest.fixture(scope="module")
+def data():
+    rng = np.random.default_rng(0)
+    index = pd.date_range("2020-01-01", periods=200, freq="D")
+    y = pd.Series(5 + 0.02 * np.arange(200) + np.cumsum(rng.normal(size=200)) * 0.1 + rng.normal(size=200),
+                  index=index, name="Views")
+    exog = pd.DataFrame({"x": rng.normal(size=200), "monday": (index.dayofweek == 0).astype(float)}, index=index)
+    future_index = pd.date_range(index[-1] + pd.Timedelta(days=1), periods=STEPS, freq="D")
+    future_exog = pd.DataFrame({"x": rng.normal(size=STEPS), "monday": (future_index.dayofweek == 0).astype(float)},
+                               index=future_index)
+    return y, exog, future_exog
+
+
+def fit(model):
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        return model.fit() if isinstance(model, ARIMA) else model.fit(disp=False)
+
+
+def assert_round_trip(results, future_exog=None):
+    rebuilt = from_artifact(*to_artifact(results))
+    np.testing.assert_allclose(np.asarray(rebuilt.forecast(STEPS, exog=future_exog)),
+                               np.asarray(results.forecast(STEPS, exog=future_exog)), atol=1e-8)
+
+
+def test_arima_with_constant(data):
+    y, _, _ = data
+    # d=0 includes a constant by default
+    assert_round_trip(fit(ARIMA(y, order=(2, 0, 1))))
+
+
+def test_arima_with_linear_trend(data):
+    y, _, _ = data
+    assert_round_trip(fit(ARIMA(y, order=(1, 1, 1), trend="t")))
+
+
+def test_arima_with_constant_and_trend(data):
+    y, _, _ = data
+    assert_round_trip(fit(ARIMA(y, order=(1, 0, 1), trend="ct")))
+
+
+@pytest.mark.parametrize("order", [(1, 0, 0), (1, 1, 0)])
+def test_arima_with_exog(data, order):
+    y, exog, future_exog = data
+    assert_round_trip(fit(ARIMA(y, exog=exog, order=order)), future_exog)
+
+
+def test_sarimax_with_exog_and_trend(data):
+    y, exog, future_exog = data
+    assert_round_trip(fit(SARIMAX(y, exog=exog, order=(1, 0, 0), seasonal_order=(1, 0, 0, 7), trend="ct")),
+                      future_exog)
+
+
+def test_saved_file_round_trip(data, tmp_path):
+    y, exog, future_exog = data
+    results = fit(ARIMA(y, exog=exog, order=(2, 0, 1)))
+    path = tmp_path / "model.npz"
+    save_artifact(results, path)
+    np.testing.assert_allclose(np.asarray(load_artifact(path).forecast(STEPS, exog=future_exog)),
+                               np.asarray(results.forecast(STEPS, exog=future_exog)), atol=1e-8)
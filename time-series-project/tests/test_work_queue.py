@@ -0,0 +1,45 @@
+import warnings
+from src.hyperparametertune import HyperparameterTuning, fit_candidate
+from src.work_queue import SQLiteWorkQueue
+from tests.test_hyperparametertune import weekly_series
+
+
+def test_cancel_keeps_tasks_another_coordinator_waits_for(tmp_path):
+    queue = SQLiteWorkQueue(path=str(tmp_path / "queue.sqlite"))
+    queue.submit([("shared", "builtins:len", ("ab",)), ("mine", "builtins:len", ("abc",))], owner="a")
+    queue.submit([("shared", "builtins:len", ("ab",))], owner="b")
+    queue.cancel(["shared", "mine"], owner="a")
+    assert queue.counts() == {"pending": 1}
+    queue.cancel(["shared"], owner="b")
+    assert queue.counts() == {}
+
+
+def test_queued_fits_run_locally_when_no_worker_reads_the_queue(tmp_path):
+    series, _, _ = weekly_series()
+    queue = SQLiteWorkQueue(path=str(tmp_path / "queue.sqlite"))
+    tuner = HyperparameterTuning(series, work_queue=queue, queue_idle_timeout=0.5)
+    args = [(series, None, order, None, None, None, None, None) for order in [(1, 0, 0), (0, 0, 1)]]
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        outcomes = tuner._fit_queued(args)
+        expected = [fit_candidate(*a) for a in args]
+    assert [o["score"] for o in outcomes] == [e["score"] for e in expected]
+    assert queue.counts() == {}
+
+
+def test_release_keeps_results_another_coordinator_waits_for(tmp_path):
+    queue = SQLiteWorkQueue(path=str(tmp_path / "queue.sqlite"))
+    ref = queue.put_blob("abc")
+    queue.submit([("shared", "builtins:len", (ref,)), ("mine", "builtins:len", (ref,))], owner="a")
+    queue.submit([("shared", "builtins:len", (ref,))], owner="b")
+    for key in ("shared", "mine"):
+        queue.complete(key, "worker", 3)
+    queue.release(["shared", "mine"], "a")
+    assert queue.counts() == {"done": 1}
+    assert queue.get_blob(ref.key) == "abc"
+    queue.purge()
+    assert queue.counts() == {"done": 1}
+    queue.release(["shared"], "b")
+    assert queue.counts() == {}
+    with queue._connect() as connection:
+        assert connection.execute("SELECT COUNT(*) FROM blobs").fetchone()[0] == 0
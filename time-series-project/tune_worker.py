@@ -0,0 +1,41 @@
+import argparse
+import sys
+from src.logging_config import setup_logging
+from src.work_queue import SQLiteWorkQueue, run_worker, start_local_workers
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run candidate fits from a tuning work queue.")
+    parser.add_argument("--queue", default="time-series-project/models/work_queue.sqlite",
+                        help="SQLite queue file shared with the coordinator")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes to start on this machine")
+    parser.add_argument("--idle-timeout", type=float, help="Exit after this many seconds without tasks")
+    parser.add_argument("--lease", type=float, default=600, help="Seconds before an unfinished task is retried")
+    parser.add_argument("--purge", action="store_true",
+                        help="Delete finished tasks no coordinator waits for and unused blobs, then exit")
+    args = parser.parse_args()
+
+    setup_logging(log_file="tune_worker.log", metrics_file="tune_worker_metrics.jsonl")
+    queue = SQLiteWorkQueue(args.queue, lease_seconds=args.lease)
+    if args.purge:
+        queue.purge()
+        print(f"Queue: {queue.counts()}")
+        return 0
+    print(f"Running {args.workers} worker(s) on {args.queue}")
+    if args.workers == 1:
+        done = run_worker(queue, idle_timeout=args.idle_timeout)
+        print(f"Ran {done} task(s).")
+        return 0
+    processes = start_local_workers(queue, args.workers, idle_timeout=args.idle_timeout)
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
+    print(f"Queue: {queue.counts()}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())